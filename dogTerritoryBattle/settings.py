@@ -140,6 +140,50 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CSRF_COOKIE_HTTPONLY = False
 CSRF_COOKIE_SECURE = False
 
+# コンピューター対戦の1手あたりの思考時間（秒）と最大探索深さ
+COMPUTER_PLAYER_TIME_BUDGET = float(os.getenv("COMPUTER_PLAYER_TIME_BUDGET", "1.0"))
+COMPUTER_PLAYER_MAX_DEPTH = int(os.getenv("COMPUTER_PLAYER_MAX_DEPTH", "8"))
+
+# 局面解析（モンテカルロ木探索）のプロセス数とプレイアウト数
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(os.cpu_count() or 1)))
+ANALYSIS_DEFAULT_PLAYOUTS = int(os.getenv("ANALYSIS_DEFAULT_PLAYOUTS", "400"))
+ANALYSIS_MAX_PLAYOUTS = int(os.getenv("ANALYSIS_MAX_PLAYOUTS", "5000"))
+# 解析の結果をキャッシュに残す秒数。結果は Django のキャッシュに保存するため、
+# 複数のワーカープロセスで動かす場合は共有のキャッシュ（Redis や Memcached）を設定すること
+ANALYSIS_RESULT_TIMEOUT = int(os.getenv("ANALYSIS_RESULT_TIMEOUT", "600"))
+
+# 後退解析で作成したエンドゲームテーブルのファイル（manage.py build_tablebase で作成）
+TABLEBASE_PATH = os.getenv("TABLEBASE_PATH", os.path.join(BASE_DIR, "tablebase.bin"))
+
+# ゲームの更新イベントを配信するブローカー（複数プロセスで共有する場合は差し替える）
+GAME_EVENT_BROKER = os.getenv(
+    "GAME_EVENT_BROKER", "dog_territory_battle_game.events.InProcessBroker"
+)
+
+# 手のログからゲームの状態を復元するためのスナップショットを取る間隔（手数）
+GAME_SNAPSHOT_INTERVAL = int(os.getenv("GAME_SNAPSHOT_INTERVAL", "10"))
+
+# 一覧 API の1ページの件数（?page_size= で変更できる上限）
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "100"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "1000"))
+
+# POST /api/games/bulk_create/ で一度に作成できるゲームの数
+BULK_CREATE_MAX_GAMES = int(os.getenv("BULK_CREATE_MAX_GAMES", "5000"))
+
+# GET/POST /api/games/bulk/ で一度に状態を取得できるゲームの数
+BULK_GAME_STATE_MAX_GAMES = int(os.getenv("BULK_GAME_STATE_MAX_GAMES", "1000"))
+
+# POST /api/moves/batch/ で一度に送信できる手の数
+BATCH_MOVES_MAX = int(os.getenv("BATCH_MOVES_MAX", "500"))
+
+# ゲームをプロセス内のアクターで所有し、手をメモリ上で確定してデータベースには
+# まとめて書き込むモード。ゲームごとのリクエストを同じプロセスに振り分ける場合にのみ有効にする
+GAME_ACTORS_ENABLED = os.getenv("GAME_ACTORS_ENABLED", "False") == "True"
+# アクターが受け付けた手をデータベースに書き込む間隔（秒）。0 の場合は書き込みのスレッドを起動しない
+GAME_ACTOR_FLUSH_INTERVAL = float(os.getenv("GAME_ACTOR_FLUSH_INTERVAL", "0.05"))
+# この秒数の間使われなかったアクターは、手を書き込んでから破棄する
+GAME_ACTOR_IDLE_TIMEOUT = float(os.getenv("GAME_ACTOR_IDLE_TIMEOUT", "300"))
+
 # LOGGING の設定
 LOGGING = {
     "version": 1,
@@ -1,6 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DogViewSet, PlayerViewSet, DogTypeViewSet, GameViewSet
+from .views import (
+    DogViewSet,
+    PlayerViewSet,
+    DogTypeViewSet,
+    GameViewSet,
+    game_events,
+    batch_moves,
+)
 
 router = DefaultRouter()
 router.register(r"dogs", DogViewSet, basename="dog")
@@ -11,5 +18,7 @@ router.register(r"games", GameViewSet)
 app_name = "dog_territory_battle_game_api"
 
 urlpatterns = [
+    path("games/<int:pk>/events/", game_events, name="game-events"),
+    path("moves/batch/", batch_moves, name="moves-batch"),
     path("", include(router.urls)),
 ]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GameConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "dog_territory_battle_game"
+
+    def ready(self):
+        from . import signals  # noqa: F401
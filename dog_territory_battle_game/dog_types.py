@@ -0,0 +1,51 @@
+from functools import lru_cache
+from .models import DogType
+
+
+@lru_cache(maxsize=None)
+def get_dog_types():
+    """
+    全ての犬種を犬種IDをキーにした辞書でプロセスごとに一度だけ読み込む。
+
+    犬種はほとんど変更されない参照データのため、Dog を読み込むたびに結合せず、
+    ここで読み込んだ DogType インスタンスを共有する（変更しないこと）。
+    犬種が保存・削除されると signals で invalidate_dog_types が呼ばれる。
+    """
+    return {dog_type.id: dog_type for dog_type in DogType.objects.all()}
+
+
+def invalidate_dog_types():
+    """
+    読み込んだ犬種を破棄し、次に使うときに読み込み直す。
+    """
+    get_dog_types.cache_clear()
+
+
+def get_dog_type(dog_type_id):
+    """
+    犬種IDに対応する DogType を返す。
+    読み込んだ犬種にない場合は、他のプロセスで追加された犬種として一度だけ読み込み直す。
+    """
+    dog_types = get_dog_types()
+    if dog_type_id not in dog_types:
+        invalidate_dog_types()
+        dog_types = get_dog_types()
+    try:
+        return dog_types[dog_type_id]
+    except KeyError:
+        raise DogType.DoesNotExist(f"Dog type not found: {dog_type_id}") from None
+
+
+def get_dog_types_by_name(names):
+    """
+    犬種名をキーにした DogType の辞書を返す。存在しない犬種名がある場合は DogType.DoesNotExist。
+    """
+    dog_types = {dog_type.name: dog_type for dog_type in get_dog_types().values()}
+    missing = set(names) - dog_types.keys()
+    if missing:
+        invalidate_dog_types()
+        dog_types = {dog_type.name: dog_type for dog_type in get_dog_types().values()}
+        missing = set(names) - dog_types.keys()
+    if missing:
+        raise DogType.DoesNotExist(f"Dog types not found: {sorted(missing)}")
+    return {name: dog_types[name] for name in names}
@@ -0,0 +1,12 @@
+from .movement import FIELD_MAX_SIZE, MOVE_OFFSETS, get_move_offsets
+from .bitboard import Bitboard
+from .zobrist import ZobristHash, canonical_key
+
+__all__ = [
+    "FIELD_MAX_SIZE",
+    "MOVE_OFFSETS",
+    "get_move_offsets",
+    "Bitboard",
+    "ZobristHash",
+    "canonical_key",
+]
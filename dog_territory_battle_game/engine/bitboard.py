@@ -0,0 +1,297 @@
+"""
+4x4 フィールドのビットボード表現。
+
+コマの座標をフィールド範囲（バウンディングボックス）の左上を原点に正規化し、
+マス (x, y) を y * FIELD_MAX_SIZE + x 番目のビットとして16ビットの整数で表す。
+占有状況・プレイヤーごと・犬種ごとのマスクを整数で持ち、隣接・囲み・連結の判定を
+シフト演算だけで行う。Django のモデルには依存しない。
+
+コマが動いてフィールドの左上が変わる場合は、extend_field でマスクをシフトして正規化し直す。
+"""
+
+from collections import namedtuple
+from .movement import FIELD_MAX_SIZE
+
+NUM_SQUARES = FIELD_MAX_SIZE * FIELD_MAX_SIZE
+FULL_MASK = (1 << NUM_SQUARES) - 1
+
+# 左端の列・右端の列のマスク
+FILE_LEFT = sum(1 << (y * FIELD_MAX_SIZE) for y in range(FIELD_MAX_SIZE))
+FILE_RIGHT = FILE_LEFT << (FIELD_MAX_SIZE - 1)
+NOT_FILE_LEFT = FULL_MASK & ~FILE_LEFT
+NOT_FILE_RIGHT = FULL_MASK & ~FILE_RIGHT
+
+
+# 正規化済みのフィールド（占有マスク、正規化前の座標系での左上、幅・高さ）
+Field = namedtuple("Field", ["mask", "origin_x", "origin_y", "width", "height"])
+
+
+def square_bit(x, y):
+    """
+    正規化済みの座標 (x, y) に対応するビットを返す。
+    """
+    return 1 << (y * FIELD_MAX_SIZE + x)
+
+
+def bit_to_square(bit):
+    """
+    単一ビットを正規化済みの座標 (x, y) に変換する。
+    """
+    return divmod(bit.bit_length() - 1, FIELD_MAX_SIZE)[::-1]
+
+
+def iter_bits(mask):
+    """
+    マスクに含まれる各ビットを下位から順に返す。
+    """
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+
+def shift_up(mask):
+    return mask >> FIELD_MAX_SIZE
+
+
+def shift_down(mask):
+    return (mask << FIELD_MAX_SIZE) & FULL_MASK
+
+
+def shift_left(mask):
+    return (mask & NOT_FILE_LEFT) >> 1
+
+
+def shift_right(mask):
+    return (mask & NOT_FILE_RIGHT) << 1
+
+
+def neighbours4(mask):
+    """
+    マスクの各マスの上下左右に隣接するマスを返す。
+    """
+    return shift_up(mask) | shift_down(mask) | shift_left(mask) | shift_right(mask)
+
+
+def neighbours8(mask):
+    """
+    マスクの各マスの周囲8方向に隣接するマスを返す。
+    1つのマスが自分自身と隣接することはないため、結果に含まれる mask 内のマスは
+    mask 内の他のマスと隣接しているマスになる。
+    """
+    horizontal = shift_left(mask) | shift_right(mask)
+    row = mask | horizontal
+    return horizontal | shift_up(row) | shift_down(row)
+
+
+def isolated_squares(mask):
+    """
+    周囲8方向に他のコマがないマスを返す。
+    """
+    return mask & ~neighbours8(mask)
+
+
+def flood_fill(seed, mask):
+    """
+    seed から周囲8方向にたどって到達できる mask 内のマスを返す。
+    """
+    filled = seed & mask
+    while True:
+        grown = (filled | neighbours8(filled)) & mask
+        if grown == filled:
+            return filled
+        filled = grown
+
+
+def is_connected(mask):
+    """
+    マスク内の全マスが周囲8方向の隣接で1つにつながっているかを判定する。
+    """
+    if not mask:
+        return True
+    return flood_fill(mask & -mask, mask) == mask
+
+
+def count_components(mask):
+    """
+    マスク内のマスが周囲8方向の隣接でいくつのまとまりに分かれているかを数える。
+    """
+    count = 0
+    while mask:
+        mask &= ~flood_fill(mask & -mask, mask)
+        count += 1
+    return count
+
+
+def can_remove(occupancy, bit):
+    """
+    bit のコマを取り除いても、残りのコマが孤立せず、つながりも分断されないかを判定する
+    （BoardSnapshot.can_remove_dog の判定）。
+    """
+    rest = occupancy & ~bit
+    if isolated_squares(rest):
+        return False
+    return count_components(rest) <= count_components(occupancy)
+
+
+def blocked_sides(occupancy, bit, width, height):
+    """
+    bit のマスの上下左右のうち、コマまたは枠線でブロックされている方向ごとに真偽値を返す。
+
+    正規化後のフィールドの外側は、その方向のフィールドの長さが最大サイズに達している
+    場合のみブロックとみなす。
+    """
+    for neighbour, length in (
+        (shift_up(bit), height),
+        (shift_down(bit), height),
+        (shift_left(bit), width),
+        (shift_right(bit), width),
+    ):
+        if neighbour:
+            yield bool(neighbour & occupancy)
+        else:
+            yield length >= FIELD_MAX_SIZE
+
+
+def is_surrounded(occupancy, bit, width, height):
+    """
+    bit のコマ（ボス犬）が上下左右を囲まれているかを判定する（BoardSnapshot.evaluate_terminal の判定）。
+    """
+    return all(blocked_sides(occupancy, bit, width, height))
+
+
+def field_of(squares):
+    """
+    座標 (x, y) の列を、フィールド範囲の左上を原点に正規化した Field にする。
+    幅か高さが FIELD_MAX_SIZE を超える場合は None を返す。
+    """
+    squares = list(squares)
+    if not squares:
+        return Field(0, 0, 0, 0, 0)
+    min_x = min(x for x, _ in squares)
+    min_y = min(y for _, y in squares)
+    width = max(x for x, _ in squares) - min_x + 1
+    height = max(y for _, y in squares) - min_y + 1
+    if width > FIELD_MAX_SIZE or height > FIELD_MAX_SIZE:
+        return None
+    mask = 0
+    for x, y in squares:
+        mask |= square_bit(x - min_x, y - min_y)
+    return Field(mask, min_x, min_y, width, height)
+
+
+def extend_field(field, x, y):
+    """
+    field に座標 (x, y) のマスを加えた Field を返す。収まらない場合は None を返す。
+
+    左上が移動する場合は、既存のマスクを右・下にシフトして新しい原点に合わせる
+    （フィールドが最大サイズに収まるため、シフトで行をまたぐことはない）。
+    """
+    if not field.mask:
+        return Field(square_bit(0, 0), x, y, 1, 1)
+    min_x = min(field.origin_x, x)
+    min_y = min(field.origin_y, y)
+    width = max(field.origin_x + field.width - 1, x) - min_x + 1
+    height = max(field.origin_y + field.height - 1, y) - min_y + 1
+    if width > FIELD_MAX_SIZE or height > FIELD_MAX_SIZE:
+        return None
+    shift = (field.origin_x - min_x) + (field.origin_y - min_y) * FIELD_MAX_SIZE
+    mask = (field.mask << shift) | square_bit(x - min_x, y - min_y)
+    return Field(mask, min_x, min_y, width, height)
+
+
+class Bitboard:
+    """
+    1局面分のビットボード。
+
+    player_masks はプレイヤー（0: player1, 1: player2）ごとのマスク、
+    type_masks は (プレイヤー, 犬種キー) ごとのマスク。
+    origin_x / origin_y は正規化前の座標系でのフィールドの左上。
+    """
+
+    __slots__ = (
+        "origin_x",
+        "origin_y",
+        "width",
+        "height",
+        "player_masks",
+        "type_masks",
+        "occupancy",
+    )
+
+    def __init__(self, origin_x, origin_y, width, height, player_masks, type_masks):
+        self.origin_x = origin_x
+        self.origin_y = origin_y
+        self.width = width
+        self.height = height
+        self.player_masks = player_masks
+        self.type_masks = type_masks
+        self.occupancy = player_masks[0] | player_masks[1]
+
+    @classmethod
+    def from_pieces(cls, pieces):
+        """
+        (プレイヤー, 犬種キー, x, y) のタプルの列からビットボードを作成する。
+
+        Raises:
+            ValueError: コマが FIELD_MAX_SIZE x FIELD_MAX_SIZE の範囲に収まらない場合。
+        """
+        pieces = list(pieces)
+        if not pieces:
+            return cls(0, 0, 0, 0, (0, 0), {})
+
+        min_x = min(p[2] for p in pieces)
+        min_y = min(p[3] for p in pieces)
+        width = max(p[2] for p in pieces) - min_x + 1
+        height = max(p[3] for p in pieces) - min_y + 1
+        if width > FIELD_MAX_SIZE or height > FIELD_MAX_SIZE:
+            raise ValueError(f"Board does not fit into the field: {width}x{height}")
+
+        player_masks = [0, 0]
+        type_masks = {}
+        for player, type_key, x, y in pieces:
+            bit = square_bit(x - min_x, y - min_y)
+            if player_masks[0] & bit or player_masks[1] & bit:
+                raise ValueError(f"Square ({x}, {y}) is occupied twice")
+            player_masks[player] |= bit
+            key = (player, type_key)
+            type_masks[key] = type_masks.get(key, 0) | bit
+
+        return cls(min_x, min_y, width, height, tuple(player_masks), type_masks)
+
+    def bit_at(self, x, y):
+        """
+        正規化前の座標 (x, y) に対応するビットを返す。フィールド外の場合は 0 を返す。
+        """
+        local_x = x - self.origin_x
+        local_y = y - self.origin_y
+        if 0 <= local_x < FIELD_MAX_SIZE and 0 <= local_y < FIELD_MAX_SIZE:
+            return square_bit(local_x, local_y)
+        return 0
+
+    def square_of(self, bit):
+        """
+        単一ビットを正規化前の座標 (x, y) に変換する。
+        """
+        x, y = bit_to_square(bit)
+        return (x + self.origin_x, y + self.origin_y)
+
+    def field(self):
+        """
+        占有状況を Field として返す（extend_field でマスを加えるために使う）。
+        """
+        return Field(
+            self.occupancy, self.origin_x, self.origin_y, self.width, self.height
+        )
+
+    def is_surrounded(self, bit):
+        return is_surrounded(self.occupancy, bit, self.width, self.height)
+
+    def blocked_sides(self, bit):
+        return sum(blocked_sides(self.occupancy, bit, self.width, self.height))
+
+    def can_remove(self, bit):
+        return can_remove(self.occupancy, bit)
+
+    def is_connected(self):
+        return is_connected(self.occupancy)
@@ -0,0 +1,55 @@
+from .bitboard import count_components, isolated_squares, iter_bits
+
+
+class ConnectivityIndex:
+    """
+    ボード上のコマのつながり（周囲8方向）をビットボードで判定し、手札に戻せるコマをまとめて求めるクラス。
+
+    コマを1つ取り除いたときに、残りのコマに孤立したコマができず、
+    つながりが分断されない（関節点でない）場合に、そのコマは手札に戻せる。
+    """
+
+    def __init__(self, bitboard):
+        self.bitboard = bitboard
+        self.occupancy = bitboard.occupancy
+        self.components = count_components(self.occupancy)
+        self._liftable = None
+        self._articulation_points = None
+
+    @property
+    def articulation_points(self):
+        """
+        取り除くとつながりが分断されるコマのマス。
+        """
+        if self._articulation_points is None:
+            self._articulation_points = {
+                self.bitboard.square_of(bit)
+                for bit in iter_bits(self.occupancy)
+                if count_components(self.occupancy & ~bit) > self.components
+            }
+        return self._articulation_points
+
+    def _can_lift_bit(self, bit):
+        rest = self.occupancy & ~bit
+        if isolated_squares(rest):
+            return False
+        return count_components(rest) <= self.components
+
+    def can_lift(self, square):
+        """
+        指定したマスのコマを取り除いても、残りのコマが孤立せず分断もされないかを判定する。
+        """
+        bit = self.bitboard.bit_at(*square)
+        return bool(bit & self.occupancy) and self._can_lift_bit(bit)
+
+    def liftable_squares(self):
+        """
+        取り除けるコマのマスをまとめて返す。
+        """
+        if self._liftable is None:
+            self._liftable = {
+                self.bitboard.square_of(bit)
+                for bit in iter_bits(self.occupancy)
+                if self._can_lift_bit(bit)
+            }
+        return self._liftable
@@ -0,0 +1,55 @@
+# フィールドの最大サイズ（縦横）
+FIELD_MAX_SIZE = 4
+
+# 移動制限のない直線移動で取り得る最大距離。
+# 移動するコマ以外のコマが FIELD_MAX_SIZE の範囲に収まるため、これより遠い移動は存在しない。
+MAX_SLIDE_DISTANCE = FIELD_MAX_SIZE * 2 - 2
+
+# 周囲8方向のオフセット（隣接判定にも使用する）
+ADJACENT_OFFSETS = (
+    (-1, -1),
+    (0, -1),
+    (1, -1),
+    (-1, 0),
+    (1, 0),
+    (-1, 1),
+    (0, 1),
+    (1, 1),
+)
+_ORTHOGONAL_STEP_OFFSETS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+_ORTHOGONAL_SLIDE_OFFSETS = tuple(
+    (dx * distance, dy * distance)
+    for distance in range(1, MAX_SLIDE_DISTANCE + 1)
+    for dx, dy in _ORTHOGONAL_STEP_OFFSETS
+)
+_DIAGONAL_OFFSETS = ((-1, -1), (1, -1), (-1, 1), (1, 1))
+_HAJIKE_OFFSETS = (
+    (-2, -1),
+    (-2, 1),
+    (2, -1),
+    (2, 1),
+    (-1, -2),
+    (1, -2),
+    (-1, 2),
+    (1, 2),
+)
+
+# (movement_type, 歩数制限があるか) ごとの移動オフセット表。
+# dog_utils.is_valid_move と同じ動きを表す。
+MOVE_OFFSETS = {
+    ("diagonal_orthogonal", True): ADJACENT_OFFSETS,
+    ("diagonal_orthogonal", False): ADJACENT_OFFSETS,
+    ("orthogonal", True): _ORTHOGONAL_STEP_OFFSETS,
+    ("orthogonal", False): _ORTHOGONAL_SLIDE_OFFSETS,
+    ("diagonal", True): _DIAGONAL_OFFSETS,
+    ("diagonal", False): _DIAGONAL_OFFSETS,
+    ("special_hajike", True): _HAJIKE_OFFSETS,
+    ("special_hajike", False): _HAJIKE_OFFSETS,
+}
+
+
+def get_move_offsets(movement_type, max_steps):
+    """
+    犬種の動きに対応する移動オフセットのタプルを返す。未知の動きの場合は空のタプルを返す。
+    """
+    return MOVE_OFFSETS.get((movement_type, max_steps is not None), ())
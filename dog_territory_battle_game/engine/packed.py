@@ -0,0 +1,73 @@
+"""
+ゲームの局面を Game.board に保存するためのバイト列の形式。
+
+ボード上のコマは1匹ずつ（犬のID、犬種ID、プレイヤー番号、x、y）、手札のコマは
+プレイヤー・犬種ごとの枚数と犬のIDの並びで表す。犬が10匹のゲームで150バイト程度になり、
+ゲームの行を1回読むだけで局面全体を復元できる。Django のモデルには依存しない。
+
+犬のIDは Dog の BigAutoField に合わせて64ビットで保存する（形式のバージョン 2）。
+犬のIDが32ビットだったバージョン 1 のバイト列も読み込める。
+"""
+
+import struct
+from collections import namedtuple
+
+FORMAT_VERSION = 2
+
+# ヘッダー（形式のバージョン、ボード上のコマの数、手札のグループの数）
+_HEADER = struct.Struct("<BBB")
+# 形式のバージョンごとの、ボード上のコマ（犬のID、犬種ID、プレイヤー番号、x、y）と犬のID
+_PIECES = {1: struct.Struct("<IHBhh"), 2: struct.Struct("<QHBhh")}
+_DOG_IDS = {1: struct.Struct("<I"), 2: struct.Struct("<Q")}
+_PIECE = _PIECES[FORMAT_VERSION]
+_DOG_ID = _DOG_IDS[FORMAT_VERSION]
+# 手札のグループ（プレイヤー番号、犬種ID、枚数）と、続く枚数分の犬のID
+_HAND = struct.Struct("<BHB")
+
+# 犬1匹分の情報。player はプレイヤー番号（player1 は 0、player2 は 1）、手札の場合 position は None
+PackedDog = namedtuple("PackedDog", ["id", "dog_type_id", "player", "position"])
+
+
+def pack_board(dogs):
+    """
+    PackedDog の並びをバイト列に変換する。
+    """
+    pieces = sorted(dog for dog in dogs if dog.position is not None)
+    hands = {}
+    for dog in dogs:
+        if dog.position is None:
+            hands.setdefault((dog.player, dog.dog_type_id), []).append(dog.id)
+
+    parts = [_HEADER.pack(FORMAT_VERSION, len(pieces), len(hands))]
+    for dog in pieces:
+        parts.append(_PIECE.pack(dog.id, dog.dog_type_id, dog.player, *dog.position))
+    for (player, dog_type_id), dog_ids in sorted(hands.items()):
+        parts.append(_HAND.pack(player, dog_type_id, len(dog_ids)))
+        parts.extend(_DOG_ID.pack(dog_id) for dog_id in sorted(dog_ids))
+    return b"".join(parts)
+
+
+def unpack_board(data):
+    """
+    バイト列を犬のID順の PackedDog のリストに変換する。
+    """
+    data = bytes(data)
+    version, piece_count, hand_count = _HEADER.unpack_from(data, 0)
+    if version not in _PIECES:
+        raise ValueError(f"Unsupported packed board version: {version}")
+    piece_format, dog_id_format = _PIECES[version], _DOG_IDS[version]
+
+    offset = _HEADER.size
+    dogs = []
+    for _ in range(piece_count):
+        dog_id, dog_type_id, player, x, y = piece_format.unpack_from(data, offset)
+        offset += piece_format.size
+        dogs.append(PackedDog(dog_id, dog_type_id, player, (x, y)))
+    for _ in range(hand_count):
+        player, dog_type_id, count = _HAND.unpack_from(data, offset)
+        offset += _HAND.size
+        for _ in range(count):
+            (dog_id,) = dog_id_format.unpack_from(data, offset)
+            offset += dog_id_format.size
+            dogs.append(PackedDog(dog_id, dog_type_id, player, None))
+    return sorted(dogs)
@@ -0,0 +1,155 @@
+"""
+後退解析によるエンドゲームテーブル。
+
+局面のグラフ（局面ごとの子局面のリスト）から、手番のプレイヤーから見た勝ち・負けと
+終局までの手数を後退解析で求める。結果は局面キーをキーにしたオープンアドレス法の
+ハッシュ表としてファイルに書き出し、mmap で読み込んで O(1) で引く。
+mmap したファイルはページキャッシュを通じて複数のプロセスで共有される。
+Django のモデルには依存しない。
+"""
+
+import json
+import mmap
+import struct
+from collections import deque, namedtuple
+
+MAGIC = b"DTBTBL01"
+
+# ヘッダー（マジック、スロット数、メタデータの長さ）とスロット（局面キー、値）
+_HEADER = struct.Struct("<8sQI")
+_SLOT = struct.Struct("<QH")
+
+WIN, LOSS, DRAW = 1, 2, 3
+RESULT_NAMES = {WIN: "win", LOSS: "loss", DRAW: "draw"}
+
+_RESULT_BITS = 2
+MAX_DISTANCE = (1 << (16 - _RESULT_BITS)) - 1
+
+# probe の結果（手番のプレイヤーから見た結果、終局までの手数）
+TablebaseEntry = namedtuple("TablebaseEntry", ["result", "distance"])
+
+
+def retrograde_solve(children, terminal, expanded):
+    """
+    局面のグラフを後退解析する。
+
+    Args:
+        children: 局面ごとの子局面の番号のリスト。
+        terminal: 局面ごとに、手番のプレイヤーが既に負けている終局の局面か。
+        expanded: 局面ごとに、子局面をすべて列挙したか。列挙していない局面は
+            子局面の結果が分からないため、負けと判定しない。
+
+    Returns:
+        list: 局面ごとの TablebaseEntry。勝敗が決まらない局面は None。
+    """
+    count = len(children)
+    parents = [[] for _ in range(count)]
+    for parent, kids in enumerate(children):
+        for child in kids:
+            parents[child].append(parent)
+
+    remaining = [len(kids) for kids in children]
+    results = [None] * count
+    queue = deque()
+    for index in range(count):
+        if terminal[index]:
+            results[index] = TablebaseEntry(LOSS, 0)
+            queue.append(index)
+
+    # 手数の少ない順に処理するため、先に決まった結果ほど短い手数になる
+    while queue:
+        index = queue.popleft()
+        result, distance = results[index]
+        for parent in parents[index]:
+            if results[parent] is not None:
+                continue
+            if result == LOSS:
+                results[parent] = TablebaseEntry(WIN, distance + 1)
+                queue.append(parent)
+            else:
+                remaining[parent] -= 1
+                if remaining[parent] == 0 and expanded[parent]:
+                    results[parent] = TablebaseEntry(LOSS, distance + 1)
+                    queue.append(parent)
+    return results
+
+
+def after_move(entry):
+    """
+    手を指した後の局面（相手の手番）の結果を、手を指したプレイヤーから見た結果に変換する。
+    """
+    if entry.result == DRAW:
+        return entry
+    return TablebaseEntry(WIN if entry.result == LOSS else LOSS, entry.distance + 1)
+
+
+def encode(entry):
+    if entry.distance > MAX_DISTANCE:
+        raise ValueError(f"Distance is too large: {entry.distance}")
+    return (entry.distance << _RESULT_BITS) | entry.result
+
+
+def decode(value):
+    return TablebaseEntry(value & ((1 << _RESULT_BITS) - 1), value >> _RESULT_BITS)
+
+
+def write_tablebase(path, entries, metadata=None):
+    """
+    局面キーをキーにした TablebaseEntry の辞書をファイルに書き出す。
+    スロット数は件数の2倍以上の2のべき乗にし、衝突は線形探索で解決する。
+    """
+    slots = 8
+    while slots < len(entries) * 2:
+        slots *= 2
+    mask = slots - 1
+
+    table = bytearray(slots * _SLOT.size)
+    for key, entry in entries.items():
+        slot = key & mask
+        while _SLOT.unpack_from(table, slot * _SLOT.size)[1]:
+            slot = (slot + 1) & mask
+        _SLOT.pack_into(table, slot * _SLOT.size, key, encode(entry))
+
+    meta = json.dumps(metadata or {}, ensure_ascii=False).encode()
+    padding = -(_HEADER.size + len(meta)) % 8
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, slots, len(meta)))
+        f.write(meta)
+        f.write(b"\0" * padding)
+        f.write(table)
+
+
+class Tablebase:
+    """
+    mmap で読み込んだエンドゲームテーブル。
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, slots, meta_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"Not a tablebase file: {path}")
+        self._mask = slots - 1
+        meta_end = _HEADER.size + meta_length
+        self.metadata = json.loads(self._mmap[_HEADER.size : meta_end])
+        self._offset = meta_end + (-meta_end % 8)
+
+    def probe(self, key):
+        """
+        局面キーに対応する TablebaseEntry を返す。テーブルにない局面の場合は None。
+        """
+        slot = key & self._mask
+        while True:
+            stored_key, value = _SLOT.unpack_from(
+                self._mmap, self._offset + slot * _SLOT.size
+            )
+            if not value:
+                return None
+            if stored_key == key:
+                return decode(value)
+            slot = (slot + 1) & self._mask
+
+    def close(self):
+        self._mmap.close()
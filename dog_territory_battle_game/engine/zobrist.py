@@ -0,0 +1,167 @@
+"""
+局面の Zobrist ハッシュと正規化した局面キー。
+
+ボード上のコマ (プレイヤー, 犬種キー, x, y)、両プレイヤーの手札の枚数、手番の
+それぞれに64ビットの乱数を割り当て、その XOR を局面のハッシュとする。
+乱数は要素のタプルから blake2b で導出するため、プロセスをまたいでも同じ値になる。
+
+フィールドは平行移動しても同じ局面になるため、canonical_key ではフィールド範囲の
+左上を原点にそろえ、必要に応じて鏡映・回転（正方形の8つの対称変換）のうち
+最小のハッシュを局面キーとする。Django のモデルには依存しない。
+"""
+
+import hashlib
+from collections import Counter
+from functools import lru_cache
+
+_KEY_BYTES = 8
+
+
+@lru_cache(maxsize=None)
+def zobrist_value(*parts):
+    """
+    要素のタプルに対応する64ビットの乱数を返す。
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=_KEY_BYTES)
+    return int.from_bytes(digest.digest(), "little")
+
+
+def piece_key(player, type_key, x, y):
+    """
+    ボード上のコマ1つに対応する乱数を返す。
+    """
+    return zobrist_value("board", player, type_key, x, y)
+
+
+def hand_key(player, type_key, count):
+    """
+    手札に同じ犬種が count 枚あることに対応する乱数を返す。0枚の場合は 0。
+    """
+    if count == 0:
+        return 0
+    return zobrist_value("hand", player, type_key, count)
+
+
+def side_key(player):
+    """
+    手番に対応する乱数を返す。player1（0）の手番を 0 とする。
+    """
+    if player == 0:
+        return 0
+    return zobrist_value("side", player)
+
+
+def hash_pieces(pieces):
+    """
+    (プレイヤー, 犬種キー, x, y) のタプルの列のハッシュを返す。
+    """
+    value = 0
+    for player, type_key, x, y in pieces:
+        value ^= piece_key(player, type_key, x, y)
+    return value
+
+
+def hash_hands(hands):
+    """
+    (プレイヤー, 犬種キー) をキーに手札の枚数を持つ辞書のハッシュを返す。
+    """
+    value = 0
+    for (player, type_key), count in hands.items():
+        value ^= hand_key(player, type_key, count)
+    return value
+
+
+def position_hash(pieces, hands, side):
+    """
+    局面（ボード上のコマ・手札・手番）の Zobrist ハッシュを返す。
+    """
+    return hash_pieces(pieces) ^ hash_hands(hands) ^ side_key(side)
+
+
+# 正方形の8つの対称変換（恒等変換・回転・鏡映）
+SYMMETRIES = (
+    lambda x, y: (x, y),
+    lambda x, y: (-x, y),
+    lambda x, y: (x, -y),
+    lambda x, y: (-x, -y),
+    lambda x, y: (y, x),
+    lambda x, y: (-y, x),
+    lambda x, y: (y, -x),
+    lambda x, y: (-y, -x),
+)
+
+
+def translate_to_origin(pieces):
+    """
+    フィールド範囲の左上が (0, 0) になるようにコマを平行移動する。
+    """
+    pieces = list(pieces)
+    if not pieces:
+        return pieces
+    min_x = min(p[2] for p in pieces)
+    min_y = min(p[3] for p in pieces)
+    return [
+        (player, type_key, x - min_x, y - min_y) for player, type_key, x, y in pieces
+    ]
+
+
+def canonical_key(pieces, hands, side, symmetric=False):
+    """
+    平行移動（と symmetric が真の場合は対称変換）で同じになる局面に共通のキーを返す。
+
+    犬種の動きとフィールドの最大サイズは上下左右・斜めの対称変換で変わらないため、
+    symmetric を真にすると対称な局面も同じキーになる。
+    """
+    pieces = list(pieces)
+    rest = hash_hands(hands) ^ side_key(side)
+    transforms = SYMMETRIES if symmetric else SYMMETRIES[:1]
+    return rest ^ min(
+        hash_pieces(
+            translate_to_origin(
+                (player, type_key) + transform(x, y)
+                for player, type_key, x, y in pieces
+            )
+        )
+        for transform in transforms
+    )
+
+
+class ZobristHash:
+    """
+    コマの移動に合わせて差分で更新する局面ハッシュ。
+
+    手番はハッシュに含めず、key(side) で取り出すときに加える。
+    """
+
+    __slots__ = ("value", "hands")
+
+    def __init__(self, pieces=(), hands=None):
+        self.hands = Counter(hands or {})
+        self.value = hash_pieces(pieces) ^ hash_hands(self.hands)
+
+    def copy(self):
+        clone = ZobristHash.__new__(ZobristHash)
+        clone.value = self.value
+        clone.hands = Counter(self.hands)
+        return clone
+
+    def toggle_piece(self, player, type_key, x, y):
+        """
+        ボード上のコマを置く・取り除く（XOR のため同じ操作で元に戻る）。
+        """
+        self.value ^= piece_key(player, type_key, x, y)
+
+    def add_to_hand(self, player, type_key):
+        self._set_hand(player, type_key, self.hands[(player, type_key)] + 1)
+
+    def remove_from_hand(self, player, type_key):
+        self._set_hand(player, type_key, self.hands[(player, type_key)] - 1)
+
+    def _set_hand(self, player, type_key, count):
+        key = (player, type_key)
+        self.value ^= hand_key(player, type_key, self.hands[key])
+        self.value ^= hand_key(player, type_key, count)
+        self.hands[key] = count
+
+    def key(self, side):
+        return self.value ^ side_key(side)
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# 購読者ごとに溜めておくイベントの上限。超えた場合は古いイベントから捨てる
+SUBSCRIBER_QUEUE_SIZE = 32
+
+
+class InProcessBroker:
+    """
+    ゲームの更新イベントをプロセス内で配信する pub/sub。
+
+    購読は asyncio のイベントループ上で行い、publish は同期ビューのスレッドからも呼べる。
+    複数のプロセスで配信する場合は、同じメソッドを持つブローカーに
+    GAME_EVENT_BROKER の設定で差し替える。
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, game_id):
+        """
+        ゲームのイベントを受け取るキューを登録して返す。実行中のイベントループから呼ぶこと。
+        """
+        subscription = (
+            asyncio.get_running_loop(),
+            asyncio.Queue(SUBSCRIBER_QUEUE_SIZE),
+        )
+        with self._lock:
+            self._subscribers[game_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, game_id, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(game_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[game_id]
+
+    def publish(self, game_id, event):
+        """
+        ゲームの全購読者にイベントを送る。
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(game_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_deliver, queue, event)
+            except RuntimeError:
+                # 購読者のイベントループが既に閉じている
+                self.unsubscribe(game_id, (loop, queue))
+
+
+def _deliver(queue, event):
+    if queue.full():
+        queue.get_nowait()
+        logger.debug("Subscriber queue is full; dropped the oldest event.")
+    queue.put_nowait(event)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """
+    GAME_EVENT_BROKER の設定に従ってブローカーを作成する（プロセスごとに1つ）。
+    """
+    return import_string(settings.GAME_EVENT_BROKER)()
@@ -0,0 +1,110 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from dog_territory_battle_game.models import Dog, DogType, Game, Player
+
+# 1ゲームあたりの犬の数と、そのうちボード上に置く犬の位置
+DOGS_PER_GAME = 12
+BOARD_SQUARES = [(0, 0), (1, 0), (0, 1), (1, 1)]
+
+# 一度に bulk_create する行数
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the Dog table inside a rolled-back transaction and report the query "
+        "plans and timings of the per-game board queries"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dogs", type=int, default=1_000_000, help="作成する犬の数"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=200, help="クエリごとの計測回数"
+        )
+
+    def handle(self, *args, **options):
+        dog_type = DogType.objects.first()
+        if dog_type is None:
+            raise CommandError("No dog types. Run setup_data first.")
+
+        # 作成したデータは最後にロールバックし、データベースには残さない
+        with transaction.atomic():
+            game = self.populate(dog_type, options["dogs"])
+            self.report(game, options["repeat"])
+            transaction.set_rollback(True)
+
+    def populate(self, dog_type, dog_count):
+        """
+        dog_count 匹の犬を持つゲームを作成し、計測に使う中央のゲームを返す。
+        """
+        player1, player2 = (
+            Player.objects.create(user=User.objects.create(username=f"benchmark{i}"))
+            for i in (1, 2)
+        )
+        game_count = max(1, dog_count // DOGS_PER_GAME)
+        games = Game.objects.bulk_create(
+            [
+                Game(player1=player1, player2=player2, current_turn=player1)
+                for _ in range(game_count)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        started = time.perf_counter()
+        batch = []
+        for game in games:
+            for index in range(DOGS_PER_GAME):
+                x, y = (
+                    BOARD_SQUARES[index] if index < len(BOARD_SQUARES) else (None, None)
+                )
+                batch.append(
+                    Dog(
+                        game=game,
+                        player=player1 if index % 2 == 0 else player2,
+                        dog_type=dog_type,
+                        x_position=x,
+                        y_position=y,
+                        is_in_hand=x is None,
+                    )
+                )
+            if len(batch) >= BATCH_SIZE:
+                Dog.objects.bulk_create(batch)
+                batch = []
+        Dog.objects.bulk_create(batch)
+        self.stdout.write(
+            f"Created {game_count * DOGS_PER_GAME} dogs in {game_count} games "
+            f"({time.perf_counter() - started:.1f}s)."
+        )
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Dog._meta.db_table}")
+        return games[len(games) // 2]
+
+    def report(self, game, repeat):
+        """
+        ルール判定で使うクエリごとに、クエリプランと平均の実行時間を出力する。
+        """
+        queries = {
+            "board dogs (game, is_in_hand=False)": Dog.objects.filter(
+                game=game, is_in_hand=False
+            ),
+            "hand dogs (game, is_in_hand=True)": Dog.objects.filter(
+                game=game, is_in_hand=True
+            ),
+            "square occupied (game, x, y, is_in_hand=False)": Dog.objects.filter(
+                game=game, x_position=1, y_position=1, is_in_hand=False
+            ),
+        }
+        for name, queryset in queries.items():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                # all() で毎回新しいクエリを発行する
+                list(queryset.all())
+            elapsed = (time.perf_counter() - started) / repeat
+            self.stdout.write(f"\n{name}: {elapsed * 1000:.3f} ms")
+            self.stdout.write(queryset.explain())
@@ -0,0 +1,102 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from dog_territory_battle_game.models import Dog, DogType, Game, Player
+from dog_territory_battle_game.serializers import (
+    DOG_VALUES_FIELDS,
+    GAME_VALUES_FIELDS,
+    DogSerializer,
+    GameSerializer,
+    serialize_dogs,
+    serialize_games,
+)
+
+# 一度に bulk_create する行数
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the ModelSerializer and the values()-based serializers for dogs "
+        "and games inside a rolled-back transaction"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=10_000, help="作成する犬とゲームの数"
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="計測回数")
+
+    def handle(self, *args, **options):
+        dog_type = DogType.objects.first()
+        if dog_type is None:
+            raise CommandError("No dog types. Run setup_data first.")
+
+        # 作成したデータは最後にロールバックし、データベースには残さない
+        with transaction.atomic():
+            games = self.populate(dog_type, options["rows"])
+            dogs = Dog.objects.filter(game__in=games)
+            games = Game.objects.filter(id__in=[game.id for game in games])
+            self.compare(
+                "dogs",
+                lambda: DogSerializer(dogs.select_related("dog_type"), many=True).data,
+                lambda: serialize_dogs(dogs.values(*DOG_VALUES_FIELDS)),
+                options["repeat"],
+            )
+            self.compare(
+                "games",
+                lambda: GameSerializer(
+                    games.select_related(
+                        "player1", "player2", "current_turn", "winner"
+                    ),
+                    many=True,
+                ).data,
+                lambda: serialize_games(games.values(*GAME_VALUES_FIELDS)),
+                options["repeat"],
+            )
+            transaction.set_rollback(True)
+
+    def populate(self, dog_type, rows):
+        """
+        rows 件のゲームと、各ゲームに1匹ずつ犬を作成する。
+        """
+        player1, player2 = (
+            Player.objects.create(user=User.objects.create(username=f"benchmark{i}"))
+            for i in (1, 2)
+        )
+        games = Game.objects.bulk_create(
+            [
+                Game(player1=player1, player2=player2, current_turn=player1)
+                for _ in range(rows)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        Dog.objects.bulk_create(
+            [
+                Dog(game=game, player=player1, dog_type=dog_type, is_in_hand=True)
+                for game in games
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        return games
+
+    def compare(self, name, model_serializer, fast_serializer, repeat):
+        """
+        2つのシリアライズ（クエリを含む）の平均時間を出力し、出力が一致することを確認する。
+        """
+        results = {}
+        for label, serialize in (
+            ("ModelSerializer", model_serializer),
+            ("values()", fast_serializer),
+        ):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                data = serialize()
+            elapsed = (time.perf_counter() - started) / repeat
+            results[label] = [dict(item) for item in data]
+            self.stdout.write(f"{name} {label}: {elapsed * 1000:.1f} ms")
+
+        if results["ModelSerializer"] != results["values()"]:
+            raise CommandError(f"The {name} serializers returned different data.")
+        self.stdout.write(f"{name}: {len(results['values()'])} rows, outputs match.\n")
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from dog_territory_battle_game.models import Game
+from dog_territory_battle_game.views.board_snapshot import BoardSnapshot
+from dog_territory_battle_game.views.endgame import build_tablebase
+
+
+class Command(BaseCommand):
+    help = "Build a retrograde-analysis endgame tablebase from a game position"
+
+    def add_arguments(self, parser):
+        parser.add_argument("game_id", type=int, help="解析を始める局面のゲームID")
+        parser.add_argument(
+            "--max-positions",
+            type=int,
+            default=200000,
+            help="列挙する局面数の上限",
+        )
+        parser.add_argument(
+            "--output",
+            default=settings.TABLEBASE_PATH,
+            help="出力するファイル（既定は TABLEBASE_PATH）",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            game = Game.objects.get(pk=options["game_id"])
+        except Game.DoesNotExist:
+            raise CommandError(f"Game {options['game_id']} does not exist.")
+        if game.winner_id is not None:
+            raise CommandError("The game has already finished.")
+
+        board = BoardSnapshot.load(game)
+        summary = build_tablebase(
+            board, game.current_turn_id, options["output"], options["max_positions"]
+        )
+
+        self.stdout.write(
+            f"Enumerated {summary.pop('positions')} positions "
+            f"({'complete' if summary.pop('complete') else 'truncated'})."
+        )
+        for name, count in sorted(summary.items()):
+            self.stdout.write(f"  {name}: {count}")
+        self.stdout.write(f"Tablebase written to {options['output']}.")
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from dog_territory_battle_game.models import Player, DogType, Game, Dog
+from dog_territory_battle_game.models import Player, DogType
+from dog_territory_battle_game.views.game_templates import create_games
 
 
 class Command(BaseCommand):
@@ -33,35 +34,10 @@ class Command(BaseCommand):
             {"name": "トツ犬", "movement_type": "orthogonal", "max_steps": None},
             {"name": "ハジケ犬", "movement_type": "special_hajike", "max_steps": None},
         ]
-        dog_type_objects = []
-        for data in dog_types:
-            dog_type_objects.append(DogType.objects.create(**data))
+        DogType.objects.bulk_create([DogType(**data) for data in dog_types])
         self.stdout.write("Dog types created.")
 
-        # 4. Gameを1つ作成
-        game = Game.objects.create(
-            player1=player1,
-            player2=player2,
-            current_turn=player1,
-            winner=None,
-        )
+        # 4. Gameを1つ作成し、初期配置のテンプレートから Dog を12レコード作成
+        create_games([(player1, player2)], "full")
         self.stdout.write("Game created.")
-
-        # 5. Dogを12レコード作成
-        dog_data = [
-            {"game": game, "player": player1, "dog_type": dog_type_objects[0], "x_position": 1, "y_position": 0, "is_in_hand": False},
-            {"game": game, "player": player1, "dog_type": dog_type_objects[1], "x_position": None, "y_position": None, "is_in_hand": True},
-            {"game": game, "player": player1, "dog_type": dog_type_objects[2], "x_position": None, "y_position": None, "is_in_hand": True},
-            {"game": game, "player": player1, "dog_type": dog_type_objects[3], "x_position": None, "y_position": None, "is_in_hand": True},
-            {"game": game, "player": player1, "dog_type": dog_type_objects[4], "x_position": None, "y_position": None, "is_in_hand": True},
-            {"game": game, "player": player1, "dog_type": dog_type_objects[5], "x_position": None, "y_position": None, "is_in_hand": True},
-            {"game": game, "player": player2, "dog_type": dog_type_objects[0], "x_position": 1, "y_position": 1, "is_in_hand": False},
-            {"game": game, "player": player2, "dog_type": dog_type_objects[1], "x_position": None, "y_position": None, "is_in_hand": True},
-            {"game": game, "player": player2, "dog_type": dog_type_objects[2], "x_position": None, "y_position": None, "is_in_hand": True},
-            {"game": game, "player": player2, "dog_type": dog_type_objects[3], "x_position": None, "y_position": None, "is_in_hand": True},
-            {"game": game, "player": player2, "dog_type": dog_type_objects[4], "x_position": None, "y_position": None, "is_in_hand": True},
-            {"game": game, "player": player2, "dog_type": dog_type_objects[5], "x_position": None, "y_position": None, "is_in_hand": True},
-        ]
-        for data in dog_data:
-            Dog.objects.create(**data)
         self.stdout.write("Dogs created.")
\ No newline at end of file
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-17 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "dog_territory_battle_game",
+            "0005_remove_dogtype_movement_pattern_dogtype_max_steps_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="player",
+            name="is_bot",
+            field=models.BooleanField(default=False),
+        ),
+    ]
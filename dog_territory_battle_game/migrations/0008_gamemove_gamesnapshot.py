@@ -0,0 +1,113 @@
+# Generated by Django 5.0.6 on 2026-10-17 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dog_territory_battle_game", "0007_game_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GameMove",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("ply", models.PositiveIntegerField()),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("move", "move"),
+                            ("place", "place"),
+                            ("remove", "remove"),
+                            ("reset", "reset"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("from_x", models.IntegerField(blank=True, null=True)),
+                ("from_y", models.IntegerField(blank=True, null=True)),
+                ("to_x", models.IntegerField(blank=True, null=True)),
+                ("to_y", models.IntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "dog",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="dog_territory_battle_game.dog",
+                    ),
+                ),
+                (
+                    "game",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="moves",
+                        to="dog_territory_battle_game.game",
+                    ),
+                ),
+                (
+                    "player",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="dog_territory_battle_game.player",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["game", "ply"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("game", "ply"), name="unique_game_move_ply"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="GameSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("ply", models.PositiveIntegerField()),
+                ("positions", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "game",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="dog_territory_battle_game.game",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["game", "ply"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("game", "ply"), name="unique_game_snapshot_ply"
+                    )
+                ],
+            },
+        ),
+    ]
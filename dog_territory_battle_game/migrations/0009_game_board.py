@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dog_territory_battle_game", "0008_gamemove_gamesnapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="board",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
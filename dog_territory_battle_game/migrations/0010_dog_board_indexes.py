@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dog_territory_battle_game", "0009_game_board"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="dog",
+            index=models.Index(
+                fields=["game", "is_in_hand"], name="dog_game_in_hand_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="dog",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_in_hand", False)),
+                fields=("game", "x_position", "y_position"),
+                name="unique_dog_board_square",
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dog_territory_battle_game", "0010_dog_board_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="dog",
+            index=models.Index(fields=["player", "id"], name="dog_player_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(fields=["player1", "id"], name="game_player1_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(fields=["player2", "id"], name="game_player2_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(
+                condition=models.Q(
+                    ("deleted_at__isnull", True), ("winner__isnull", True)
+                ),
+                fields=["id"],
+                name="game_active_id_idx",
+            ),
+        ),
+    ]
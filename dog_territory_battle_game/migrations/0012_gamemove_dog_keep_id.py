@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dog_territory_battle_game", "0011_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="gamemove",
+            name="dog",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                to="dog_territory_battle_game.dog",
+            ),
+        ),
+    ]
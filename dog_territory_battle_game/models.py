@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+from .engine.movement import get_move_offsets
 
 
 class Meta:
@@ -17,12 +19,17 @@ class TimeStampedModel(models.Model):
 
 class Player(TimeStampedModel):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
+    # コンピューターが操作するプレイヤーか
+    is_bot = models.BooleanField(default=False)
 
     def __str__(self):
         return self.user.username
 
 
 class DogType(TimeStampedModel):
+    # ボス犬の犬種名（ボス犬が囲まれると負け）
+    BOSS_NAME = "ボス犬"
+
     name = models.CharField(max_length=100)
     movement_type = models.CharField(max_length=50)
     max_steps = models.IntegerField(null=True, blank=True)
@@ -30,6 +37,24 @@ class DogType(TimeStampedModel):
     def __str__(self):
         return self.name
 
+    @cached_property
+    def is_boss(self):
+        """
+        ボス犬の犬種か。判定はインスタンスごとに一度だけ行う。
+        """
+        return self.name == self.BOSS_NAME
+
+    @cached_property
+    def move_offsets(self):
+        """
+        この犬種の移動オフセットのタプル（engine.movement の移動表）。
+        """
+        return get_move_offsets(self.movement_type, self.max_steps)
+
+
+# 進行中のゲーム（勝者が決まっておらず、削除されていない）の条件
+ACTIVE_GAME = models.Q(winner__isnull=True, deleted_at__isnull=True)
+
 
 class Game(TimeStampedModel):
     player1 = models.ForeignKey(
@@ -48,6 +73,21 @@ class Game(TimeStampedModel):
         blank=True,
         on_delete=models.SET_NULL,
     )
+    # 手が確定するたびに1ずつ増えるバージョン（ETag や差分の取得に使う）
+    version = models.PositiveIntegerField(default=0)
+    # 局面全体を詰めたバイト列（engine.packed の形式）。Dog の行が直接変更されると空に戻す
+    board = models.BinaryField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # プレイヤーごとのゲーム一覧（id 順のカーソルページネーション）
+            models.Index(fields=["player1", "id"], name="game_player1_id_idx"),
+            models.Index(fields=["player2", "id"], name="game_player2_id_idx"),
+            # 進行中のゲームの一覧
+            models.Index(
+                fields=["id"], condition=ACTIVE_GAME, name="game_active_id_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Game between {self.player1} and {self.player2}"
@@ -61,9 +101,94 @@ class Dog(TimeStampedModel):
     y_position = models.IntegerField(null=True, blank=True)
     is_in_hand = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # ゲームごとのボード上のコマ・手札のコマの絞り込み
+            models.Index(fields=["game", "is_in_hand"], name="dog_game_in_hand_idx"),
+            # プレイヤーごとの犬の一覧（id 順のカーソルページネーション）
+            models.Index(fields=["player", "id"], name="dog_player_id_idx"),
+        ]
+        constraints = [
+            # 1つのマスに置けるコマは1つだけ（同時に確定した手もデータベースで弾く）
+            models.UniqueConstraint(
+                fields=["game", "x_position", "y_position"],
+                condition=models.Q(is_in_hand=False),
+                name="unique_dog_board_square",
+            ),
+        ]
+
     def __str__(self):
         return (
             f"{self.dog_type.name} at ({self.x_position}, {self.y_position})"
             if not self.is_in_hand
             else f"{self.dog_type.name} in hand"
         )
+
+
+class GameMove(models.Model):
+    """
+    ゲームの手の追記専用ログ。ply はゲームごとのログの通し番号で、1 から始まり
+    ログの最後の手に 1 を足して採番する（move_log.next_ply）。リセットも1件として記録する。
+    犬の直接の変更などログに残らない更新でもゲームのバージョンは進むため、
+    ply はゲームのバージョンとは一致しない。
+    """
+
+    KIND_MOVE = "move"
+    KIND_PLACE = "place"
+    KIND_REMOVE = "remove"
+    KIND_RESET = "reset"
+    KIND_CHOICES = [
+        (KIND_MOVE, "move"),
+        (KIND_PLACE, "place"),
+        (KIND_REMOVE, "remove"),
+        (KIND_RESET, "reset"),
+    ]
+
+    game = models.ForeignKey(Game, related_name="moves", on_delete=models.CASCADE)
+    ply = models.PositiveIntegerField()
+    player = models.ForeignKey(Player, null=True, blank=True, on_delete=models.SET_NULL)
+    # 犬が削除されても過去の手の犬のIDを残す（ログを書き換えない）ため、外部キー制約は付けない
+    dog = models.ForeignKey(
+        Dog,
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    from_x = models.IntegerField(null=True, blank=True)
+    from_y = models.IntegerField(null=True, blank=True)
+    to_x = models.IntegerField(null=True, blank=True)
+    to_y = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["game", "ply"]
+        constraints = [
+            models.UniqueConstraint(fields=["game", "ply"], name="unique_game_move_ply")
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.ply} in game {self.game_id}"
+
+
+class GameSnapshot(models.Model):
+    """
+    ply の手が確定した後の全ての犬の位置（犬のIDをキーに [x, y]、手札は null）。
+    """
+
+    game = models.ForeignKey(Game, related_name="snapshots", on_delete=models.CASCADE)
+    ply = models.PositiveIntegerField()
+    positions = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["game", "ply"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["game", "ply"], name="unique_game_snapshot_ply"
+            )
+        ]
+
+    def __str__(self):
+        return f"Snapshot #{self.ply} of game {self.game_id}"
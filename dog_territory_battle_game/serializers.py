@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .dog_types import get_dog_type
 from .models import Dog, Player, DogType, Game
 
 
@@ -53,3 +54,115 @@ class DogSerializer(serializers.ModelSerializer):
             "x_position",
             "y_position",
         ]
+
+
+# 高速な読み取り専用のシリアライズ
+#
+# 一覧などの読み取りが多いエンドポイントでは ModelSerializer を使わず、values() の行から
+# 同じ形の辞書を直接組み立てる。犬種はプロセスで共有している DogType から読み、
+# 関連のインスタンスは読み込まない。出力は DogSerializer・GameSerializer と同じになること。
+
+# serialize_dogs に渡す values() のフィールド
+DOG_VALUES_FIELDS = ["id", "player_id", "dog_type_id", "x_position", "y_position"]
+
+# serialize_games に渡す values() のフィールド
+GAME_VALUES_FIELDS = [
+    "id",
+    "player1_id",
+    "player2_id",
+    "current_turn_id",
+    "winner_id",
+    "created_at",
+    "updated_at",
+    "deleted_at",
+]
+
+# 日時を ModelSerializer と同じ形式の文字列にするためのフィールド
+_datetime_field = serializers.DateTimeField()
+
+
+def dog_type_dict(dog_type):
+    """
+    DogTypeSerializer と同じ形の辞書を作成する。
+    """
+    return {
+        "id": dog_type.id,
+        "name": dog_type.name,
+        "movement_type": dog_type.movement_type,
+        "max_steps": dog_type.max_steps,
+    }
+
+
+def dog_dict(dog_id, player_id, dog_type, x_position, y_position, dog_type_data=None):
+    """
+    DogSerializer と同じ形の辞書を作成する。
+    """
+    return {
+        "id": dog_id,
+        "player": player_id,
+        "dog_type": dog_type_data or dog_type_dict(dog_type),
+        "name": dog_type.name,
+        "movement_type": dog_type.movement_type,
+        "max_steps": dog_type.max_steps,
+        "x_position": x_position,
+        "y_position": y_position,
+    }
+
+
+def serialize_dog(dog):
+    """
+    Dog インスタンスを DogSerializer と同じ形の辞書にする。dog.dog_type は読み込み済みであること。
+    """
+    return dog_dict(dog.id, dog.player_id, dog.dog_type, dog.x_position, dog.y_position)
+
+
+def serialize_dogs(rows):
+    """
+    DOG_VALUES_FIELDS の values() の行を、DogSerializer と同じ形の辞書のリストにする。
+    """
+    dog_types = {}
+    dogs = []
+    for row in rows:
+        dog_type_id = row["dog_type_id"]
+        if dog_type_id not in dog_types:
+            dog_type = get_dog_type(dog_type_id)
+            dog_types[dog_type_id] = (dog_type, dog_type_dict(dog_type))
+        dog_type, dog_type_data = dog_types[dog_type_id]
+        dogs.append(
+            dog_dict(
+                row["id"],
+                row["player_id"],
+                dog_type,
+                row["x_position"],
+                row["y_position"],
+                dog_type_data,
+            )
+        )
+    return dogs
+
+
+def _player(player_id):
+    return {"id": player_id} if player_id is not None else None
+
+
+def _datetime(value):
+    return _datetime_field.to_representation(value) if value is not None else None
+
+
+def serialize_games(rows):
+    """
+    GAME_VALUES_FIELDS の values() の行を、GameSerializer と同じ形の辞書のリストにする。
+    """
+    return [
+        {
+            "id": row["id"],
+            "player1": _player(row["player1_id"]),
+            "player2": _player(row["player2_id"]),
+            "current_turn": _player(row["current_turn_id"]),
+            "winner": _player(row["winner_id"]),
+            "created_at": _datetime(row["created_at"]),
+            "updated_at": _datetime(row["updated_at"]),
+            "deleted_at": _datetime(row["deleted_at"]),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,47 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .dog_types import invalidate_dog_types
+from .models import Dog, DogType, Game
+
+# ゲームのバージョンと packed board を呼び出し側で保存する処理の中かどうか
+_managed_dog_writes = ContextVar("managed_dog_writes", default=False)
+
+
+@contextmanager
+def managed_dog_writes():
+    """
+    犬の行を変更した後に、呼び出し側でゲームのバージョンと packed board を保存する処理で使う。
+    この中での Dog の保存・削除では invalidate_game_state は何もしない。
+    """
+    token = _managed_dog_writes.set(True)
+    try:
+        yield
+    finally:
+        _managed_dog_writes.reset(token)
+
+
+@receiver(post_save, sender=Dog)
+@receiver(post_delete, sender=Dog)
+def invalidate_game_state(sender, instance, raw=False, **kwargs):
+    """
+    Dog の行が直接変更された場合（犬のCRUDや管理画面）は、ゲームの packed board を空に戻し、
+    ゲームのバージョンを進める。バージョンから作るゲーム状態のキャッシュと ETag はこれで無効になる。
+    手の確定時の位置の保存は QuerySet.update で行い、packed board とバージョンはゲームと一緒に保存する。
+    """
+    if raw or _managed_dog_writes.get():
+        return
+    Game.objects.filter(pk=instance.game_id).update(
+        board=None, version=F("version") + 1
+    )
+
+
+@receiver(post_save, sender=DogType)
+@receiver(post_delete, sender=DogType)
+def invalidate_dog_type_registry(sender, **kwargs):
+    """
+    犬種が変更された場合は、プロセスで共有している犬種を読み込み直す。
+    """
+    invalidate_dog_types()
@@ -1,6 +1,8 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
+from ..dog_types import get_dog_types
 from ..models import DogType, Player, Game, Dog
+from ..signals import managed_dog_writes
 
 
 class BaseTestCase(TestCase):
@@ -32,6 +34,8 @@ class BaseTestCase(TestCase):
         self.dog_type_hajike = DogType.objects.create(
             name="ハジケ犬", movement_type="special_hajike"
         )
+        # 犬種はプロセスで一度だけ読み込まれるため、クエリ数を数える前に読み込んでおく
+        get_dog_types()
 
         # プレイヤーの作成
         self.player1 = Player.objects.create(user=self.user1)
@@ -46,3 +50,37 @@ class BaseTestCase(TestCase):
         )
 
         # 必要に応じて追加のセットアップを行う
+
+    def create_start_position(self, game=None):
+        """
+        ゲーム（省略時は self.game）に初期配置の犬を作成する（ゲームのバージョンは進めない）。
+        プレイヤー1・2のボス犬を (0,0)・(1,0) に置き、プレイヤー1の手札にヤイバ犬を1匹入れる。
+
+        Returns:
+            tuple: (プレイヤー1のボス犬, プレイヤー2のボス犬, 手札のヤイバ犬)
+        """
+        game = game or self.game
+        with managed_dog_writes():
+            boss1 = Dog.objects.create(
+                game=game,
+                player=self.player1,
+                dog_type=self.dog_type_boss,
+                x_position=0,
+                y_position=0,
+                is_in_hand=False,
+            )
+            boss2 = Dog.objects.create(
+                game=game,
+                player=self.player2,
+                dog_type=self.dog_type_boss,
+                x_position=1,
+                y_position=0,
+                is_in_hand=False,
+            )
+            hand_dog = Dog.objects.create(
+                game=game,
+                player=self.player1,
+                dog_type=self.dog_type_yaiba,
+                is_in_hand=True,
+            )
+        return boss1, boss2, hand_dog
@@ -0,0 +1,297 @@
+from unittest import mock
+from django.db import connection
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game.models import Dog, Game, GameMove
+from dog_territory_battle_game.views import batch_move_views
+from dog_territory_battle_game.views.game_actor import flush_game, get_registry
+from dog_territory_battle_game.views.move_log import next_plies
+
+
+class BatchMovesTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.games = [self.create_game() for _ in range(3)]
+
+    def create_game(self):
+        """
+        ボス犬2匹がボード上にあり、プレイヤー1の手札に1匹いるゲームを作成する
+        """
+        game = Game.objects.create(
+            player1=self.player1, player2=self.player2, current_turn=self.player1
+        )
+        game.boss1, game.boss2, game.hand_dog = self.create_start_position(game)
+        return game
+
+    def place(self, game, x=0, y=1):
+        return {
+            "game": game.id,
+            "dog": game.hand_dog.id,
+            "action": "place",
+            "x": x,
+            "y": y,
+        }
+
+    def post(self, moves):
+        return self.client.post("/api/moves/batch/", {"moves": moves}, format="json")
+
+    def test_moves_across_games(self):
+        """
+        複数のゲームの手がまとめて保存され、結果が指定した順に返ること
+        """
+        response = self.post([self.place(game) for game in self.games])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual(
+            [result["game"] for result in results], [g.id for g in self.games]
+        )
+
+        for game, result in zip(self.games, results):
+            self.assertTrue(result["success"])
+            self.assertEqual(result["version"], 1)
+            self.assertEqual(result["current_turn"], self.player2.id)
+            self.assertEqual(result["dog"]["x_position"], 0)
+            self.assertEqual(result["dog"]["y_position"], 1)
+
+            game.refresh_from_db()
+            self.assertEqual(game.version, 1)
+            self.assertEqual(game.current_turn, self.player2)
+            dog = Dog.objects.get(pk=game.hand_dog.pk)
+            self.assertFalse(dog.is_in_hand)
+            self.assertEqual((dog.x_position, dog.y_position), (0, 1))
+            move = GameMove.objects.get(game=game)
+            self.assertEqual(move.kind, GameMove.KIND_PLACE)
+            self.assertEqual(move.ply, 1)
+
+    def test_moves_in_same_game_apply_in_order(self):
+        """
+        同じゲームの手は、前の手を適用した局面で検証されること
+        """
+        game = self.games[0]
+        response = self.post(
+            [
+                self.place(game),
+                {
+                    "game": game.id,
+                    "dog": game.boss2.id,
+                    "action": "move",
+                    "x": 1,
+                    "y": 1,
+                },
+            ]
+        )
+        results = response.json()["results"]
+        self.assertTrue(results[0]["success"])
+        self.assertTrue(results[1]["success"])
+        self.assertEqual(results[1]["version"], 2)
+        self.assertEqual(results[1]["current_turn"], self.player1.id)
+
+        game.refresh_from_db()
+        self.assertEqual(game.version, 2)
+        self.assertEqual(
+            list(GameMove.objects.filter(game=game).values_list("ply", "kind")),
+            [(1, GameMove.KIND_PLACE), (2, GameMove.KIND_MOVE)],
+        )
+        boss2 = Dog.objects.get(pk=game.boss2.pk)
+        self.assertEqual((boss2.x_position, boss2.y_position), (1, 1))
+
+    def test_invalid_moves_do_not_block_others(self):
+        """
+        指せない手や不正な指定はその手だけ失敗し、他の手は保存されること
+        """
+        game, other = self.games[:2]
+        response = self.post(
+            [
+                # プレイヤー2のターンではない
+                {
+                    "game": game.id,
+                    "dog": game.boss2.id,
+                    "action": "move",
+                    "x": 1,
+                    "y": 1,
+                },
+                {"game": 0, "dog": game.hand_dog.id, "action": "place", "x": 0, "y": 1},
+                {
+                    "game": game.id,
+                    "dog": other.hand_dog.id,
+                    "action": "place",
+                    "x": 0,
+                    "y": 1,
+                },
+                {"game": game.id, "dog": game.hand_dog.id, "action": "jump"},
+                {"game": game.id, "dog": game.hand_dog.id, "action": "place", "x": 0},
+                {
+                    "game": game.id,
+                    "dog": game.hand_dog.id,
+                    "action": "place",
+                    "x": "a",
+                    "y": 1,
+                },
+                "move",
+                self.place(other),
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual(
+            [result.get("status") for result in results],
+            [400, 404, 404, 400, 400, 400, 400, None],
+        )
+        self.assertEqual(results[0]["error"], "まだあなたのターンではありません！")
+        self.assertTrue(results[-1]["success"])
+
+        self.assertFalse(GameMove.objects.filter(game=game).exists())
+        self.assertEqual(Game.objects.get(pk=game.pk).version, 0)
+        self.assertEqual(Game.objects.get(pk=other.pk).version, 1)
+
+    def test_move_and_place_require_matching_dog_state(self):
+        """
+        手札の犬の移動と、ボード上の犬の配置は、その手だけ 400 になること
+        """
+        game = self.games[0]
+        response = self.post(
+            [
+                {
+                    "game": game.id,
+                    "dog": game.hand_dog.id,
+                    "action": "move",
+                    "x": 0,
+                    "y": 1,
+                },
+                {
+                    "game": game.id,
+                    "dog": game.boss1.id,
+                    "action": "place",
+                    "x": 0,
+                    "y": 1,
+                },
+                self.place(game),
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual([result.get("status") for result in results], [400, 400, None])
+        self.assertEqual(
+            results[0]["error"], "手札の犬は移動できません。ボードに配置してください。"
+        )
+        self.assertEqual(
+            results[1]["error"], "ボード上の犬は配置できません。移動を使ってください。"
+        )
+        boss1 = Dog.objects.get(pk=game.boss1.pk)
+        self.assertEqual((boss1.x_position, boss1.y_position), (0, 0))
+
+    def test_remove_requires_dog_on_board(self):
+        """
+        手札の犬を手札に戻す手は、孤立のエラーではなく手札にあることを理由に 400 になること
+        """
+        game = self.games[0]
+        response = self.post(
+            [{"game": game.id, "dog": game.hand_dog.id, "action": "remove"}]
+        )
+        result = response.json()["results"][0]
+        self.assertEqual(result["status"], 400)
+        self.assertEqual(result["error"], "この犬は既に手札にあります。")
+        self.assertFalse(GameMove.objects.filter(game=game).exists())
+
+    def test_single_dog_endpoints_check_dog_state(self):
+        """
+        犬ごとの移動・配置のエンドポイントも、犬の状態に合わない手を 400 にすること
+        """
+        game = self.games[0]
+        response = self.client.post(
+            f"/api/dogs/{game.hand_dog.id}/move/", {"x": 0, "y": 1}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            f"/api/dogs/{game.boss1.id}/place_on_board/", {"x": 0, "y": 1}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(GameMove.objects.filter(game=game).exists())
+
+    def test_finished_game_is_rejected(self):
+        """
+        終了したゲームの手は失敗すること
+        """
+        game = self.games[0]
+        Game.objects.filter(pk=game.pk).update(winner=self.player2)
+        result = self.post([self.place(game)]).json()["results"][0]
+        self.assertEqual(result["status"], 400)
+        self.assertEqual(result["error"], "ゲームは既に終了しています。")
+
+    def test_query_count_does_not_grow_with_games(self):
+        """
+        ゲームの数が増えてもクエリ数が変わらないこと
+        """
+        self.post([self.place(game) for game in self.games[:2]])
+        games = [self.create_game() for _ in range(6)]
+        with CaptureQueriesContext(connection) as few:
+            self.post([self.place(game) for game in games[:2]])
+        with CaptureQueriesContext(connection) as many:
+            self.post([self.place(game) for game in games[2:]])
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(GameMove.objects.count(), 8)
+
+    def test_stale_game_is_rejected(self):
+        """
+        読み込んだ後に他のリクエストで更新されたゲームの手だけが 409 になり、他のゲームは保存されること
+        """
+        stale, fresh = self.games[:2]
+
+        def update_then_next_plies(game_ids):
+            Game.objects.filter(pk=stale.pk).update(version=F("version") + 1)
+            return next_plies(game_ids)
+
+        with mock.patch.object(
+            batch_move_views, "next_plies", side_effect=update_then_next_plies
+        ):
+            response = self.post([self.place(stale), self.place(fresh)])
+
+        results = response.json()["results"]
+        self.assertEqual(results[0]["status"], status.HTTP_409_CONFLICT)
+        self.assertTrue(results[1]["success"])
+        self.assertFalse(GameMove.objects.filter(game=stale).exists())
+        self.assertTrue(Dog.objects.get(pk=stale.hand_dog.pk).is_in_hand)
+        self.assertEqual(Game.objects.get(pk=stale.pk).version, 1)
+        self.assertEqual(GameMove.objects.filter(game=fresh).count(), 1)
+
+    def test_invalid_requests(self):
+        """
+        moves がリストでない場合や、上限を超える場合は 400 を返すこと
+        """
+        for data in ({}, {"moves": []}, {"moves": {"game": 1}}):
+            response = self.client.post("/api/moves/batch/", data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(BATCH_MOVES_MAX=2):
+            response = self.post([self.place(game) for game in self.games])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(GameMove.objects.exists())
+
+    @override_settings(GAME_ACTORS_ENABLED=True, GAME_ACTOR_FLUSH_INTERVAL=60)
+    def test_moves_go_through_actors(self):
+        """
+        GAME_ACTORS_ENABLED の場合は手をアクターに送り、フラッシュまで書き込まないこと
+        """
+        try:
+            response = self.post([self.place(game) for game in self.games])
+            results = response.json()["results"]
+            self.assertTrue(all(result["success"] for result in results))
+            self.assertFalse(GameMove.objects.exists())
+
+            for game in self.games:
+                flush_game(game.id)
+            self.assertEqual(GameMove.objects.count(), 3)
+            self.assertTrue(
+                all(
+                    game.version == 1
+                    for game in Game.objects.filter(pk__in=[g.id for g in self.games])
+                )
+            )
+        finally:
+            get_registry().clear()
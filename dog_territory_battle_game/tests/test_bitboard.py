@@ -0,0 +1,161 @@
+import random
+from django.test import SimpleTestCase
+from .base_test import BaseTestCase
+from dog_territory_battle_game.engine import bitboard
+from dog_territory_battle_game.engine.bitboard import (
+    Bitboard,
+    extend_field,
+    field_of,
+    square_bit,
+)
+from dog_territory_battle_game.engine.movement import ADJACENT_OFFSETS, FIELD_MAX_SIZE
+from dog_territory_battle_game.models import Dog
+from dog_territory_battle_game.views.board_snapshot import BoardSnapshot
+
+
+class BitboardOperationTest(SimpleTestCase):
+    def test_shifts_do_not_wrap_around_rows(self):
+        """
+        左右のシフトで行をまたいで回り込まないこと
+        """
+        self.assertEqual(bitboard.shift_left(square_bit(0, 1)), 0)
+        self.assertEqual(bitboard.shift_right(square_bit(3, 1)), 0)
+        self.assertEqual(bitboard.shift_up(square_bit(2, 0)), 0)
+        self.assertEqual(bitboard.shift_down(square_bit(2, 3)), 0)
+
+    def test_neighbours(self):
+        """
+        周囲4方向・8方向の隣接マスが正しく求められること
+        """
+        center = square_bit(1, 1)
+        expected4 = {(1, 0), (0, 1), (2, 1), (1, 2)}
+        expected8 = expected4 | {(0, 0), (2, 0), (0, 2), (2, 2)}
+        self.assertEqual(
+            {
+                bitboard.bit_to_square(b)
+                for b in bitboard.iter_bits(bitboard.neighbours4(center))
+            },
+            expected4,
+        )
+        self.assertEqual(
+            {
+                bitboard.bit_to_square(b)
+                for b in bitboard.iter_bits(bitboard.neighbours8(center))
+            },
+            expected8,
+        )
+
+    def test_connectivity(self):
+        """
+        斜めの隣接も含めて連結判定を行うこと
+        """
+        diagonal = square_bit(0, 0) | square_bit(1, 1) | square_bit(2, 2)
+        self.assertTrue(bitboard.is_connected(diagonal))
+        self.assertFalse(bitboard.is_connected(diagonal | square_bit(0, 3)))
+
+    def test_extend_field_renormalises_origin(self):
+        """
+        左上が移動するマスを加えても、座標の列から作り直した Field と一致すること
+        """
+        squares = [(0, 0), (1, 1), (2, 0)]
+        field = field_of(squares)
+        for square in [(-1, 0), (0, -1), (-1, -1), (3, 2), (1, 2)]:
+            with self.subTest(square=square):
+                self.assertEqual(
+                    extend_field(field, *square), field_of(squares + [square])
+                )
+        self.assertIsNone(extend_field(field, -2, 0))
+        self.assertIsNone(field_of(squares + [(0, 4)]))
+
+    def test_from_pieces_rejects_oversized_board(self):
+        """
+        フィールドの最大サイズを超える配置はエラーになること
+        """
+        with self.assertRaises(ValueError):
+            Bitboard.from_pieces([(0, 1, 0, 0), (1, 1, 4, 0)])
+
+
+def reference_is_surrounded(occupancy, x, y):
+    """
+    占有マップの座標で囲み判定を行う（ビットボードを使わない比較用の実装）。
+    """
+    xs = [sx for sx, _ in occupancy]
+    ys = [sy for _, sy in occupancy]
+    full_width = max(xs) - min(xs) + 1 >= FIELD_MAX_SIZE
+    full_height = max(ys) - min(ys) + 1 >= FIELD_MAX_SIZE
+    return all(
+        (
+            (x, y - 1) in occupancy or (full_height and y == min(ys)),
+            (x, y + 1) in occupancy or (full_height and y == max(ys)),
+            (x - 1, y) in occupancy or (full_width and x == min(xs)),
+            (x + 1, y) in occupancy or (full_width and x == max(xs)),
+        )
+    )
+
+
+def reference_components(squares):
+    """
+    周囲8方向の隣接でつながったまとまりの数を幅優先探索で数える（比較用の実装）。
+    """
+    remaining = set(squares)
+    count = 0
+    while remaining:
+        frontier = [remaining.pop()]
+        while frontier:
+            x, y = frontier.pop()
+            for dx, dy in ADJACENT_OFFSETS:
+                if (x + dx, y + dy) in remaining:
+                    remaining.remove((x + dx, y + dy))
+                    frontier.append((x + dx, y + dy))
+        count += 1
+    return count
+
+
+def reference_can_remove(occupancy, square):
+    rest = set(occupancy) - {square}
+    for x, y in rest:
+        if not any((x + dx, y + dy) in rest for dx, dy in ADJACENT_OFFSETS):
+            return False
+    return reference_components(rest) <= reference_components(occupancy)
+
+
+class BitboardMatchesSnapshotTest(BaseTestCase):
+    def test_random_positions_match_reference(self):
+        """
+        ランダムな局面で、ボードスナップショットの囲み判定・取り除き判定が
+        占有マップの座標による判定と一致すること
+        """
+        rng = random.Random(0)
+        dog_types = [
+            self.dog_type_aniki,
+            self.dog_type_yaiba,
+            self.dog_type_mame,
+            self.dog_type_totsu,
+            self.dog_type_hajike,
+        ]
+        squares = [(x, y) for x in range(4) for y in range(4)]
+        for trial in range(30):
+            Dog.objects.filter(game=self.game).delete()
+            chosen = rng.sample(squares, rng.randint(2, 14))
+            origin = (rng.randint(-5, 5), rng.randint(-5, 5))
+            for index, (x, y) in enumerate(chosen):
+                Dog.objects.create(
+                    game=self.game,
+                    player=self.player1 if index % 2 == 0 else self.player2,
+                    dog_type=self.dog_type_boss if index < 2 else rng.choice(dog_types),
+                    x_position=x + origin[0],
+                    y_position=y + origin[1],
+                    is_in_hand=False,
+                )
+
+            board = BoardSnapshot.load(self.game)
+            for (x, y), dog in board.occupancy.items():
+                with self.subTest(trial=trial, square=(x, y)):
+                    self.assertEqual(
+                        board.is_square_surrounded(x, y),
+                        reference_is_surrounded(board.occupancy, x, y),
+                    )
+                    self.assertEqual(
+                        board.can_remove_dog(dog),
+                        reference_can_remove(board.occupancy, (x, y)),
+                    )
@@ -0,0 +1,243 @@
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from dog_territory_battle_game.models import Dog, GameMove
+from dog_territory_battle_game.views.board_snapshot import BoardSnapshot, simulate
+from dog_territory_battle_game.views.move_log import commit_move
+
+
+class BoardSnapshotTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.game.current_turn = self.player1
+        self.game.save()
+
+        self.boss1 = Dog.objects.create(
+            game=self.game,
+            player=self.player1,
+            dog_type=self.dog_type_boss,
+            x_position=0,
+            y_position=0,
+            is_in_hand=False,
+        )
+        self.boss2 = Dog.objects.create(
+            game=self.game,
+            player=self.player2,
+            dog_type=self.dog_type_boss,
+            x_position=1,
+            y_position=0,
+            is_in_hand=False,
+        )
+        self.hand_dog = Dog.objects.create(
+            game=self.game,
+            player=self.player1,
+            dog_type=self.dog_type_yaiba,
+            is_in_hand=True,
+        )
+
+    def test_load_uses_single_query(self):
+        """
+        スナップショットの読み込みが1クエリで完了し、判定でクエリが発生しないこと
+        """
+        with self.assertNumQueries(1):
+            board = BoardSnapshot.load(self.game)
+        with self.assertNumQueries(0):
+            self.assertTrue(board.is_square_occupied(0, 0))
+            self.assertFalse(board.is_square_occupied(0, 1))
+            self.assertTrue(board.is_adjacent_after_move(0, 1, self.hand_dog.id))
+            self.assertTrue(board.is_within_field_after_move(3, 0, self.hand_dog.id))
+            self.assertFalse(board.is_within_field_after_move(4, 0, self.hand_dog.id))
+            self.assertFalse(board.would_cause_self_loss(self.player1))
+            self.assertEqual(board.calculate_field_bounds()["width"], 2)
+
+    def test_adjacent_after_place_counts_only_own_pieces(self):
+        """
+        配置時の隣接判定は自分のコマのみを対象とすること
+        """
+        board = BoardSnapshot.load(self.game)
+        hand_dog = board.get_dog(self.hand_dog.id)
+        self.assertTrue(board.is_adjacent_after_place(0, 1, hand_dog))
+        self.assertFalse(board.is_adjacent_after_place(2, 1, hand_dog))
+
+    def test_move_query_count_is_bounded(self):
+        """
+        移動リクエスト1回あたりのクエリ数が一定以下であること
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f"/api/dogs/{self.hand_dog.id}/place_on_board/", {"x": 0, "y": 1}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 手のログへの追記（最初の手は起点のスナップショットも含む）と、
+        # ログと位置をまとめて保存するセーブポイントを合わせた上限
+        self.assertLessEqual(len(queries), 12)
+
+    def test_occupied_square_is_rejected_by_database(self):
+        """
+        同時に確定した別の手で埋まったマスへの保存はデータベースの一意制約で弾かれ、
+        手のログも位置も保存されないこと
+        """
+        board = BoardSnapshot.load(self.game)
+        dog = board.get_dog(self.hand_dog.id)
+        result = simulate(board, dog, (0, 1))
+
+        # 別のリクエストで同じマスに先にコマが置かれた状態にする
+        Dog.objects.filter(id=self.boss2.id).update(x_position=0, y_position=1)
+
+        self.assertFalse(
+            commit_move(result.board, dog, GameMove.KIND_PLACE, None, (0, 1))
+        )
+        self.assertFalse(GameMove.objects.filter(game=self.game).exists())
+        self.assertTrue(Dog.objects.get(id=self.hand_dog.id).is_in_hand)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Dog.objects.create(
+                game=self.game,
+                player=self.player1,
+                dog_type=self.dog_type_aniki,
+                x_position=0,
+                y_position=0,
+                is_in_hand=False,
+            )
+
+    def test_rejected_move_does_not_write(self):
+        """
+        無効な移動ではデータベースへの書き込みが発生しないこと
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f"/api/dogs/{self.hand_dog.id}/place_on_board/", {"x": 3, "y": 3}
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        writes = [
+            q for q in queries if not q["sql"].lstrip().upper().startswith("SELECT")
+        ]
+        self.assertEqual(writes, [])
+        self.hand_dog.refresh_from_db()
+        self.assertTrue(self.hand_dog.is_in_hand)
+
+
+class SimulateTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.game.current_turn = self.player1
+        self.game.save()
+
+        # プレイヤー1のボス犬を(0,0)に、周囲をプレイヤー2のコマで3方向囲む
+        self.boss1 = Dog.objects.create(
+            game=self.game,
+            player=self.player1,
+            dog_type=self.dog_type_boss,
+            x_position=0,
+            y_position=0,
+            is_in_hand=False,
+        )
+        self.boss2 = Dog.objects.create(
+            game=self.game,
+            player=self.player2,
+            dog_type=self.dog_type_boss,
+            x_position=3,
+            y_position=3,
+            is_in_hand=False,
+        )
+        for x, y in [(1, 0), (2, 1), (3, 2), (2, 2), (1, 2)]:
+            Dog.objects.create(
+                game=self.game,
+                player=self.player2,
+                dog_type=self.dog_type_yaiba,
+                x_position=x,
+                y_position=y,
+                is_in_hand=False,
+            )
+        self.own_dog = Dog.objects.create(
+            game=self.game,
+            player=self.player1,
+            dog_type=self.dog_type_yaiba,
+            x_position=1,
+            y_position=1,
+            is_in_hand=False,
+        )
+
+    def test_simulate_does_not_modify_original_board(self):
+        """
+        simulate は元のボードと Dog インスタンスを変更しないこと
+        """
+        board = BoardSnapshot.load(self.game)
+        dog = board.get_dog(self.own_dog.id)
+        with self.assertNumQueries(0):
+            result = simulate(board, dog, (0, 1))
+        self.assertTrue(result.self_loss)
+        self.assertIsNone(result.winner)
+        self.assertEqual((dog.x_position, dog.y_position), (1, 1))
+        self.assertIn((1, 1), board.occupancy)
+        self.assertNotIn((0, 1), board.occupancy)
+        self.assertIn((0, 1), result.board.occupancy)
+
+    def test_simulate_returns_to_hand_when_target_is_none(self):
+        """
+        target が None の場合はコマを手札に戻した結果を返すこと
+        """
+        board = BoardSnapshot.load(self.game)
+        dog = board.get_dog(self.own_dog.id)
+        result = simulate(board, dog, None)
+        self.assertFalse(result.self_loss)
+        self.assertIsNone(result.board.positions[dog.id])
+        self.assertNotIn((1, 1), result.board.occupancy)
+
+    def test_rejected_self_loss_move_does_not_write(self):
+        """
+        自分のボス犬が囲まれる移動は書き込みなしで拒否されること
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f"/api/dogs/{self.own_dog.id}/move/", {"x": 0, "y": 1}
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        writes = [
+            q for q in queries if not q["sql"].lstrip().upper().startswith("SELECT")
+        ]
+        self.assertEqual(writes, [])
+        self.own_dog.refresh_from_db()
+        self.assertEqual((self.own_dog.x_position, self.own_dog.y_position), (1, 1))
+
+
+class EvaluateTerminalTest(BaseTestCase):
+    def test_evaluate_terminal_reports_both_bosses_and_winner(self):
+        """
+        1回の評価で両方のボス犬の囲み状態・枠線のブロック・勝者が求められること
+        """
+        # プレイヤー1のボス犬を(0,0)に置き、右と下をコマで塞ぐ（4x4 のため上と左は枠線）
+        layout = [
+            (self.player1, self.dog_type_boss, (0, 0)),
+            (self.player2, self.dog_type_boss, (2, 2)),
+            (self.player2, self.dog_type_yaiba, (1, 0)),
+            (self.player2, self.dog_type_yaiba, (0, 1)),
+            (self.player2, self.dog_type_yaiba, (3, 3)),
+        ]
+        for player, dog_type, (x, y) in layout:
+            Dog.objects.create(
+                game=self.game,
+                player=player,
+                dog_type=dog_type,
+                x_position=x,
+                y_position=y,
+                is_in_hand=False,
+            )
+
+        board = BoardSnapshot.load(self.game)
+        with self.assertNumQueries(0):
+            state = board.evaluate_terminal()
+        self.assertEqual(
+            state.surrounded, {self.player1.id: True, self.player2.id: False}
+        )
+        self.assertEqual(
+            state.edges, {"up": True, "down": True, "left": True, "right": True}
+        )
+        self.assertEqual(state.winner_id, self.player2.id)
+        self.assertEqual(board.check_winner(), self.player2)
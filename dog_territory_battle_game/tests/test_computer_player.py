@@ -0,0 +1,107 @@
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game.models import Dog
+from dog_territory_battle_game.views.board_snapshot import (
+    BoardSnapshot,
+    generate_legal_moves,
+)
+from dog_territory_battle_game.views.computer_player import choose_move
+
+
+class ComputerPlayerTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.game.current_turn = self.player1
+        self.game.save()
+
+        # player1 がアニキ犬を (1, 2) に動かすと player2 のボス犬が囲まれる局面
+        layout = [
+            (self.player2, self.dog_type_boss, (1, 1)),
+            (self.player1, self.dog_type_boss, (2, 0)),
+            (self.player1, self.dog_type_yaiba, (1, 0)),
+            (self.player1, self.dog_type_yaiba, (0, 1)),
+            (self.player1, self.dog_type_yaiba, (2, 1)),
+            (self.player1, self.dog_type_aniki, (0, 2)),
+            (self.player2, self.dog_type_mame, None),
+        ]
+        self.dogs = [
+            Dog.objects.create(
+                game=self.game,
+                player=player,
+                dog_type=dog_type,
+                x_position=position[0] if position else None,
+                y_position=position[1] if position else None,
+                is_in_hand=position is None,
+            )
+            for player, dog_type, position in layout
+        ]
+        self.aniki = self.dogs[5]
+
+    def test_search_finds_winning_move_without_queries(self):
+        """
+        1手で勝てる局面で勝ちの手を選び、探索中にクエリを発行しないこと
+        """
+        board = BoardSnapshot.load(self.game)
+        with self.assertNumQueries(0):
+            result = choose_move(board, self.player1.id, time_budget=5, max_depth=3)
+        self.assertEqual(result.move, (self.aniki.id, (1, 2)))
+        self.assertGreater(result.score, 0)
+
+    def test_search_returns_legal_move_without_time(self):
+        """
+        思考時間がなくても合法手を返すこと
+        """
+        board = BoardSnapshot.load(self.game)
+        result = choose_move(board, self.player2.id, time_budget=0, max_depth=3)
+        moves, placements, removals = generate_legal_moves(board, self.player2.id)
+        dog_id, target = result.move
+        self.assertIn(target, {**moves, **placements}.get(dog_id, []))
+
+    def test_bot_replies_after_human_move(self):
+        """
+        相手がコンピューターの場合、人間の手の後にコンピューターが手を指すこと
+        """
+        self.player2.is_bot = True
+        self.player2.save()
+
+        response = self.client.post(
+            f"/api/dogs/{self.dogs[2].id}/remove_from_board/", format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("computer_move", response.data)
+        self.assertEqual(response.data["current_turn"], self.player1.id)
+
+        moved = Dog.objects.get(id=response.data["computer_move"]["dog"])
+        self.assertEqual(moved.player_id, self.player2.id)
+        self.assertEqual(
+            (moved.x_position, moved.y_position),
+            (
+                response.data["computer_move"]["x"],
+                response.data["computer_move"]["y"],
+            ),
+        )
+
+    def test_computer_move_requires_bot_turn(self):
+        """
+        現在の手番がコンピューターでない場合はエラーになること
+        """
+        response = self.client.post(f"/api/games/{self.game.id}/computer_move/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_computer_move_plays_for_bot(self):
+        """
+        コンピューターの手番でアクションを呼ぶと、手を指して手番を進めること
+        """
+        self.player1.is_bot = True
+        self.player1.save()
+
+        response = self.client.post(f"/api/games/{self.game.id}/computer_move/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["computer_move"],
+            {"dog": self.aniki.id, "x": 1, "y": 2},
+        )
+        self.assertEqual(response.data["winner"], self.user1.username)
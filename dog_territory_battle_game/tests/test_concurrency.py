@@ -0,0 +1,81 @@
+from unittest import mock
+from django.db.models import F
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game.models import Dog, Game, GameMove
+from dog_territory_battle_game.views.board_snapshot import BoardSnapshot, simulate
+from dog_territory_battle_game.views.dog_utils import StaleGameError, save_game
+from dog_territory_battle_game.views.move_log import commit_move
+
+
+class OptimisticConcurrencyTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.game.current_turn = self.player1
+        self.game.save()
+
+        self.boss1, self.boss2, self.hand_dog = self.create_start_position()
+
+    def bump_version(self):
+        """
+        他のリクエストで手が確定したことを再現する
+        """
+        Game.objects.filter(pk=self.game.pk).update(version=F("version") + 1)
+
+    def test_save_game_increments_version(self):
+        """
+        バージョンが一致していれば保存され、バージョンが1つ進むこと
+        """
+        save_game(self.game)
+        self.assertEqual(self.game.version, 1)
+        self.assertEqual(Game.objects.get(pk=self.game.pk).version, 1)
+
+    def test_save_game_rejects_stale_version(self):
+        """
+        読み込んだ後に更新されたゲームは保存せず、バージョンを戻すこと
+        """
+        self.bump_version()
+        self.game.current_turn = self.player2
+        with self.assertRaises(StaleGameError):
+            save_game(self.game)
+        self.assertEqual(self.game.version, 0)
+        self.assertEqual(Game.objects.get(pk=self.game.pk).current_turn, self.player1)
+
+    def test_stale_commit_writes_nothing(self):
+        """
+        バージョンが変わっていた場合は、手のログ・犬の位置・手番のどれも保存しないこと
+        """
+        board = BoardSnapshot.load(self.game)
+        dog = board.get_dog(self.hand_dog.id)
+        result = simulate(board, dog, (0, 1))
+        self.bump_version()
+
+        self.assertFalse(
+            commit_move(result.board, dog, GameMove.KIND_PLACE, None, (0, 1))
+        )
+        self.assertFalse(GameMove.objects.filter(game=self.game).exists())
+        self.assertTrue(Dog.objects.get(id=self.hand_dog.id).is_in_hand)
+        game = Game.objects.get(pk=self.game.pk)
+        self.assertEqual((game.version, game.current_turn_id), (1, self.player1.id))
+
+    def test_move_endpoint_returns_conflict(self):
+        """
+        手を確定する前に他の手が確定した場合は 409 を返すこと
+        """
+        original_save_dog = BoardSnapshot.save_dog
+
+        def save_dog_after_other_move(board, dog):
+            self.bump_version()
+            original_save_dog(board, dog)
+
+        with mock.patch.object(BoardSnapshot, "save_dog", save_dog_after_other_move):
+            response = self.client.post(
+                f"/api/dogs/{self.hand_dog.id}/place_on_board/", {"x": 0, "y": 1}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(GameMove.objects.filter(game=self.game).exists())
+        self.assertTrue(Dog.objects.get(id=self.hand_dog.id).is_in_hand)
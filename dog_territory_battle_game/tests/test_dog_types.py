@@ -0,0 +1,53 @@
+from .base_test import BaseTestCase
+from dog_territory_battle_game.dog_types import (
+    get_dog_type,
+    get_dog_types,
+    get_dog_types_by_name,
+)
+from dog_territory_battle_game.engine.movement import ADJACENT_OFFSETS
+from dog_territory_battle_game.models import DogType
+
+
+class DogTypeRegistryTest(BaseTestCase):
+    def test_lookup_does_not_query(self):
+        """
+        読み込み済みの犬種は同じインスタンスをクエリなしで返すこと
+        """
+        with self.assertNumQueries(0):
+            dog_type = get_dog_type(self.dog_type_boss.id)
+            self.assertIs(dog_type, get_dog_type(self.dog_type_boss.id))
+            self.assertIs(get_dog_types_by_name(["ボス犬"])["ボス犬"], dog_type)
+
+    def test_flags(self):
+        """
+        ボス犬の判定と移動オフセットが犬種から求まること
+        """
+        boss = get_dog_type(self.dog_type_boss.id)
+        self.assertTrue(boss.is_boss)
+        self.assertEqual(boss.move_offsets, ADJACENT_OFFSETS)
+        self.assertFalse(get_dog_type(self.dog_type_hajike.id).is_boss)
+
+    def test_save_and_delete_invalidate(self):
+        """
+        犬種の保存・削除で読み込み直されること
+        """
+        self.dog_type_aniki.name = "アニキ犬改"
+        self.dog_type_aniki.save()
+        self.assertEqual(get_dog_type(self.dog_type_aniki.id).name, "アニキ犬改")
+
+        dog_type_id = self.dog_type_mame.id
+        self.dog_type_mame.delete()
+        self.assertNotIn(dog_type_id, get_dog_types())
+        with self.assertRaises(DogType.DoesNotExist):
+            get_dog_type(dog_type_id)
+
+    def test_unknown_id_is_reloaded(self):
+        """
+        シグナルを発生させずに追加された犬種も、読み込み直して返すこと
+        """
+        DogType.objects.bulk_create(
+            [DogType(name="普通の犬", max_steps=1, movement_type="diagonal_orthogonal")]
+        )
+        dog_type = DogType.objects.get(name="普通の犬")
+        self.assertEqual(get_dog_type(dog_type.id).name, "普通の犬")
+        self.assertIn("普通の犬", get_dog_types_by_name(["普通の犬"]))
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import threading
+from django.test import SimpleTestCase, override_settings
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game import events
+from dog_territory_battle_game.models import GameMove
+from dog_territory_battle_game.views.event_views import stream_game_events
+from dog_territory_battle_game.views.game_state import publish_game_resync
+
+
+class RecordingBroker:
+    """
+    配信されたイベントを記録するテスト用のブローカー。
+    """
+
+    published = []
+
+    def publish(self, game_id, event):
+        self.published.append((game_id, event))
+
+
+class InProcessBrokerTest(SimpleTestCase):
+    def test_publish_from_another_thread(self):
+        """
+        別スレッドから配信したイベントが購読者のキューに届くこと
+        """
+        broker = events.InProcessBroker()
+
+        async def receive():
+            subscription = broker.subscribe(1)
+            thread = threading.Thread(target=broker.publish, args=(1, {"version": 1}))
+            thread.start()
+            event = await asyncio.wait_for(subscription[1].get(), 1)
+            thread.join()
+            broker.unsubscribe(1, subscription)
+            return event
+
+        self.assertEqual(asyncio.run(receive()), {"version": 1})
+        broker.publish(1, {"version": 2})
+
+    def test_full_queue_drops_oldest_event(self):
+        """
+        購読者のキューが一杯の場合は古いイベントから捨てること
+        """
+        broker = events.InProcessBroker()
+
+        async def receive():
+            _, queue = broker.subscribe(1)
+            for version in range(events.SUBSCRIBER_QUEUE_SIZE + 2):
+                broker.publish(1, {"version": version})
+            await asyncio.sleep(0)
+            return queue.get_nowait()
+
+        self.assertEqual(asyncio.run(receive()), {"version": 2})
+
+
+class GameEventsTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.game.current_turn = self.player1
+        self.game.save()
+        _, _, self.hand_dog = self.create_start_position()
+        events.get_broker.cache_clear()
+        self.addCleanup(events.get_broker.cache_clear)
+
+    @override_settings(
+        GAME_EVENT_BROKER="dog_territory_battle_game.tests.test_events.RecordingBroker"
+    )
+    def test_move_publishes_delta_after_commit(self):
+        """
+        手が確定したら、位置が変わった犬と手番を含むイベントが配信されること
+        """
+        RecordingBroker.published = []
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/dogs/{self.hand_dog.id}/place_on_board/", {"x": 0, "y": 1}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(len(RecordingBroker.published), 1)
+        game_id, event = RecordingBroker.published[0]
+        self.assertEqual(game_id, self.game.id)
+        self.assertEqual(event["version"], 1)
+        self.assertEqual(event["current_turn"], self.player2.id)
+        self.assertFalse(event["full"])
+        self.assertEqual(
+            [(d["id"], d["x_position"], d["y_position"]) for d in event["dogs"]],
+            [(self.hand_dog.id, 0, 1)],
+        )
+
+    def test_stream_sends_published_events(self):
+        """
+        イベントストリームが配信されたイベントを SSE の形式で送ること
+        """
+
+        async def read_stream():
+            stream = stream_game_events(self.game.id, heartbeat_interval=0.01)
+            chunks = [await anext(stream), await anext(stream)]
+            events.get_broker().publish(self.game.id, {"version": 3, "dogs": []})
+            chunk = await anext(stream)
+            while chunk.startswith(":"):
+                chunk = await anext(stream)
+            chunks.append(chunk)
+            await stream.aclose()
+            return chunks
+
+        retry, keep_alive, update = asyncio.run(read_stream())
+        self.assertTrue(retry.startswith("retry:"))
+        self.assertEqual(keep_alive, ": keep-alive\n\n")
+        lines = update.strip().split("\n")
+        self.assertEqual(lines[:2], ["id: 3", "event: update"])
+        self.assertEqual(json.loads(lines[2][len("data: ") :])["version"], 3)
+
+    def test_stream_sends_resync_events(self):
+        """
+        resync イベントを id のない resync の種類のイベントとして送り、ストリームを続けること
+        """
+        lost_move = GameMove(
+            game=self.game,
+            ply=1,
+            kind=GameMove.KIND_PLACE,
+            player=self.player1,
+            dog=self.hand_dog,
+            to_x=0,
+            to_y=1,
+        )
+
+        async def read_stream():
+            stream = stream_game_events(self.game.id, heartbeat_interval=0.01)
+            await anext(stream)
+            publish_game_resync(self.game.id, [lost_move], range(1, 2))
+            events.get_broker().publish(self.game.id, {"version": 2, "dogs": []})
+            chunks = []
+            while len(chunks) < 2:
+                chunk = await anext(stream)
+                if not chunk.startswith(":"):
+                    chunks.append(chunk)
+            await stream.aclose()
+            return chunks
+
+        resync, update = asyncio.run(read_stream())
+        lines = resync.strip().split("\n")
+        self.assertEqual(lines[0], "event: resync")
+        data = json.loads(lines[1][len("data: ") :])
+        self.assertTrue(data["resync"])
+        self.assertEqual(data["lost_moves"][0]["dog"], self.hand_dog.id)
+        self.assertEqual(update.strip().split("\n")[:2], ["id: 2", "event: update"])
+
+    def test_unknown_game_returns_not_found(self):
+        """
+        存在しないゲームのイベントストリームは 404 になること
+        """
+        response = self.client.get("/api/games/999999/events/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,223 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from .base_test import BaseTestCase
+from .test_events import RecordingBroker
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game.models import Dog, Game, GameMove, GameSnapshot
+from dog_territory_battle_game import events
+from dog_territory_battle_game.views.board_snapshot import BoardSnapshot, simulate
+from dog_territory_battle_game.views.game_actor import (
+    get_registry,
+    load_board,
+    submit_move,
+)
+from dog_territory_battle_game.views.game_state import game_update_key, state_key
+from dog_territory_battle_game.views.move_log import (
+    current_positions,
+    materialize_positions,
+)
+
+
+@override_settings(
+    GAME_ACTORS_ENABLED=True, GAME_ACTOR_FLUSH_INTERVAL=0, GAME_SNAPSHOT_INTERVAL=2
+)
+class GameActorTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.game.current_turn = self.player1
+        self.game.save()
+
+        self.boss1, self.boss2, self.hand1 = self.create_start_position()
+
+    def tearDown(self):
+        get_registry().clear()
+        super().tearDown()
+
+    def post(self, user, url, data=None):
+        self.client.force_authenticate(user=user)
+        response = self.client.post(url, data or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response
+
+    def play_moves(self):
+        self.post(
+            self.user1,
+            f"/api/dogs/{self.hand1.id}/place_on_board/",
+            {"x": 0, "y": 1},
+        )
+        self.post(self.user2, f"/api/dogs/{self.boss2.id}/move/", {"x": 1, "y": 1})
+        self.post(self.user1, f"/api/dogs/{self.hand1.id}/remove_from_board/")
+
+    def test_moves_are_not_written_until_flush(self):
+        """
+        手はメモリ上で確定し、flush するまでデータベースに書き込まないこと
+        """
+        with CaptureQueriesContext(connection) as queries:
+            self.play_moves()
+        writes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        self.assertEqual(writes, [])
+        self.assertFalse(GameMove.objects.filter(game=self.game).exists())
+        self.assertEqual(Game.objects.get(pk=self.game.pk).version, 0)
+
+        # ゲームの取得はアクターの最新の状態を返すこと
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.get(f"/api/games/{self.game.id}/")
+        self.assertEqual(response.data["game"]["version"], 3)
+        self.assertEqual(response.data["game"]["current_turn"], self.player2.id)
+        self.assertEqual(
+            {dog["id"] for dog in response.data["board_dogs"]},
+            {self.boss1.id, self.boss2.id},
+        )
+
+    def test_flush_writes_moves(self):
+        """
+        flush で手のログ・スナップショット・犬の位置・ゲームの行がまとめて書き込まれること
+        """
+        self.play_moves()
+        get_registry().flush(self.game.id)
+
+        self.assertEqual(
+            list(
+                GameMove.objects.filter(game=self.game)
+                .order_by("ply")
+                .values_list("ply", "kind")
+            ),
+            [
+                (1, GameMove.KIND_PLACE),
+                (2, GameMove.KIND_MOVE),
+                (3, GameMove.KIND_REMOVE),
+            ],
+        )
+        self.assertEqual(
+            sorted(
+                GameSnapshot.objects.filter(game=self.game).values_list(
+                    "ply", flat=True
+                )
+            ),
+            [0, 2],
+        )
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.version, 3)
+        self.assertEqual(self.game.current_turn, self.player2)
+        self.assertEqual(materialize_positions(self.game), current_positions(self.game))
+        self.assertEqual(current_positions(self.game)[self.boss2.id], (1, 1))
+
+        # packed board が Dog の行と一致すること
+        packed = BoardSnapshot.load(self.game)
+        self.game.board = None
+        self.assertEqual(packed.positions, BoardSnapshot.load(self.game).positions)
+
+    def test_stale_snapshot_is_rejected(self):
+        """
+        局面を複製した後に他の手を受け付けていた場合は、手を受け付けないこと
+        """
+        boards = [load_board(self.game), load_board(self.game)]
+        results = []
+        for board in boards:
+            dog = board.get_dog(self.hand1.id)
+            result = simulate(board, dog, (0, 1))
+            results.append(
+                submit_move(result.board, dog, GameMove.KIND_PLACE, None, (0, 1))
+            )
+        self.assertEqual(results, [True, False])
+
+    def test_swapped_squares_are_flushed(self):
+        """
+        同じ flush の中で、他の犬が空けたマスに置いた手も書き込めること
+        """
+        moves = [(self.boss1.id, (2, 0)), (self.hand1.id, (0, 0))]
+        for dog_id, target in moves:
+            board = load_board(self.game)
+            dog = board.get_dog(dog_id)
+            origin = board.positions[dog_id]
+            result = simulate(board, dog, target)
+            self.assertTrue(
+                submit_move(result.board, dog, GameMove.KIND_MOVE, origin, target)
+            )
+        get_registry().flush(self.game.id)
+
+        positions = current_positions(self.game)
+        self.assertEqual(positions[self.boss1.id], (2, 0))
+        self.assertEqual(positions[self.hand1.id], (0, 0))
+
+    def test_update_outside_actor_discards_actor(self):
+        """
+        アクターの外でゲームが更新されていた場合は何も書き込まず、アクターを破棄すること
+        """
+        self.post(
+            self.user1,
+            f"/api/dogs/{self.hand1.id}/place_on_board/",
+            {"x": 0, "y": 1},
+        )
+        Game.objects.filter(pk=self.game.pk).update(version=F("version") + 1)
+        get_registry().flush(self.game.id)
+
+        self.assertIsNone(get_registry().peek(self.game.id))
+        self.assertFalse(GameMove.objects.filter(game=self.game).exists())
+        self.assertTrue(Dog.objects.get(id=self.hand1.id).is_in_hand)
+        # 次の読み込みではデータベースの状態から作り直すこと
+        board = load_board(Game.objects.get(pk=self.game.pk))
+        self.assertIsNone(board.positions[self.hand1.id])
+
+    @override_settings(
+        GAME_EVENT_BROKER="dog_territory_battle_game.tests.test_events.RecordingBroker"
+    )
+    def test_lost_moves_are_published(self):
+        """
+        保存できなかった手を resync イベントで通知し、そのバージョンのキャッシュを削除すること
+        """
+        events.get_broker.cache_clear()
+        self.addCleanup(events.get_broker.cache_clear)
+        RecordingBroker.published = []
+        self.post(
+            self.user1,
+            f"/api/dogs/{self.hand1.id}/place_on_board/",
+            {"x": 0, "y": 1},
+        )
+        cache.set(state_key(self.game.id, 1), {})
+        cache.set(game_update_key(self.game.id, 1), {})
+        Game.objects.filter(pk=self.game.pk).update(version=F("version") + 1)
+        RecordingBroker.published = []
+        get_registry().flush(self.game.id)
+
+        self.assertEqual(len(RecordingBroker.published), 1)
+        game_id, event = RecordingBroker.published[0]
+        self.assertEqual(game_id, self.game.id)
+        self.assertTrue(event["resync"])
+        self.assertEqual(
+            [(move["kind"], move["dog"]) for move in event["lost_moves"]],
+            [(GameMove.KIND_PLACE, self.hand1.id)],
+        )
+        self.assertIsNone(cache.get(state_key(self.game.id, 1)))
+        self.assertIsNone(cache.get(game_update_key(self.game.id, 1)))
+
+    def test_reset_flushes_actor(self):
+        """
+        リセットの前にアクターが受け付けた手を書き込み、アクターを手放すこと
+        """
+        self.post(
+            self.user1,
+            f"/api/dogs/{self.hand1.id}/place_on_board/",
+            {"x": 0, "y": 1},
+        )
+        self.post(self.user1, f"/api/games/{self.game.id}/reset_game/")
+
+        self.assertIsNone(get_registry().peek(self.game.id))
+        self.assertEqual(
+            list(
+                GameMove.objects.filter(game=self.game)
+                .order_by("ply")
+                .values_list("kind", flat=True)
+            ),
+            [GameMove.KIND_PLACE, GameMove.KIND_RESET],
+        )
+        self.assertEqual(Game.objects.get(pk=self.game.pk).version, 2)
@@ -0,0 +1,352 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import override_settings
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game.models import Dog, Game
+from dog_territory_battle_game.views import game_state
+from dog_territory_battle_game.views.game_state import (
+    game_update_event,
+    record_game_update,
+)
+from dog_territory_battle_game.signals import managed_dog_writes
+
+
+class GameStateTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.game.current_turn = self.player1
+        self.game.save()
+
+        self.boss1, self.boss2, self.hand1 = self.create_start_position()
+        with managed_dog_writes():
+            self.hand2 = Dog.objects.create(
+                game=self.game,
+                player=self.player2,
+                dog_type=self.dog_type_hajike,
+                is_in_hand=True,
+            )
+
+    def test_retrieve_splits_hand_and_board(self):
+        """
+        手札とボード上のコマがプレイヤーごとに分けて返されること
+        """
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/games/{self.game.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["game"],
+            {
+                "id": self.game.id,
+                "current_turn": self.player1.id,
+                "player1": self.player1.id,
+                "player2": self.player2.id,
+                "version": 0,
+            },
+        )
+        self.assertEqual(
+            [d["id"] for d in response.data["board_dogs"]],
+            [self.boss1.id, self.boss2.id],
+        )
+        self.assertEqual(
+            [d["id"] for d in response.data["player1_hand_dogs"]], [self.hand1.id]
+        )
+        self.assertEqual(
+            [d["id"] for d in response.data["player2_hand_dogs"]], [self.hand2.id]
+        )
+        self.assertEqual(
+            response.data["player1_hand_dogs"][0]["dog_type"]["name"], "ヤイバ犬"
+        )
+
+    def test_cached_state_is_rebuilt_after_move(self):
+        """
+        手が確定するまではキャッシュを返し、確定後は新しい状態を返すこと
+        """
+        self.client.get(f"/api/games/{self.game.id}/")
+        with self.assertNumQueries(1):
+            self.client.get(f"/api/games/{self.game.id}/")
+
+        response = self.client.post(
+            f"/api/dogs/{self.hand1.id}/place_on_board/", {"x": 0, "y": 1}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(f"/api/games/{self.game.id}/")
+        self.assertEqual(response.data["game"]["current_turn"], self.player2.id)
+        self.assertEqual(response.data["player1_hand_dogs"], [])
+        self.assertIn(self.hand1.id, [d["id"] for d in response.data["board_dogs"]])
+
+    def test_unchanged_state_returns_not_modified(self):
+        """
+        ETag が一致する場合は Dog テーブルを読まずに 304 を返すこと
+        """
+        response = self.client.get(f"/api/games/{self.game.id}/")
+        etag = response["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f"/api/games/{self.game.id}/", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_dog_write_changes_etag(self):
+        """
+        犬のCRUDで直接変更した後は、変更前の ETag に 304 を返さないこと
+        """
+        etag = self.client.get(f"/api/games/{self.game.id}/")["ETag"]
+        response = self.client.patch(
+            f"/api/dogs/{self.boss2.id}/", {"x_position": 2}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(
+            f"/api/games/{self.game.id}/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        response = self.client.get(
+            f"/api/games/{self.game.id}/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_dog_write_invalidates_cached_state(self):
+        """
+        犬のCRUDで直接変更した場合もバージョンが進み、キャッシュではなく新しい状態を返すこと
+        """
+        self.client.get(f"/api/games/{self.game.id}/")
+
+        response = self.client.patch(
+            f"/api/dogs/{self.boss2.id}/", {"x_position": 2}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(f"/api/games/{self.game.id}/")
+        self.assertEqual(response.data["game"]["version"], 1)
+        self.assertIn(
+            (self.boss2.id, 2, 0),
+            [
+                (d["id"], d["x_position"], d["y_position"])
+                for d in response.data["board_dogs"]
+            ],
+        )
+
+        response = self.client.delete(f"/api/dogs/{self.hand2.id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get(f"/api/games/{self.game.id}/")
+        self.assertEqual(response.data["game"]["version"], 2)
+        self.assertEqual(response.data["player2_hand_dogs"], [])
+
+    def test_version_is_bumped_by_each_operation(self):
+        """
+        配置・移動・手札に戻す操作とリセットのたびにバージョンと ETag が変わること
+        """
+        etag = self.client.get(f"/api/games/{self.game.id}/")["ETag"]
+        operations = [
+            (
+                self.user1,
+                f"/api/dogs/{self.hand1.id}/place_on_board/",
+                {"x": 0, "y": 1},
+            ),
+            (self.user2, f"/api/dogs/{self.boss2.id}/move/", {"x": 1, "y": 1}),
+            (self.user1, f"/api/dogs/{self.hand1.id}/remove_from_board/", {}),
+        ]
+        for version, (user, url, data) in enumerate(operations, start=1):
+            self.client.force_authenticate(user=user)
+            response = self.client.post(url, data)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
+            response = self.client.get(
+                f"/api/games/{self.game.id}/", HTTP_IF_NONE_MATCH=etag
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["game"]["version"], version)
+            self.assertNotEqual(response["ETag"], etag)
+            etag = response["ETag"]
+
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.version, len(operations))
+
+    def play(self, user, url, data=None):
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, data or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
+    def test_since_returns_only_changed_dogs(self):
+        """
+        since 以降に位置が変わった犬と手番だけを返すこと
+        """
+        self.play(
+            self.user1, f"/api/dogs/{self.hand1.id}/place_on_board/", {"x": 0, "y": 1}
+        )
+        self.play(self.user2, f"/api/dogs/{self.boss2.id}/move/", {"x": 1, "y": 1})
+
+        response = self.client.get(f"/api/games/{self.game.id}/?since=0")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["full"])
+        self.assertEqual(response.data["since"], 0)
+        self.assertEqual(response.data["game"]["version"], 2)
+        self.assertEqual(response.data["game"]["current_turn"], self.player1.id)
+        self.assertIsNone(response.data["winner"])
+        self.assertEqual(
+            [
+                (d["id"], d["x_position"], d["y_position"])
+                for d in response.data["dogs"]
+            ],
+            [(self.boss2.id, 1, 1), (self.hand1.id, 0, 1)],
+        )
+
+        response = self.client.get(f"/api/games/{self.game.id}/?since=1")
+        self.assertEqual([d["id"] for d in response.data["dogs"]], [self.boss2.id])
+
+        response = self.client.get(f"/api/games/{self.game.id}/?since=2")
+        self.assertEqual(response.data["dogs"], [])
+
+    def test_updates_recorded_out_of_order_are_kept(self):
+        """
+        別々のリクエストが前後して記録した更新イベントがどちらも残り、差分に使われること
+        """
+        self.hand1.x_position, self.hand1.y_position = 0, 1
+        self.boss2.x_position, self.boss2.y_position = 1, 1
+        self.game.version = 2
+        record_game_update(game_update_event(self.game, [self.boss2]))
+        self.game.version = 1
+        record_game_update(game_update_event(self.game, [self.hand1]))
+        Game.objects.filter(pk=self.game.pk).update(version=2)
+
+        response = self.client.get(f"/api/games/{self.game.id}/?since=0")
+        self.assertFalse(response.data["full"])
+        self.assertEqual(
+            [d["id"] for d in response.data["dogs"]], [self.boss2.id, self.hand1.id]
+        )
+
+    def test_since_too_far_back_returns_full_state(self):
+        """
+        GAME_UPDATE_HISTORY より前から遡る場合は全体を返すこと
+        """
+        self.play(
+            self.user1, f"/api/dogs/{self.hand1.id}/place_on_board/", {"x": 0, "y": 1}
+        )
+        with mock.patch.object(game_state, "GAME_UPDATE_HISTORY", 0):
+            response = self.client.get(f"/api/games/{self.game.id}/?since=0")
+        self.assertTrue(response.data["full"])
+
+    def test_since_falls_back_to_full_state(self):
+        """
+        差分の履歴がない場合は全体を返すこと
+        """
+        self.play(
+            self.user1, f"/api/dogs/{self.hand1.id}/place_on_board/", {"x": 0, "y": 1}
+        )
+        cache.clear()
+
+        response = self.client.get(f"/api/games/{self.game.id}/?since=0")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["full"])
+        self.assertEqual(len(response.data["board_dogs"]), 3)
+
+        response = self.client.get(f"/api/games/{self.game.id}/?since=abc")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkGameStateTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+
+    def create_games(self, count):
+        """
+        packed board のない（Dog の行から読み込む）ゲームを作成する。
+        """
+        games = []
+        for _ in range(count):
+            game = Game.objects.create(
+                player1=self.player1, player2=self.player2, current_turn=self.player1
+            )
+            Dog.objects.create(
+                game=game,
+                player=self.player1,
+                dog_type=self.dog_type_boss,
+                x_position=0,
+                y_position=0,
+                is_in_hand=False,
+            )
+            Dog.objects.create(
+                game=game,
+                player=self.player2,
+                dog_type=self.dog_type_yaiba,
+                is_in_hand=True,
+            )
+            games.append(game)
+        return games
+
+    def test_states_match_retrieve(self):
+        """
+        指定した順に各ゲームの詳細情報を返し、存在しないゲームは not_found に返すこと
+        """
+        games = self.create_games(3)
+        ids = [games[2].id, 9999, games[0].id, games[2].id]
+        response = self.client.get("/api/games/bulk/", {"ids": ",".join(map(str, ids))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["not_found"], [9999])
+        self.assertEqual(
+            [state["game"]["id"] for state in response.data["games"]],
+            [games[2].id, games[0].id],
+        )
+        for state in response.data["games"]:
+            retrieved = self.client.get(f"/api/games/{state['game']['id']}/").data
+            self.assertEqual({**retrieved, "winner": None}, state)
+
+    def test_post_accepts_list(self):
+        """
+        POST では ID のリストで指定できること
+        """
+        games = self.create_games(2)
+        response = self.client.post(
+            "/api/games/bulk/", {"ids": [game.id for game in games]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["games"]), 2)
+        self.assertEqual(len(response.data["games"][0]["board_dogs"]), 1)
+        self.assertEqual(len(response.data["games"][0]["player2_hand_dogs"]), 1)
+
+    def test_query_count_does_not_grow(self):
+        """
+        ゲームの数によらず、ゲームと犬をそれぞれ1回のクエリで読み込むこと
+        """
+        for count in (2, 8):
+            cache.clear()
+            ids = ",".join(str(game.id) for game in self.create_games(count))
+            with self.assertNumQueries(2):
+                response = self.client.get("/api/games/bulk/", {"ids": ids})
+            self.assertEqual(len(response.data["games"]), count)
+            # キャッシュ済みのゲームは Dog テーブルを読まないこと
+            with self.assertNumQueries(1):
+                self.client.get("/api/games/bulk/", {"ids": ids})
+
+    @override_settings(BULK_GAME_STATE_MAX_GAMES=2)
+    def test_invalid_requests(self):
+        """
+        不正なリクエストには 400 を返すこと
+        """
+        for method, data in [
+            ("get", {}),
+            ("get", {"ids": "1,abc"}),
+            ("get", {"ids": "1,2,3"}),
+            ("post", {"ids": {"id": 1}}),
+        ]:
+            with self.subTest(method=method, data=data):
+                response = getattr(self.client, method)(
+                    "/api/games/bulk/",
+                    data,
+                    format="json" if method == "post" else None,
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
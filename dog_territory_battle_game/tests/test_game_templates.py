@@ -0,0 +1,173 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game.models import Dog, DogType, Game
+from dog_territory_battle_game.views.board_snapshot import BoardSnapshot
+from dog_territory_battle_game.views.game_templates import create_games
+
+
+class GameTemplateTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.game.current_turn = self.player2
+        self.game.save()
+        Dog.objects.create(
+            game=self.game,
+            player=self.player1,
+            dog_type=self.dog_type_aniki,
+            x_position=3,
+            y_position=3,
+            is_in_hand=False,
+        )
+
+    def test_reset_game_uses_template(self):
+        """
+        リセットでテンプレートの初期配置になり、テンプレートにある犬は行が残ること
+        """
+        aniki = Dog.objects.get(game=self.game)
+        response = self.client.post(f"/api/games/{self.game.id}/reset_game/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.current_turn, self.player1)
+        dogs = Dog.objects.filter(game=self.game).select_related("dog_type")
+        self.assertEqual(
+            sorted(
+                (dog.player_id, dog.dog_type.name, dog.x_position, dog.y_position)
+                for dog in dogs
+                if not dog.is_in_hand
+            ),
+            [(self.player1.id, "ボス犬", 1, 1), (self.player2.id, "ボス犬", 2, 1)],
+        )
+        self.assertEqual(sum(dog.is_in_hand for dog in dogs), 4)
+        self.assertTrue(Dog.objects.get(pk=aniki.pk).is_in_hand)
+
+        # packed board が Dog の行と一致すること
+        packed = BoardSnapshot.load(self.game)
+        self.game.board = None
+        self.assertEqual(packed.positions, BoardSnapshot.load(self.game).positions)
+
+    def test_reset_keeps_template_of_game(self):
+        """
+        犬の組み合わせがテンプレートと一致するゲームは、そのテンプレートの初期配置に戻ること
+        """
+        game = create_games([(self.player1, self.player2)], "full")[0]
+        dog_ids = set(Dog.objects.filter(game=game).values_list("id", flat=True))
+        boss = Dog.objects.get(game=game, player=self.player1, dog_type__name="ボス犬")
+        Dog.objects.filter(pk=boss.pk).update(x_position=0, y_position=0)
+
+        response = self.client.post(f"/api/games/{game.id}/reset_game/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(Dog.objects.filter(game=game).values_list("id", flat=True)), dog_ids
+        )
+        boss.refresh_from_db()
+        self.assertEqual((boss.x_position, boss.y_position), (1, 0))
+
+    def test_bulk_create_games(self):
+        """
+        組ごとにゲームが作成され、全てのゲームにテンプレートの犬が並ぶこと
+        """
+        pairings = [{"player1": self.player1.id, "player2": self.player2.id}] * 3
+        response = self.client.post(
+            "/api/games/bulk_create/",
+            {"games": pairings, "template": "standard"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["games"]), 3)
+
+        for game in Game.objects.filter(id__in=response.data["games"]):
+            self.assertEqual(game.current_turn, self.player1)
+            self.assertIsNotNone(game.board)
+            self.assertEqual(Dog.objects.filter(game=game).count(), 6)
+            self.assertEqual(len(BoardSnapshot.load(game).board_dogs()), 2)
+
+    def test_bulk_create_query_count_does_not_grow(self):
+        """
+        作成するゲームの数によらずクエリ数が一定であること
+        """
+        pairing = {"player1": self.player1.id, "player2": self.player2.id}
+        query_counts = []
+        for count in (2, 10):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    "/api/games/bulk_create/",
+                    {"games": [pairing] * count},
+                    format="json",
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    @override_settings(BULK_CREATE_MAX_GAMES=2)
+    def test_bulk_create_rejects_invalid_requests(self):
+        """
+        不正なリクエストではゲームを作成しないこと
+        """
+        pairing = {"player1": self.player1.id, "player2": self.player2.id}
+        invalid_requests = [
+            {},
+            {"games": [pairing] * 3},
+            {"games": [pairing], "template": "unknown"},
+            {"games": [pairing], "template": {"name": "standard"}},
+            {"games": [pairing], "template": ["standard"]},
+            {"games": [{"player1": self.player1.id}]},
+            {"games": [{"player1": self.player1.id, "player2": 9999}]},
+        ]
+        for data in invalid_requests:
+            with self.subTest(data=data):
+                response = self.client.post(
+                    "/api/games/bulk_create/", data, format="json"
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Game.objects.count(), 1)
+
+    def test_missing_dog_types_are_rejected(self):
+        """
+        テンプレートの犬種が登録されていない場合は、ゲームを作成・リセットせずに 400 を返すこと
+        """
+        DogType.objects.filter(name="ハジケ犬").delete()
+        pairing = {"player1": self.player1.id, "player2": self.player2.id}
+        response = self.client.post(
+            "/api/games/bulk_create/", {"games": [pairing]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Game.objects.count(), 1)
+
+        response = self.client.post(f"/api/games/{self.game.id}/reset_game/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Dog.objects.filter(game=self.game).count(), 1)
+
+
+class SetupDataTest(TestCase):
+    def test_setup_data_creates_full_template(self):
+        """
+        setup_data で全ての犬種を持つゲームが作成されること
+        """
+        call_command("setup_data", stdout=StringIO())
+        game = Game.objects.get()
+        self.assertEqual(Dog.objects.filter(game=game).count(), 12)
+        self.assertEqual(len(BoardSnapshot.load(game).board_dogs()), 2)
+
+    def test_default_template_uses_seeded_dog_types(self):
+        """
+        setup_data で登録した犬種だけで、既定のテンプレートのゲームを作成できること
+        """
+        call_command("setup_data", stdout=StringIO())
+        player = Game.objects.get().player1
+        client = APIClient()
+        client.force_authenticate(user=player.user)
+        response = client.post(
+            "/api/games/bulk_create/",
+            {"games": [{"player1": player.id, "player2": player.id}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
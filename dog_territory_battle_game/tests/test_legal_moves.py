@@ -0,0 +1,159 @@
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game.models import Dog
+from dog_territory_battle_game.views.board_snapshot import (
+    BoardSnapshot,
+    generate_legal_moves,
+    simulate,
+)
+
+
+class LegalMovesTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.game.current_turn = self.player1
+        self.game.save()
+
+        # (プレイヤー, 犬種, 座標) 座標が None の場合は手札
+        layout = [
+            (self.player1, self.dog_type_boss, (1, 1)),
+            (self.player2, self.dog_type_boss, (2, 1)),
+            (self.player1, self.dog_type_totsu, (1, 2)),
+            (self.player1, self.dog_type_hajike, (0, 0)),
+            (self.player1, self.dog_type_mame, (2, 2)),
+            (self.player2, self.dog_type_yaiba, (3, 1)),
+            (self.player2, self.dog_type_aniki, (2, 0)),
+            (self.player1, self.dog_type_yaiba, None),
+            (self.player1, self.dog_type_aniki, None),
+            (self.player2, self.dog_type_totsu, None),
+        ]
+        for player, dog_type, position in layout:
+            Dog.objects.create(
+                game=self.game,
+                player=player,
+                dog_type=dog_type,
+                x_position=position[0] if position else None,
+                y_position=position[1] if position else None,
+                is_in_hand=position is None,
+            )
+
+    def brute_force_targets(self, board, dog):
+        """
+        move / place_on_board と同じ判定を広い範囲の全マスに対して行う。
+        """
+        targets = []
+        for x in range(-8, 9):
+            for y in range(-8, 9):
+                if not board.is_within_field_after_move(x, y, dog.id):
+                    continue
+                if board.is_square_occupied(x, y):
+                    continue
+                if board.positions[dog.id] is None:
+                    if not board.is_adjacent_after_place(x, y, dog):
+                        continue
+                else:
+                    if not board.is_valid_move(dog, x, y):
+                        continue
+                    if not board.is_adjacent_after_move(x, y, dog.id):
+                        continue
+                if simulate(board, dog, (x, y)).self_loss:
+                    continue
+                targets.append((x, y))
+        return sorted(targets)
+
+    def test_generator_matches_move_validation(self):
+        """
+        生成された合法手が move / place_on_board の判定結果と一致すること
+        """
+        board = BoardSnapshot.load(self.game)
+        with self.assertNumQueries(0):
+            moves, placements, removals = generate_legal_moves(board, self.player1.id)
+
+        own_dogs = [d for d in board.dogs.values() if d.player_id == self.player1.id]
+        self.assertEqual(set(moves) | set(placements), {d.id for d in own_dogs})
+        self.assertEqual(
+            removals,
+            sorted(
+                d.id
+                for d in own_dogs
+                if d.id in moves
+                and d.dog_type.name != "ボス犬"
+                and board.can_remove_dog(d)
+            ),
+        )
+        for dog in own_dogs:
+            with self.subTest(dog=str(dog)):
+                generated = moves.get(dog.id, placements.get(dog.id))
+                self.assertEqual(generated, self.brute_force_targets(board, dog))
+
+    def test_legal_moves_endpoint(self):
+        """
+        legal_moves エンドポイントが現在のターンのプレイヤーの合法手を返し、その手が実際に指せること
+        """
+        response = self.client.get(f"/api/games/{self.game.id}/legal_moves/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["current_turn"], self.player1.id)
+
+        dog_id, targets = next(
+            (dog_id, targets)
+            for dog_id, targets in response.data["moves"].items()
+            if targets
+        )
+        response = self.client.post(f"/api/dogs/{dog_id}/move/", targets[0])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_no_legal_moves_after_game_is_won(self):
+        """
+        勝者が決まったゲームでは合法手がないこと
+        """
+        self.game.winner = self.player2
+        self.game.save()
+        response = self.client.get(f"/api/games/{self.game.id}/legal_moves/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["moves"], {})
+        self.assertEqual(response.data["placements"], {})
+
+
+class ConnectivityTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.game.current_turn = self.player1
+        self.game.save()
+
+        # 左右2つのまとまりを (1,2) のコマだけがつないでいる
+        self.dogs = {}
+        for x, y in [(0, 0), (0, 1), (2, 0), (2, 1), (1, 2)]:
+            self.dogs[(x, y)] = Dog.objects.create(
+                game=self.game,
+                player=self.player1,
+                dog_type=self.dog_type_yaiba,
+                x_position=x,
+                y_position=y,
+                is_in_hand=False,
+            )
+
+    def test_bridge_dog_cannot_be_removed(self):
+        """
+        全てのコマに隣接するコマが残っていても、つながりが分断される場合は手札に戻せないこと
+        """
+        board = BoardSnapshot.load(self.game)
+        self.assertIn((1, 2), board.connectivity.articulation_points)
+        self.assertEqual(
+            board.liftable_dog_ids(self.player1.id),
+            sorted(self.dogs[sq].id for sq in [(0, 0), (2, 0)]),
+        )
+
+        response = self.client.post(
+            f"/api/dogs/{self.dogs[(1, 2)].id}/remove_from_board/"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            f"/api/dogs/{self.dogs[(0, 0)].id}/remove_from_board/"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
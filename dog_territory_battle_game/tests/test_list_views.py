@@ -0,0 +1,135 @@
+from django.contrib.auth.models import User
+from django.utils import timezone
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game.models import Dog, Game, Player
+
+
+class ListViewTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.player3 = Player.objects.create(user=User.objects.create(username="p3"))
+        self.other_game = Game.objects.create(
+            player1=self.player2,
+            player2=self.player3,
+            current_turn=self.player2,
+            winner=self.player3,
+        )
+        for index in range(5):
+            Dog.objects.create(
+                game=self.game,
+                player=self.player1 if index % 2 == 0 else self.player2,
+                dog_type=self.dog_type_aniki,
+                x_position=index if index < 2 else None,
+                y_position=0 if index < 2 else None,
+                is_in_hand=index >= 2,
+            )
+        Dog.objects.create(
+            game=self.other_game,
+            player=self.player3,
+            dog_type=self.dog_type_mame,
+            is_in_hand=True,
+        )
+
+    def list_ids(self, url, **params):
+        """
+        カーソルをたどって全てのページの id を返す。
+        """
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        ids = []
+        while True:
+            ids += [item["id"] for item in response.data["results"]]
+            if response.data["next"] is None:
+                return ids
+            response = self.client.get(response.data["next"])
+
+    def test_dogs_are_paginated_by_id(self):
+        """
+        犬の一覧が id 順に page_size 件ずつ返り、カーソルで全件をたどれること
+        """
+        response = self.client.get("/api/dogs/", {"page_size": 2})
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNone(response.data["previous"])
+        self.assertNotIn("count", response.data)
+        self.assertEqual(
+            self.list_ids("/api/dogs/", page_size=2),
+            list(Dog.objects.order_by("id").values_list("id", flat=True)),
+        )
+
+    def test_dog_filters(self):
+        """
+        ゲーム・プレイヤー・手札・進行中のゲームで犬を絞り込めること
+        """
+        cases = [
+            ({"game": self.other_game.id}, Dog.objects.filter(game=self.other_game)),
+            ({"player": self.player1.id}, Dog.objects.filter(player=self.player1)),
+            (
+                {"game": self.game.id, "in_hand": "false"},
+                Dog.objects.filter(game=self.game, is_in_hand=False),
+            ),
+            ({"active": "true"}, Dog.objects.filter(game=self.game)),
+            ({"active": "false"}, Dog.objects.filter(game=self.other_game)),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(
+                    self.list_ids("/api/dogs/", page_size=2, **params),
+                    list(expected.order_by("id").values_list("id", flat=True)),
+                )
+
+    def test_game_filters(self):
+        """
+        参加しているプレイヤーと進行中かどうかでゲームを絞り込めること
+        """
+        self.assertEqual(
+            self.list_ids("/api/games/", player=self.player1.id), [self.game.id]
+        )
+        self.assertEqual(
+            self.list_ids("/api/games/", player=self.player2.id),
+            [self.game.id, self.other_game.id],
+        )
+        self.assertEqual(self.list_ids("/api/games/", active="true"), [self.game.id])
+        self.assertEqual(
+            self.list_ids("/api/games/", active="false"), [self.other_game.id]
+        )
+
+    def test_player_filters(self):
+        """
+        削除されていないプレイヤーに絞り込めること
+        """
+        self.player3.deleted_at = timezone.now()
+        self.player3.save()
+        self.assertEqual(
+            self.list_ids("/api/players/", active="true"),
+            [self.player1.id, self.player2.id],
+        )
+        self.assertEqual(
+            self.list_ids("/api/players/", active="false"), [self.player3.id]
+        )
+
+    def test_invalid_filters_are_rejected(self):
+        """
+        不正なフィルターの値は 400 を返すこと
+        """
+        for url, params in [
+            ("/api/dogs/", {"game": "abc"}),
+            ("/api/dogs/", {"in_hand": "maybe"}),
+            ("/api/games/", {"active": "yes"}),
+            ("/api/players/", {"active": "2"}),
+        ]:
+            with self.subTest(url=url, params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_query_count_does_not_grow(self):
+        """
+        1ページのクエリ数が件数によらず一定であること（関連の読み込みで増えないこと）
+        """
+        with self.assertNumQueries(1):
+            self.client.get("/api/dogs/", {"page_size": 10})
+        with self.assertNumQueries(1):
+            self.client.get("/api/games/", {"page_size": 10})
@@ -0,0 +1,131 @@
+import time
+from django.core.cache import cache
+from django.test import override_settings
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game.models import Dog
+from dog_territory_battle_game.views import mcts
+from dog_territory_battle_game.views.analysis_jobs import analysis_key
+from dog_territory_battle_game.views.board_snapshot import BoardSnapshot
+from dog_territory_battle_game.views.board_snapshot import legal_move_list
+
+
+class MonteCarloAnalysisTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.game.current_turn = self.player1
+        self.game.save()
+
+        # player1 がアニキ犬を (1, 2) に動かすと player2 のボス犬が囲まれる局面
+        layout = [
+            (self.player2, self.dog_type_boss, (1, 1)),
+            (self.player1, self.dog_type_boss, (2, 0)),
+            (self.player1, self.dog_type_yaiba, (1, 0)),
+            (self.player1, self.dog_type_yaiba, (0, 1)),
+            (self.player1, self.dog_type_yaiba, (2, 1)),
+            (self.player1, self.dog_type_aniki, (0, 2)),
+            (self.player2, self.dog_type_mame, None),
+        ]
+        self.dogs = [
+            Dog.objects.create(
+                game=self.game,
+                player=player,
+                dog_type=dog_type,
+                x_position=position[0] if position else None,
+                y_position=position[1] if position else None,
+                is_in_hand=position is None,
+            )
+            for player, dog_type, position in layout
+        ]
+        self.aniki = self.dogs[5]
+
+    def test_winning_move_has_full_win_rate(self):
+        """
+        勝ちの手の勝率が 1 になり、全ての候補手が一度は訪問されること
+        """
+        board = BoardSnapshot.load(self.game)
+        candidates = legal_move_list(board, self.player1.id)
+        with self.assertNumQueries(0):
+            results = mcts.analyze(
+                board, self.player1.id, len(candidates) * 3, workers=1, seed=0
+            )
+
+        stats = {move: (visits, win_rate) for move, visits, win_rate in results}
+        self.assertEqual(set(stats), set(candidates))
+        self.assertEqual(
+            sum(visits for visits, _ in stats.values()), len(candidates) * 3
+        )
+        self.assertEqual(stats[(self.aniki.id, (1, 2))][1], 1.0)
+
+    def test_process_pool_merges_root_statistics(self):
+        """
+        プロセスプールで分けたプレイアウトの訪問回数が合計されること
+        """
+        board = BoardSnapshot.load(self.game)
+        results = mcts.analyze(board, self.player1.id, 40, workers=2, seed=0)
+        self.assertEqual(sum(visits for _, visits, _ in results), 40)
+
+    def wait_for_analysis(self, url):
+        """
+        解析のジョブが終わるまで状態を取得する
+        """
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            response = self.client.get(url)
+            if response.status_code != status.HTTP_202_ACCEPTED:
+                return response
+            time.sleep(0.05)
+        self.fail("Analysis did not finish.")
+
+    @override_settings(ANALYSIS_WORKERS=1)
+    def test_analyze_endpoint(self):
+        """
+        解析アクションは探索を待たずに 202 を返し、ジョブの状態から訪問回数と勝率を取得できること
+        """
+        response = self.client.post(
+            f"/api/games/{self.game.id}/analyze/", {"playouts": 30}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "running")
+        url = response["Location"]
+        self.assertEqual(
+            url, f"/api/games/{self.game.id}/analysis/{response.data['job']}/"
+        )
+
+        response = self.wait_for_analysis(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "done")
+        self.assertEqual(response.data["playouts"], 30)
+        self.assertEqual(sum(m["visits"] for m in response.data["moves"]), 30)
+        for move in response.data["moves"]:
+            self.assertEqual(set(move), {"dog", "x", "y", "visits", "win_rate"})
+
+    def test_unknown_analysis_job(self):
+        """
+        存在しないジョブや、別のゲームのジョブは 404 になること
+        """
+        response = self.client.get(f"/api/games/{self.game.id}/analysis/abc123/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        cache.set(
+            analysis_key("abc123"),
+            {"job": "abc123", "game": self.game.id + 1, "status": "done"},
+        )
+        response = self.client.get(f"/api/games/{self.game.id}/analysis/abc123/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_analyze_endpoint_rejects_invalid_playouts(self):
+        """
+        プレイアウト数が範囲外の場合はエラーになること
+        """
+        for playouts in (0, "abc", 10**9):
+            with self.subTest(playouts=playouts):
+                response = self.client.post(
+                    f"/api/games/{self.game.id}/analyze/",
+                    {"playouts": playouts},
+                    format="json",
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,128 @@
+from django.test import override_settings
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game.models import Dog, GameMove, GameSnapshot
+from dog_territory_battle_game.views.move_log import (
+    current_positions,
+    load_board_from_log,
+    materialize_positions,
+)
+
+
+@override_settings(GAME_SNAPSHOT_INTERVAL=2)
+class MoveLogTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.game.current_turn = self.player1
+        self.game.save()
+
+        self.boss1, self.boss2, self.hand1 = self.create_start_position()
+        self.initial_positions = current_positions(self.game)
+
+    def play_moves(self):
+        operations = [
+            (
+                self.user1,
+                f"/api/dogs/{self.hand1.id}/place_on_board/",
+                {"x": 0, "y": 1},
+            ),
+            (self.user2, f"/api/dogs/{self.boss2.id}/move/", {"x": 1, "y": 1}),
+            (self.user1, f"/api/dogs/{self.hand1.id}/remove_from_board/", {}),
+        ]
+        for user, url, data in operations:
+            self.client.force_authenticate(user=user)
+            response = self.client.post(url, data)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.game.refresh_from_db()
+
+    def test_moves_are_logged_in_order(self):
+        """
+        確定した手が ply の順に記録され、ゲームのバージョンと一致すること
+        """
+        self.play_moves()
+        moves = list(GameMove.objects.filter(game=self.game).order_by("ply"))
+        self.assertEqual([move.ply for move in moves], [1, 2, 3])
+        self.assertEqual(self.game.version, 3)
+        self.assertEqual(
+            [move.kind for move in moves],
+            [GameMove.KIND_PLACE, GameMove.KIND_MOVE, GameMove.KIND_REMOVE],
+        )
+        self.assertEqual(
+            (moves[1].from_x, moves[1].from_y, moves[1].to_x, moves[1].to_y),
+            (1, 0, 1, 1),
+        )
+        self.assertEqual(moves[1].player, self.player2)
+
+    def test_snapshots_are_taken_every_interval(self):
+        """
+        最初の手の前の位置と、GAME_SNAPSHOT_INTERVAL 手ごとの位置がスナップショットになること
+        """
+        self.play_moves()
+        snapshots = GameSnapshot.objects.filter(game=self.game).order_by("ply")
+        self.assertEqual([snapshot.ply for snapshot in snapshots], [0, 2])
+        self.assertEqual(materialize_positions(self.game, 0), self.initial_positions)
+
+    def test_replayed_positions_match_dog_table(self):
+        """
+        ログから復元した位置が、各手の後の Dog テーブルの位置と一致すること
+        """
+        self.play_moves()
+        self.assertEqual(materialize_positions(self.game), current_positions(self.game))
+
+        positions = materialize_positions(self.game, 2)
+        self.assertEqual(positions[self.hand1.id], (0, 1))
+        self.assertEqual(positions[self.boss2.id], (1, 1))
+
+        board = load_board_from_log(self.game, 1)
+        self.assertEqual(board.positions[self.hand1.id], (0, 1))
+        self.assertEqual(board.positions[self.boss2.id], (1, 0))
+
+    def test_reset_is_logged(self):
+        """
+        リセットがログに記録され、リセット後の位置から復元できること
+        """
+        self.play_moves()
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.post(f"/api/games/{self.game.id}/reset_game/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.game.refresh_from_db()
+        reset = GameMove.objects.filter(game=self.game).order_by("-ply").first()
+        self.assertEqual((reset.ply, reset.kind), (4, GameMove.KIND_RESET))
+        self.assertEqual(materialize_positions(self.game), current_positions(self.game))
+
+    def test_reset_keeps_logged_dogs(self):
+        """
+        リセットの後も、リセット前の手の犬と位置をログから復元できること
+        """
+        self.play_moves()
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.post(f"/api/games/{self.game.id}/reset_game/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # テンプレートにあるボス犬は行が残り、初期位置に戻ること
+        boss1 = Dog.objects.get(pk=self.boss1.pk)
+        self.assertEqual((boss1.x_position, boss1.y_position), (1, 1))
+        response = self.client.get(f"/api/games/{self.game.id}/moves/?ply=2")
+        self.assertEqual(
+            [(move["ply"], move["dog"]) for move in response.data["moves"]],
+            [(1, self.hand1.id), (2, self.boss2.id)],
+        )
+        self.assertEqual(response.data["positions"][self.hand1.id], {"x": 0, "y": 1})
+        self.assertEqual(response.data["positions"][self.boss2.id], {"x": 1, "y": 1})
+
+    def test_moves_action_replays_log(self):
+        """
+        手のログと、指定した手の後の位置を返すこと
+        """
+        self.play_moves()
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.get(f"/api/games/{self.game.id}/moves/?ply=1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([move["ply"] for move in response.data["moves"]], [1])
+        self.assertEqual(response.data["positions"][self.hand1.id], {"x": 0, "y": 1})
+
+        response = self.client.get(f"/api/games/{self.game.id}/moves/?ply=abc")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,131 @@
+import struct
+from django.test import SimpleTestCase
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game.engine.packed import PackedDog, pack_board, unpack_board
+from dog_territory_battle_game.models import Dog
+from dog_territory_battle_game.views.board_snapshot import BoardSnapshot
+
+
+class PackBoardTest(SimpleTestCase):
+    dogs = [
+        PackedDog(1, 1, 0, (0, 0)),
+        PackedDog(2, 1, 1, (-1, 3)),
+        PackedDog(3, 2, 0, None),
+        PackedDog(4, 2, 0, None),
+        PackedDog(5, 3, 1, None),
+    ]
+
+    def test_round_trip(self):
+        """
+        バイト列に変換して戻すと、犬のID順に同じ局面になること
+        """
+        self.assertEqual(unpack_board(pack_board(self.dogs[::-1])), self.dogs)
+
+    def test_hand_dogs_are_grouped_by_type(self):
+        """
+        手札の犬はプレイヤー・犬種ごとにまとめて保存されること
+        """
+        # ヘッダー3バイト、ボード上のコマ2匹×15バイト、手札2グループ×4バイト、犬のID3つ×8バイト
+        self.assertEqual(len(pack_board(self.dogs)), 3 + 2 * 15 + 2 * 4 + 3 * 8)
+
+    def test_large_dog_ids(self):
+        """
+        32ビットを超える犬のIDも変換して戻せること
+        """
+        dogs = [PackedDog(2**40, 1, 0, (0, 0)), PackedDog(2**40 + 1, 2, 1, None)]
+        self.assertEqual(unpack_board(pack_board(dogs)), dogs)
+
+    def test_reads_version_1(self):
+        """
+        犬のIDが32ビットだったバージョン 1 のバイト列も読み込めること
+        """
+        data = (
+            struct.pack("<BBB", 1, 1, 1)
+            + struct.pack("<IHBhh", 1, 1, 0, 0, 0)
+            + struct.pack("<BHB", 1, 2, 1)
+            + struct.pack("<I", 2)
+        )
+        self.assertEqual(
+            unpack_board(data),
+            [PackedDog(1, 1, 0, (0, 0)), PackedDog(2, 2, 1, None)],
+        )
+
+
+class PackedBoardTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.game.current_turn = self.player1
+        self.game.save()
+
+        self.boss1 = Dog.objects.create(
+            game=self.game,
+            player=self.player1,
+            dog_type=self.dog_type_boss,
+            x_position=0,
+            y_position=0,
+            is_in_hand=False,
+        )
+        self.boss2 = Dog.objects.create(
+            game=self.game,
+            player=self.player2,
+            dog_type=self.dog_type_boss,
+            x_position=1,
+            y_position=0,
+            is_in_hand=False,
+        )
+        self.hand_dog = Dog.objects.create(
+            game=self.game,
+            player=self.player1,
+            dog_type=self.dog_type_yaiba,
+            is_in_hand=True,
+        )
+
+    def place_hand_dog(self):
+        response = self.client.post(
+            f"/api/dogs/{self.hand_dog.id}/place_on_board/", {"x": 0, "y": 1}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.game.refresh_from_db()
+
+    def test_move_writes_packed_board(self):
+        """
+        手が確定するとゲームに packed board が保存され、Dog の行と一致すること
+        """
+        self.assertIsNone(self.game.board)
+        self.place_hand_dog()
+        self.assertIsNotNone(self.game.board)
+
+        self.game.board = None
+        expected = BoardSnapshot.load(self.game)
+        self.game.refresh_from_db()
+        board = BoardSnapshot.load(self.game)
+        self.assertEqual(board.positions, expected.positions)
+        self.assertEqual(board.positions[self.hand_dog.id], (0, 1))
+        self.assertEqual(board.position_key(), expected.position_key())
+
+    def test_load_from_packed_board_does_not_read_dogs(self):
+        """
+        packed board があるゲームは Dog の行を読まずに局面を読み込むこと
+        """
+        self.place_hand_dog()
+        with self.assertNumQueries(0):
+            board = BoardSnapshot.load(self.game)
+        self.assertEqual(board.get_dog(self.boss2.id).dog_type.name, "ボス犬")
+
+    def test_direct_dog_change_clears_packed_board(self):
+        """
+        Dog の行を直接変更すると packed board が空に戻り、Dog の行から読み込むこと
+        """
+        self.place_hand_dog()
+        self.boss2.x_position = 1
+        self.boss2.y_position = 1
+        self.boss2.save()
+
+        self.game.refresh_from_db()
+        self.assertIsNone(self.game.board)
+        board = BoardSnapshot.load(self.game)
+        self.assertEqual(board.positions[self.boss2.id], (1, 1))
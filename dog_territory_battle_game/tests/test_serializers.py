@@ -0,0 +1,90 @@
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from dog_territory_battle_game.models import Dog, Game
+from dog_territory_battle_game.serializers import (
+    DOG_VALUES_FIELDS,
+    GAME_VALUES_FIELDS,
+    DogSerializer,
+    GameSerializer,
+    serialize_dog,
+    serialize_dogs,
+    serialize_games,
+)
+
+
+class FastSerializerTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dog_on_board = Dog.objects.create(
+            game=self.game,
+            player=self.player1,
+            dog_type=self.dog_type_boss,
+            x_position=0,
+            y_position=-1,
+            is_in_hand=False,
+        )
+        self.dog_in_hand = Dog.objects.create(
+            game=self.game,
+            player=self.player2,
+            dog_type=self.dog_type_mame,
+            is_in_hand=True,
+        )
+        self.finished_game = Game.objects.create(
+            player1=self.player1,
+            player2=self.player2,
+            current_turn=self.player2,
+            winner=self.player1,
+            deleted_at=timezone.now(),
+        )
+
+    def test_dogs_match_model_serializer(self):
+        """
+        values() の行から作った犬の辞書が DogSerializer の出力と一致すること
+        """
+        dogs = Dog.objects.order_by("id")
+        expected = [dict(item) for item in DogSerializer(dogs, many=True).data]
+        self.assertEqual(serialize_dogs(dogs.values(*DOG_VALUES_FIELDS)), expected)
+        self.assertEqual(
+            [serialize_dog(dog) for dog in dogs.select_related("dog_type")], expected
+        )
+
+    def test_games_match_model_serializer(self):
+        """
+        values() の行から作ったゲームの辞書が GameSerializer の出力と一致すること
+        """
+        games = Game.objects.order_by("id")
+        expected = [dict(item) for item in GameSerializer(games, many=True).data]
+        self.assertEqual(serialize_games(games.values(*GAME_VALUES_FIELDS)), expected)
+
+    def test_list_endpoints_use_fast_serializers(self):
+        """
+        一覧のエンドポイントが ModelSerializer と同じ内容を返すこと
+        """
+        client = APIClient()
+        client.force_authenticate(user=self.user1)
+        response = client.get("/api/dogs/")
+        self.assertEqual(
+            response.json()["results"],
+            [dict(item) for item in DogSerializer(Dog.objects.all(), many=True).data],
+        )
+        response = client.get("/api/games/")
+        self.assertEqual(
+            response.json()["results"],
+            [
+                dict(item)
+                for item in GameSerializer(Game.objects.order_by("id"), many=True).data
+            ],
+        )
+
+    def test_benchmark_command(self):
+        """
+        ベンチマークのコマンドが両方のシリアライズを計測し、出力の一致を確認すること
+        """
+        out = StringIO()
+        call_command("benchmark_serializers", rows=20, repeat=1, stdout=out)
+        self.assertIn("dogs: 20 rows, outputs match.", out.getvalue())
+        self.assertIn("games: 20 rows, outputs match.", out.getvalue())
+        self.assertEqual(Game.objects.count(), 2)
@@ -0,0 +1,150 @@
+import os
+import tempfile
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from .base_test import BaseTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from dog_territory_battle_game.engine.tablebase import (
+    DRAW,
+    LOSS,
+    WIN,
+    Tablebase,
+    TablebaseEntry,
+    retrograde_solve,
+    write_tablebase,
+)
+from dog_territory_battle_game.models import Dog
+from dog_territory_battle_game.views import endgame
+from dog_territory_battle_game.views.board_snapshot import BoardSnapshot
+
+
+class RetrogradeSolveTest(SimpleTestCase):
+    def test_solves_small_graph(self):
+        """
+        終局から後退して勝ち・負けと手数が求まり、循環する局面は決まらないこと
+        """
+        # 0 -> 1 -> 2(終局)、0 -> 3 <-> 4、5 -> 1
+        children = [[1, 3], [2], [], [4], [3], [1]]
+        terminal = [False, False, True, False, False, False]
+        expanded = [True] * 6
+        results = retrograde_solve(children, terminal, expanded)
+        self.assertEqual(results[2], TablebaseEntry(LOSS, 0))
+        self.assertEqual(results[1], TablebaseEntry(WIN, 1))
+        self.assertEqual(results[5], TablebaseEntry(LOSS, 2))
+        self.assertIsNone(results[0])
+        self.assertIsNone(results[3])
+
+    def test_unexpanded_position_is_not_lost(self):
+        """
+        子局面を列挙しきれていない局面は負けと判定しないこと
+        """
+        children = [[1], [2], []]
+        terminal = [False, False, True]
+        results = retrograde_solve(children, terminal, [False, True, True])
+        self.assertIsNone(results[0])
+
+    def test_file_round_trip(self):
+        """
+        書き出したテーブルを mmap で読み込んで同じ結果が引けること（衝突するキーも含む）
+        """
+        entries = {
+            5: TablebaseEntry(WIN, 3),
+            5 + 8: TablebaseEntry(LOSS, 12),
+            5 + 16: TablebaseEntry(DRAW, 0),
+            2**64 - 1: TablebaseEntry(WIN, 1),
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tablebase.bin")
+            write_tablebase(path, entries, metadata={"dog_types": {"1": "ボス犬"}})
+            tablebase = Tablebase(path)
+            for key, entry in entries.items():
+                self.assertEqual(tablebase.probe(key), entry)
+            self.assertIsNone(tablebase.probe(6))
+            self.assertEqual(tablebase.metadata, {"dog_types": {"1": "ボス犬"}})
+            tablebase.close()
+
+
+class EndgameTablebaseTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user1)
+        self.game.current_turn = self.player1
+        self.game.save()
+
+        # player1 がアニキ犬を (1, 2) に動かすと player2 のボス犬が囲まれる局面
+        layout = [
+            (self.player2, self.dog_type_boss, (1, 1)),
+            (self.player1, self.dog_type_boss, (2, 0)),
+            (self.player1, self.dog_type_yaiba, (1, 0)),
+            (self.player1, self.dog_type_yaiba, (0, 1)),
+            (self.player1, self.dog_type_yaiba, (2, 1)),
+            (self.player1, self.dog_type_aniki, (0, 2)),
+        ]
+        self.dogs = [
+            Dog.objects.create(
+                game=self.game,
+                player=player,
+                dog_type=dog_type,
+                x_position=position[0],
+                y_position=position[1],
+                is_in_hand=False,
+            )
+            for player, dog_type, position in layout
+        ]
+        self.aniki = self.dogs[5]
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "tablebase.bin")
+        endgame.get_tablebase.cache_clear()
+        self.addCleanup(endgame.get_tablebase.cache_clear)
+
+    def test_command_builds_tablebase(self):
+        """
+        管理コマンドで作成したテーブルで、開始局面が1手勝ちになること
+        """
+        call_command(
+            "build_tablebase",
+            self.game.id,
+            max_positions=200,
+            output=self.path,
+            stdout=open(os.devnull, "w"),
+        )
+        tablebase = Tablebase(self.path)
+        board = BoardSnapshot.load(self.game)
+        self.assertEqual(
+            endgame.probe(tablebase, board, self.player1.id), TablebaseEntry(WIN, 1)
+        )
+        tablebase.close()
+
+    def test_hint_endpoint(self):
+        """
+        ヒントのアクションが局面と各合法手の勝敗を返すこと
+        """
+        with override_settings(TABLEBASE_PATH=self.path):
+            response = self.client.get(f"/api/games/{self.game.id}/hint/")
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+            board = BoardSnapshot.load(self.game)
+            endgame.build_tablebase(board, self.player1.id, self.path, 200)
+            endgame.get_tablebase.cache_clear()
+            response = self.client.get(f"/api/games/{self.game.id}/hint/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["position"], {"result": "win", "distance": 1})
+        outcomes = {
+            (m["dog"], m["x"], m["y"]): m["outcome"] for m in response.data["moves"]
+        }
+        self.assertEqual(
+            outcomes[(self.aniki.id, 1, 2)], {"result": "win", "distance": 1}
+        )
+
+    def test_mismatched_dog_types_are_ignored(self):
+        """
+        作成時と犬種が異なるテーブルは読み込まないこと
+        """
+        write_tablebase(self.path, {}, metadata={"dog_types": {"999": "ボス犬"}})
+        with override_settings(TABLEBASE_PATH=self.path):
+            self.assertIsNone(endgame.get_tablebase())
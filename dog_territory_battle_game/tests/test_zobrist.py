@@ -0,0 +1,116 @@
+from django.db.models import F
+from django.test import SimpleTestCase
+from .base_test import BaseTestCase
+from dog_territory_battle_game.engine import zobrist
+from dog_territory_battle_game.models import Dog
+from dog_territory_battle_game.views.board_snapshot import BoardSnapshot
+
+
+class CanonicalKeyTest(SimpleTestCase):
+    pieces = [(0, 1, 0, 0), (1, 1, 1, 0), (0, 2, 1, 1)]
+
+    def test_translated_positions_share_key(self):
+        """
+        平行移動した局面は同じ局面キーになること
+        """
+        moved = [(p, t, x + 3, y - 2) for p, t, x, y in self.pieces]
+        self.assertEqual(
+            zobrist.canonical_key(self.pieces, {}, 0),
+            zobrist.canonical_key(moved, {}, 0),
+        )
+
+    def test_mirrored_positions_share_key_only_when_symmetric(self):
+        """
+        鏡映した局面は symmetric が真の場合のみ同じ局面キーになること
+        """
+        mirrored = [(p, t, -x, y) for p, t, x, y in self.pieces]
+        self.assertNotEqual(
+            zobrist.canonical_key(self.pieces, {}, 0),
+            zobrist.canonical_key(mirrored, {}, 0),
+        )
+        self.assertEqual(
+            zobrist.canonical_key(self.pieces, {}, 0, symmetric=True),
+            zobrist.canonical_key(mirrored, {}, 0, symmetric=True),
+        )
+
+    def test_side_and_hands_change_key(self):
+        """
+        手番や手札が異なる局面は異なる局面キーになること
+        """
+        base = zobrist.canonical_key(self.pieces, {}, 0)
+        self.assertNotEqual(base, zobrist.canonical_key(self.pieces, {}, 1))
+        self.assertNotEqual(base, zobrist.canonical_key(self.pieces, {(0, 3): 1}, 0))
+
+
+class BoardSnapshotZobristTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.boss1 = Dog.objects.create(
+            game=self.game,
+            player=self.player1,
+            dog_type=self.dog_type_boss,
+            x_position=0,
+            y_position=0,
+            is_in_hand=False,
+        )
+        Dog.objects.create(
+            game=self.game,
+            player=self.player2,
+            dog_type=self.dog_type_boss,
+            x_position=1,
+            y_position=0,
+            is_in_hand=False,
+        )
+        self.hand_dog = Dog.objects.create(
+            game=self.game,
+            player=self.player1,
+            dog_type=self.dog_type_yaiba,
+            is_in_hand=True,
+        )
+
+    def test_incremental_hash_matches_reloaded_board(self):
+        """
+        差分で更新したハッシュが、同じ局面を読み込み直したハッシュと一致すること
+        """
+        board = BoardSnapshot.load(self.game)
+        initial = board.position_key()
+        hand_dog = board.get_dog(self.hand_dog.id)
+
+        board.put_on_board(hand_dog, 0, 1)
+        board.put_on_board(board.get_dog(self.boss1.id), 1, 1)
+        for dog in board.dogs.values():
+            board.apply_to(dog)
+            dog.save()
+        reloaded = BoardSnapshot.load(self.game)
+        self.assertEqual(board.position_key(), reloaded.position_key())
+        self.assertNotEqual(board.position_key(), initial)
+
+        board.put_on_board(board.get_dog(self.boss1.id), 0, 0)
+        board.return_to_hand(hand_dog)
+        self.assertEqual(board.position_key(), initial)
+
+    def test_copy_does_not_share_hash(self):
+        """
+        コピーしたボードの変更が元のボードのハッシュに影響しないこと
+        """
+        board = BoardSnapshot.load(self.game)
+        key = board.position_key()
+        trial = board.copy()
+        trial.put_on_board(trial.get_dog(self.hand_dog.id), 0, 1)
+        self.assertEqual(board.position_key(), key)
+        self.assertNotEqual(trial.position_key(), key)
+
+    def test_canonical_key_ignores_translation(self):
+        """
+        全てのコマを平行移動しても局面キーが変わらないこと
+        """
+        board = BoardSnapshot.load(self.game)
+        key = board.canonical_key()
+        Dog.objects.filter(game=self.game, is_in_hand=False).update(
+            x_position=F("x_position") + 5, y_position=F("y_position") - 3
+        )
+        self.assertEqual(BoardSnapshot.load(self.game).canonical_key(), key)
+        self.assertNotEqual(
+            board.position_key(self.game.player1_id),
+            board.position_key(self.game.player2_id),
+        )
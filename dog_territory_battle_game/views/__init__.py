@@ -2,5 +2,14 @@ from .dog_views import DogViewSet
 from .player_views import PlayerViewSet
 from .dog_type_views import DogTypeViewSet
 from .game_views import GameViewSet
+from .event_views import game_events
+from .batch_move_views import batch_moves
 
-__all__ = ["DogViewSet", "PlayerViewSet", "DogTypeViewSet", "GameViewSet"]
+__all__ = [
+    "DogViewSet",
+    "PlayerViewSet",
+    "DogTypeViewSet",
+    "GameViewSet",
+    "game_events",
+    "batch_moves",
+]
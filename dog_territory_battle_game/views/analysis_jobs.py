@@ -0,0 +1,52 @@
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from .computer_player import move_to_dict
+from . import mcts
+
+
+def analysis_key(job_id):
+    return f"analysis_job:{job_id}"
+
+
+def start_analysis(game, board, playouts):
+    """
+    現在の手番のプレイヤーの候補手の解析をプロセスプールに投入し、ジョブの情報を返す。
+
+    ジョブの状態と結果は Django のキャッシュに ANALYSIS_RESULT_TIMEOUT 秒だけ保存する。
+    状態は running から、探索が終わると done（moves に結果）か failed になる。
+    """
+    job = {
+        "job": uuid.uuid4().hex,
+        "game": game.id,
+        "current_turn": game.current_turn_id,
+        "playouts": playouts,
+    }
+    key = analysis_key(job["job"])
+    cache.set(key, {**job, "status": "running"}, settings.ANALYSIS_RESULT_TIMEOUT)
+
+    def on_done(results, error):
+        if error is not None:
+            cache.set(
+                key, {**job, "status": "failed"}, settings.ANALYSIS_RESULT_TIMEOUT
+            )
+            return
+        moves = [
+            {**move_to_dict(move), "visits": visits, "win_rate": win_rate}
+            for move, visits, win_rate in results
+        ]
+        cache.set(
+            key,
+            {**job, "status": "done", "moves": moves},
+            settings.ANALYSIS_RESULT_TIMEOUT,
+        )
+
+    mcts.submit_analysis(board, game.current_turn_id, playouts, on_done)
+    return {**job, "status": "running"}
+
+
+def get_analysis(job_id):
+    """
+    解析のジョブの状態（と結果）を返す。存在しないか期限切れの場合は None を返す。
+    """
+    return cache.get(analysis_key(job_id))
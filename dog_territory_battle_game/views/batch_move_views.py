@@ -0,0 +1,257 @@
+import logging
+from collections import defaultdict, namedtuple
+from django.conf import settings
+from django.db import IntegrityError
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from ..models import Game
+from ..serializers import serialize_dog
+from .board_snapshot import BoardSnapshot, load_dogs_for_games
+from .dog_utils import CONFLICT_ERROR, StaleGameError
+from .game_actor import load_board, submit_move
+from .game_state import game_update_event, publish_event, publish_game_update
+from .move_log import MoveBuffer, next_plies, write_pending
+from .move_rules import InvalidMove, check_move, check_place, check_remove, check_turn
+
+logger = logging.getLogger(__name__)
+
+# 一括送信の1件（ゲームのID、犬のID、手の種類、移動先（手札に戻す手は None））
+BatchOperation = namedtuple("BatchOperation", ["game", "dog", "action", "target"])
+
+# 一括送信で指定できる手の種類
+BATCH_ACTIONS = ("move", "place", "remove")
+
+
+@api_view(["POST"])
+def batch_moves(request):
+    """
+    複数のゲームの手をまとめて送信するAPI（自動プレイヤー向け）。
+
+    moves に {game, dog, action, x, y} のリストを指定する（action は move・place・remove）。
+    手は指定した順に、ゲームごとのメモリ上の局面で検証して適用し、検証を通過した手を
+    1つのトランザクションでまとめて保存する。結果は手ごとに同じ順で返す。
+    次の手番がコンピューターのプレイヤーでも、コンピューターの手は指さない。
+    """
+    operations = request.data.get("moves")
+    if not isinstance(operations, list) or not operations:
+        return Response(
+            {"error": "Missing parameters"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(operations) > settings.BATCH_MOVES_MAX:
+        return Response(
+            {"error": f"一度に送信できる手は {settings.BATCH_MOVES_MAX} までです。"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    operations = [parse_operation(operation) for operation in operations]
+    games = Game.objects.in_bulk(
+        {
+            operation.game
+            for operation in operations
+            if isinstance(operation, BatchOperation)
+        }
+    )
+    if settings.GAME_ACTORS_ENABLED:
+        results = play_with_actors(operations, games)
+    else:
+        results = play_in_transaction(operations, games)
+    return Response({"results": results})
+
+
+def failure(status_code, message):
+    return {"success": False, "status": status_code, "error": message}
+
+
+def parse_operation(operation):
+    """
+    一括送信の1件を BatchOperation にする。不正な場合は失敗の結果を返す。
+    """
+    if not isinstance(operation, dict):
+        return failure(status.HTTP_400_BAD_REQUEST, "Invalid parameters")
+    action = operation.get("action")
+    if operation.get("game") is None or operation.get("dog") is None or not action:
+        return failure(status.HTTP_400_BAD_REQUEST, "Missing parameters")
+    if action not in BATCH_ACTIONS:
+        return failure(status.HTTP_400_BAD_REQUEST, "Invalid parameters")
+
+    try:
+        game_id = int(operation["game"])
+        dog_id = int(operation["dog"])
+        target = None
+        if action != "remove":
+            x, y = operation.get("x"), operation.get("y")
+            if x is None or y is None:
+                return failure(status.HTTP_400_BAD_REQUEST, "Missing parameters")
+            target = (int(x), int(y))
+    except (TypeError, ValueError):
+        return failure(status.HTTP_400_BAD_REQUEST, "Invalid parameters")
+    return BatchOperation(game_id, dog_id, action, target)
+
+
+def check_operation(board, dog, operation):
+    """
+    ゲームの局面で1件の手を検証し、CheckedMove を返す。指せない手の場合は InvalidMove を送出する。
+    """
+    if board.game.winner_id is not None:
+        raise InvalidMove("ゲームは既に終了しています。")
+    check_turn(dog)
+    if operation.action == "move":
+        return check_move(board, dog, *operation.target)
+    if operation.action == "place":
+        return check_place(board, dog, *operation.target)
+    return check_remove(board, dog)
+
+
+def play_operations(operations, load, commit):
+    """
+    手を指定した順に検証し、検証を通過した手を commit(dog, checked) に渡す。
+
+    load(game_id) はゲームの現在の局面（ゲームがない場合は None）を返し、
+    commit は手を適用できなかった場合（競合した場合）に False を返すこと。
+    """
+    results = []
+    for operation in operations:
+        if not isinstance(operation, BatchOperation):
+            results.append(operation)
+            continue
+
+        board = load(operation.game)
+        if board is None:
+            results.append(
+                failure(status.HTTP_404_NOT_FOUND, "ゲームが見つかりません。")
+            )
+            continue
+        dog = board.dogs.get(operation.dog)
+        if dog is None:
+            results.append(
+                failure(status.HTTP_404_NOT_FOUND, "ゲームに指定された犬がいません。")
+            )
+            continue
+
+        try:
+            checked = check_operation(board, dog, operation)
+        except InvalidMove as error:
+            results.append(failure(status.HTTP_400_BAD_REQUEST, str(error)))
+            continue
+        if not commit(dog, checked):
+            results.append(failure(status.HTTP_409_CONFLICT, CONFLICT_ERROR))
+            continue
+
+        game = dog.game
+        results.append(
+            {
+                "success": True,
+                "game": game.id,
+                "dog": serialize_dog(dog),
+                "version": game.version,
+                "current_turn": game.current_turn_id,
+                "winner": game.winner_id,
+            }
+        )
+    return results
+
+
+def play_in_transaction(operations, games):
+    """
+    全てのゲームの局面をまとめて読み込み、メモリ上で手を適用してから1つのトランザクションで保存する。
+    """
+    dogs_by_game = load_dogs_for_games(games.values())
+    plies = next_plies(list(games))
+    buffers = {
+        game_id: MoveBuffer(
+            BoardSnapshot(game, dogs_by_game[game_id]),
+            plies[game_id] - 1,
+            game.version,
+        )
+        for game_id, game in games.items()
+    }
+    events = defaultdict(list)
+
+    def load(game_id):
+        buffer = buffers.get(game_id)
+        return buffer.board if buffer is not None else None
+
+    def commit(dog, checked):
+        buffers[dog.game_id].apply(
+            checked.board,
+            dog,
+            checked.kind,
+            checked.origin,
+            checked.target,
+            checked.winner,
+        )
+        events[dog.game_id].append(game_update_event(dog.game, [dog]))
+        return True
+
+    results = play_operations(operations, load, commit)
+    stale = save_buffers(buffers, events)
+    if stale:
+        results = [
+            (
+                failure(status.HTTP_409_CONFLICT, CONFLICT_ERROR)
+                if result["success"] and result["game"] in stale
+                else result
+            )
+            for result in results
+        ]
+    return results
+
+
+def save_buffers(buffers, events):
+    """
+    手を適用したゲームを write_pending でまとめて保存し、保存したゲームの更新イベントを配信する。
+
+    読み込んだ後に他のリクエストで更新されていたゲームは保存せずに除き、残りのゲームを
+    保存し直す。保存できなかったゲームのIDの集合を返す。
+    """
+    writes = {}
+    for game_id, buffer in buffers.items():
+        write = buffer.drain()
+        if write is not None:
+            writes[game_id] = write
+
+    stale = set()
+    while writes:
+        try:
+            write_pending(list(writes.values()))
+        except StaleGameError as error:
+            stale_ids = error.game_ids or set(writes)
+            stale |= stale_ids
+            for game_id in stale_ids:
+                writes.pop(game_id, None)
+            continue
+        except IntegrityError:
+            logger.info("Batched moves conflicted with another move.")
+            return stale | set(writes)
+        break
+
+    for game_id in writes:
+        for event in events[game_id]:
+            publish_event(event)
+    return stale
+
+
+def play_with_actors(operations, games):
+    """
+    GAME_ACTORS_ENABLED の場合は、手を1件ずつゲームのアクターに送る（データベースには書き込まない）。
+    """
+
+    def load(game_id):
+        game = games.get(game_id)
+        return load_board(game) if game is not None else None
+
+    def commit(dog, checked):
+        if not submit_move(
+            checked.board,
+            dog,
+            checked.kind,
+            checked.origin,
+            checked.target,
+            checked.winner,
+        ):
+            return False
+        publish_game_update(dog.game, [dog])
+        return True
+
+    return play_operations(operations, load, commit)
@@ -0,0 +1,641 @@
+import logging
+from collections import namedtuple
+from django.utils import timezone
+from ..dog_types import get_dog_type
+from ..models import Dog
+from ..engine.bitboard import (
+    Bitboard,
+    extend_field,
+    field_of,
+    is_surrounded,
+    neighbours8,
+    square_bit,
+)
+from ..engine.connectivity import ConnectivityIndex
+from ..engine import zobrist
+from ..engine.movement import ADJACENT_OFFSETS, FIELD_MAX_SIZE
+from ..engine.packed import PackedDog, pack_board, unpack_board
+from .dog_utils import DOG_POSITION_FIELDS, is_valid_move
+
+logger = logging.getLogger(__name__)
+
+# コマがないボードでは枠線によるブロックは発生しない
+NO_EDGES = {"up": False, "down": False, "left": False, "right": False}
+
+# evaluate_terminal の結果（ボス犬が囲まれているか、枠線によるブロック、勝者のID）
+TerminalState = namedtuple("TerminalState", ["surrounded", "edges", "winner_id"])
+
+# simulate の結果（移動後のボード、自滅するか、勝者）
+SimulationResult = namedtuple("SimulationResult", ["board", "self_loss", "winner"])
+
+
+class BoardSnapshot:
+    """
+    ゲーム内の全コマを一度のクエリで読み込み、メモリ上でルール判定を行うクラス。
+
+    ボード上のコマは座標をキーにした占有マップ（occupancy）で管理し、
+    移動・配置・手札に戻す操作のルール判定をデータベースに問い合わせずに行う。
+    囲み・つながりの判定は占有マップから作るビットボード（bitboard）で行う。
+    コマの位置は positions に保持し、Dog インスタンスは apply_to で更新するまで変更しない。
+    """
+
+    def __init__(self, game, dogs):
+        self.game = game
+        self.dogs = {}
+        self.bosses = []
+        self.positions = {}
+        self.occupancy = {}
+        self._bitboard = None
+        self._connectivity = None
+        self.zobrist = zobrist.ZobristHash()
+        for dog in sorted(dogs, key=lambda d: d.id):
+            # dog.game の参照で追加のクエリが発生しないようにする
+            dog.game = game
+            self.dogs[dog.id] = dog
+            if dog.dog_type.is_boss:
+                self.bosses.append(dog)
+            if dog.is_in_hand:
+                self.positions[dog.id] = None
+                self.zobrist.add_to_hand(
+                    self.player_index(dog.player_id), dog.dog_type_id
+                )
+            else:
+                self.positions[dog.id] = (dog.x_position, dog.y_position)
+                self.occupancy[(dog.x_position, dog.y_position)] = dog
+                self._toggle_zobrist(dog, dog.x_position, dog.y_position)
+
+    @classmethod
+    def load(cls, game):
+        """
+        ゲームの全コマを読み込む（load_dogs を参照）。
+        """
+        return cls(game, load_dogs(game))
+
+    def copy(self):
+        """
+        位置情報だけを複製したスナップショットを返す。Dog インスタンスは共有する。
+        """
+        board = BoardSnapshot.__new__(BoardSnapshot)
+        board.game = self.game
+        board.dogs = self.dogs
+        board.bosses = self.bosses
+        board.positions = dict(self.positions)
+        board.occupancy = dict(self.occupancy)
+        board._bitboard = self._bitboard
+        board._connectivity = self._connectivity
+        board.zobrist = self.zobrist.copy()
+        return board
+
+    def get_dog(self, dog_id):
+        """
+        スナップショット内の犬を取得する。
+        """
+        return self.dogs[dog_id]
+
+    def board_dogs(self):
+        """
+        ボード上の全コマを返す。
+        """
+        return list(self.occupancy.values())
+
+    def calculate_field_bounds(self):
+        """
+        ボード上の全コマのフィールド範囲（最小・最大座標）と幅・高さを計算する。
+        """
+        if not self.occupancy:
+            return {
+                "min_x": None,
+                "max_x": None,
+                "min_y": None,
+                "max_y": None,
+                "width": 0,
+                "height": 0,
+            }
+
+        xs = [x for x, _ in self.occupancy]
+        ys = [y for _, y in self.occupancy]
+        min_x, max_x = min(xs), max(xs)
+        min_y, max_y = min(ys), max(ys)
+
+        return {
+            "min_x": min_x,
+            "max_x": max_x,
+            "min_y": min_y,
+            "max_y": max_y,
+            "width": max_x - min_x + 1,
+            "height": max_y - min_y + 1,
+        }
+
+    def is_within_field_after_move(self, new_x, new_y, moving_dog_id):
+        """
+        移動後のフィールドサイズが許容範囲内かを判定する。
+        """
+        xs = [new_x]
+        ys = [new_y]
+        for (x, y), dog in self.occupancy.items():
+            if dog.id != moving_dog_id:
+                xs.append(x)
+                ys.append(y)
+
+        width = max(xs) - min(xs) + 1
+        height = max(ys) - min(ys) + 1
+
+        logger.debug(f"Field dimensions after move: width={width}, height={height}")
+
+        return (width <= FIELD_MAX_SIZE) and (height <= FIELD_MAX_SIZE)
+
+    def is_valid_move(self, dog, new_x, new_y):
+        """
+        指定した移動先のマスが犬種の動きに従っているかを判定する。
+        """
+        return is_valid_move(dog, new_x, new_y)
+
+    def is_square_occupied(self, x, y):
+        """
+        指定されたマスに既にコマが存在するかを判定する。
+        """
+        return (x, y) in self.occupancy
+
+    def is_adjacent_to_other_dogs(
+        self, x, y, exclude_dog_id=None, own_pieces_only=False, player_id=None
+    ):
+        """
+        指定した座標が他のコマと隣接しているかを判定する。
+        """
+        for dx, dy in ADJACENT_OFFSETS:
+            dog = self.occupancy.get((x + dx, y + dy))
+            if dog is None or dog.id == exclude_dog_id:
+                continue
+            if own_pieces_only and player_id and dog.player_id != player_id:
+                continue
+            logger.debug(f"Adjacent dog found at ({x + dx}, {y + dy})")
+            return True
+        logger.debug("No adjacent dogs found.")
+        return False
+
+    def is_adjacent_after_move(self, x, y, exclude_dog_id):
+        """
+        移動後のマスが他のコマと隣接しているかを判定する。
+        """
+        return self.is_adjacent_to_other_dogs(x, y, exclude_dog_id=exclude_dog_id)
+
+    def is_adjacent_after_place(self, x, y, dog):
+        """
+        配置後のマスが自分の他のコマと隣接しているかを判定する。
+        """
+        return self.is_adjacent_to_other_dogs(
+            x, y, own_pieces_only=True, player_id=dog.player_id
+        )
+
+    def evaluate_terminal(self):
+        """
+        ボードのビットボードで、両プレイヤーのボス犬が囲まれているか、
+        枠線によるブロックの有無、勝者をまとめて判定する。
+
+        Returns:
+            TerminalState: surrounded はプレイヤーIDをキーにボス犬が囲まれているかを持つ辞書、
+            edges は方向ごとにフィールドの外側をブロックとみなすかを持つ辞書、
+            winner_id は勝者のプレイヤーID（いなければ None）。
+        """
+        if not self.occupancy:
+            return TerminalState(surrounded={}, edges=dict(NO_EDGES), winner_id=None)
+
+        bitboard = self.bitboard
+        game = self.game
+        surrounded = {}
+        winner_id = None
+        for boss in self.bosses:
+            position = self.positions[boss.id]
+            if position is None:
+                continue
+            boss_surrounded = bitboard.is_surrounded(bitboard.bit_at(*position))
+            surrounded[boss.player_id] = boss_surrounded
+            if boss_surrounded and winner_id is None:
+                if boss.player_id == game.player1_id:
+                    winner_id = game.player2_id
+                else:
+                    winner_id = game.player1_id
+
+        logger.debug(f"Terminal state: surrounded={surrounded}, winner={winner_id}")
+        return TerminalState(
+            surrounded=surrounded,
+            edges=self._edge_blocking(bitboard),
+            winner_id=winner_id,
+        )
+
+    def is_square_surrounded(self, x, y):
+        """
+        指定したマスが上下左右を囲まれているかを判定する（自分のコマも含む）。
+        """
+        if not self.occupancy:
+            return False
+        bit = self.bitboard.bit_at(x, y)
+        return bool(bit) and self.bitboard.is_surrounded(bit)
+
+    def count_blocked_sides(self, x, y):
+        """
+        指定したマス（フィールド範囲内）の上下左右のうち、コマまたは枠線でブロックされている方向の数を返す。
+        """
+        if not self.occupancy:
+            return 0
+        bit = self.bitboard.bit_at(x, y)
+        return self.bitboard.blocked_sides(bit) if bit else 0
+
+    @staticmethod
+    def _edge_blocking(bitboard):
+        """
+        フィールドが最大サイズに達している方向は、枠線の外側をブロックとみなす。
+        """
+        full_width = bitboard.width >= FIELD_MAX_SIZE
+        full_height = bitboard.height >= FIELD_MAX_SIZE
+        return {
+            "up": full_height,
+            "down": full_height,
+            "left": full_width,
+            "right": full_width,
+        }
+
+    def get_player(self, player_id):
+        """
+        プレイヤーIDに対応するゲームのプレイヤーを返す。
+        """
+        if player_id == self.game.player1_id:
+            return self.game.player1
+        return self.game.player2
+
+    def opponent_id(self, player_id):
+        """
+        指定したプレイヤーの対戦相手のIDを返す。
+        """
+        if player_id == self.game.player1_id:
+            return self.game.player2_id
+        return self.game.player1_id
+
+    def would_cause_self_loss(self, player):
+        """
+        プレイヤーのボス犬が囲まれているかをチェックする。
+        """
+        return self.evaluate_terminal().surrounded.get(player.id, False)
+
+    def check_winner(self):
+        """
+        ボス犬が囲まれているかをチェックし、勝者を返す。
+        勝者の保存は declare_winner で行う。
+        """
+        winner_id = self.evaluate_terminal().winner_id
+        if winner_id is None:
+            return None
+        return self.get_player(winner_id)
+
+    @property
+    def bitboard(self):
+        """
+        ボード上のコマのビットボード。ボードが変更されるまで作り直さない。
+        """
+        if self._bitboard is None:
+            self._bitboard = Bitboard.from_pieces(self.pieces())
+        return self._bitboard
+
+    @property
+    def connectivity(self):
+        """
+        ボード上のコマのつながりと関節点。ボードが変更されるまで再計算しない。
+        """
+        if self._connectivity is None:
+            self._connectivity = ConnectivityIndex(self.bitboard)
+        return self._connectivity
+
+    def can_remove_dog(self, dog):
+        """
+        コマを手札に戻した後に、他のコマが孤立したりつながりが分断されたりしないかをチェックする。
+        """
+        position = self.positions[dog.id]
+        if position is None:
+            return False
+        return self.connectivity.can_lift(position)
+
+    def liftable_dog_ids(self, player_id):
+        """
+        指定したプレイヤーが手札に戻せる犬（ボス犬を除く）のIDをまとめて返す。
+        """
+        return sorted(
+            self.occupancy[square].id
+            for square in self.connectivity.liftable_squares()
+            if self.occupancy[square].player_id == player_id
+            and not self.occupancy[square].dog_type.is_boss
+        )
+
+    def put_on_board(self, dog, x, y):
+        """
+        メモリ上でコマを指定した座標に置く（移動・配置の両方に使用）。
+        """
+        position = self.positions[dog.id]
+        if position is not None:
+            del self.occupancy[position]
+            self._toggle_zobrist(dog, *position)
+        else:
+            self.zobrist.remove_from_hand(
+                self.player_index(dog.player_id), dog.dog_type_id
+            )
+        self.positions[dog.id] = (x, y)
+        self.occupancy[(x, y)] = dog
+        self._toggle_zobrist(dog, x, y)
+        self._bitboard = None
+        self._connectivity = None
+
+    def return_to_hand(self, dog):
+        """
+        メモリ上でコマをボードから手札に戻す。
+        """
+        position = self.positions[dog.id]
+        if position is None:
+            return
+        del self.occupancy[position]
+        self._toggle_zobrist(dog, *position)
+        self.zobrist.add_to_hand(self.player_index(dog.player_id), dog.dog_type_id)
+        self.positions[dog.id] = None
+        self._bitboard = None
+        self._connectivity = None
+
+    def apply_to(self, dog):
+        """
+        スナップショット上の位置を Dog インスタンスに反映する（保存は行わない）。
+        """
+        position = self.positions[dog.id]
+        if position is None:
+            dog.x_position = None
+            dog.y_position = None
+            dog.is_in_hand = True
+        else:
+            dog.x_position, dog.y_position = position
+            dog.is_in_hand = False
+
+    def save_dog(self, dog):
+        """
+        スナップショット上の位置を Dog の行に保存し、ゲームの packed board を更新する。
+
+        Dog の行はシグナルを発生させない QuerySet.update で保存する。
+        ゲームの行（packed board を含む）は手番の更新時に保存すること。
+        """
+        self.apply_to(dog)
+        dog.updated_at = timezone.now()
+        Dog.objects.filter(pk=dog.pk).update(
+            **{field: getattr(dog, field) for field in DOG_POSITION_FIELDS}
+        )
+        self.game.board = self.pack()
+
+    def pack(self):
+        """
+        全てのコマの位置を engine.packed の形式のバイト列にする。
+        """
+        return pack_board(
+            [
+                PackedDog(
+                    dog.id,
+                    dog.dog_type_id,
+                    self.player_index(dog.player_id),
+                    self.positions[dog.id],
+                )
+                for dog in self.dogs.values()
+            ]
+        )
+
+    def player_index(self, player_id):
+        """
+        プレイヤーIDをエンジンで使うプレイヤー番号（player1 は 0、player2 は 1）に変換する。
+        """
+        return 0 if player_id == self.game.player1_id else 1
+
+    def _toggle_zobrist(self, dog, x, y):
+        self.zobrist.toggle_piece(
+            self.player_index(dog.player_id), dog.dog_type_id, x, y
+        )
+
+    def pieces(self):
+        """
+        ボード上のコマを (プレイヤー番号, 犬種ID, x, y) のタプルで返す。
+        """
+        return [
+            (self.player_index(dog.player_id), dog.dog_type_id, x, y)
+            for (x, y), dog in self.occupancy.items()
+        ]
+
+    def position_key(self, side_player_id=None):
+        """
+        局面の Zobrist ハッシュを返す。手番は side_player_id（省略時はゲームの現在の手番）。
+        コマの移動に合わせて差分で更新しているため、ボードを走査しない。
+        """
+        if side_player_id is None:
+            side_player_id = self.game.current_turn_id
+        return self.zobrist.key(self.player_index(side_player_id))
+
+    def canonical_key(self, side_player_id=None, symmetric=False):
+        """
+        フィールド範囲の左上を原点にそろえた局面キーを返す。
+        symmetric が真の場合は鏡映・回転で同じになる局面も同じキーになる。
+        """
+        if side_player_id is None:
+            side_player_id = self.game.current_turn_id
+        return zobrist.canonical_key(
+            self.pieces(),
+            self.zobrist.hands,
+            self.player_index(side_player_id),
+            symmetric=symmetric,
+        )
+
+
+def load_dogs(game):
+    """
+    ゲームの全ての犬を犬のID順に読み込む。犬種はプロセスで共有している DogType を使う。
+
+    ゲームに packed board がある場合は Dog の行を読まずに、packed board から
+    Dog インスタンスを組み立てる。ない場合は Dog の行を読み込む。
+    """
+    if not game.board:
+        dogs = list(Dog.objects.filter(game=game).order_by("id"))
+        for dog in dogs:
+            dog.dog_type = get_dog_type(dog.dog_type_id)
+        return dogs
+    return unpack_dogs(game)
+
+
+def load_dogs_for_games(games):
+    """
+    複数のゲームの犬を読み込み、ゲームのIDをキーにした犬のリスト（犬のID順）を返す。
+
+    packed board があるゲームは Dog の行を読まない。ないゲームの犬は1回のクエリで読み込み、
+    ゲームごとに振り分ける。
+    """
+    dogs_by_game = {}
+    unpacked = {}
+    for game in games:
+        if game.board:
+            dogs_by_game[game.id] = unpack_dogs(game)
+        else:
+            dogs_by_game[game.id] = []
+            unpacked[game.id] = game
+    if unpacked:
+        for dog in Dog.objects.filter(game__in=list(unpacked)).order_by("game", "id"):
+            dog.game = unpacked[dog.game_id]
+            dog.dog_type = get_dog_type(dog.dog_type_id)
+            dogs_by_game[dog.game_id].append(dog)
+    return dogs_by_game
+
+
+def unpack_dogs(game):
+    """
+    ゲームの packed board から Dog インスタンスを組み立てる（Dog の行は読まない）。
+    """
+    player_ids = (game.player1_id, game.player2_id)
+    dogs = []
+    for dog in unpack_board(game.board):
+        x, y = dog.position or (None, None)
+        dogs.append(
+            Dog(
+                id=dog.id,
+                game=game,
+                player_id=player_ids[dog.player],
+                dog_type=get_dog_type(dog.dog_type_id),
+                x_position=x,
+                y_position=y,
+                is_in_hand=dog.position is None,
+            )
+        )
+    return dogs
+
+
+def simulate(board, dog, target):
+    """
+    ボードのコピー上でコマを target の座標に置き、自滅と勝敗を判定する。
+    target が None の場合はコマを手札に戻した結果を判定する。
+    元のボードと Dog インスタンスは変更せず、データベースへの書き込みも行わない。
+
+    Returns:
+        SimulationResult: 移動後のボード、自分のボス犬が囲まれるか、勝者（いなければ None）。
+    """
+    trial = board.copy()
+    if target is None:
+        trial.return_to_hand(dog)
+    else:
+        trial.put_on_board(dog, target[0], target[1])
+
+    state = trial.evaluate_terminal()
+    self_loss = state.surrounded.get(dog.player_id, False)
+    winner = None
+    if not self_loss and state.winner_id is not None:
+        winner = trial.get_player(state.winner_id)
+    return SimulationResult(board=trial, self_loss=self_loss, winner=winner)
+
+
+def generate_legal_moves(board, player_id):
+    """
+    指定したプレイヤーの合法な移動と配置をボードの1回の走査ですべて列挙する。
+    移動先の候補は犬種ごとの移動オフセット表から求め、move / place_on_board と同じ判定を行う。
+
+    Returns:
+        tuple: (moves, placements, removals)。moves と placements は犬のIDをキーに、
+        移動先の座標 (x, y) のリストを持つ辞書。removals は手札に戻せる犬のIDのリスト。
+    """
+    moves = {}
+    placements = {}
+    if board.game.winner_id is not None:
+        return moves, placements, []
+
+    placement_targets = None
+    for dog in board.dogs.values():
+        if dog.player_id != player_id:
+            continue
+        position = board.positions[dog.id]
+        if position is None:
+            # 配置先は犬種に依存しないため、手札の犬すべてで使い回す
+            if placement_targets is None:
+                placement_targets = _legal_placement_targets(board, dog)
+            placements[dog.id] = placement_targets
+        else:
+            moves[dog.id] = _legal_move_targets(board, dog, position)
+    return moves, placements, board.liftable_dog_ids(player_id)
+
+
+def legal_move_list(board, player_id):
+    """
+    指定したプレイヤーの合法手を (犬のID, 移動先の座標) のリストで返す。
+    手札に戻す手は移動先を None とし、移動・配置・手札に戻す手の順に並べる。
+    """
+    moves, placements, removals = generate_legal_moves(board, player_id)
+    move_list = [
+        (dog_id, target)
+        for targets_by_dog in (moves, placements)
+        for dog_id, targets in sorted(targets_by_dog.items())
+        for target in targets
+    ]
+    move_list.extend((dog_id, None) for dog_id in removals)
+    return move_list
+
+
+def _legal_move_targets(board, dog, position):
+    """
+    ボード上のコマの合法な移動先を列挙する。
+    移動するコマ以外のコマのビットボードに移動先を加え、フィールドの大きさ・隣接・自滅を判定する。
+    """
+    others = field_of(square for square in board.occupancy if square != position)
+    if not others.mask:
+        return []
+
+    targets = []
+    for dx, dy in dog.dog_type.move_offsets:
+        target = (position[0] + dx, position[1] + dy)
+        if target in board.occupancy:
+            continue
+        field = extend_field(others, *target)
+        if field is None:
+            continue
+        bit = square_bit(target[0] - field.origin_x, target[1] - field.origin_y)
+        if not neighbours8(bit) & field.mask:
+            continue
+        if _causes_self_loss(board, dog, target, field):
+            continue
+        targets.append(target)
+    return sorted(targets)
+
+
+def _legal_placement_targets(board, dog):
+    """
+    手札のコマの合法な配置先を列挙する。配置先は自分のコマに隣接する空きマスに限られる。
+    """
+    candidates = set()
+    for (x, y), other_dog in board.occupancy.items():
+        if other_dog.player_id != dog.player_id:
+            continue
+        for dx, dy in ADJACENT_OFFSETS:
+            target = (x + dx, y + dy)
+            if target not in board.occupancy:
+                candidates.add(target)
+
+    occupied = board.bitboard.field()
+    targets = []
+    for target in sorted(candidates):
+        field = extend_field(occupied, *target)
+        if field is None:
+            continue
+        if _causes_self_loss(board, dog, target, field):
+            continue
+        targets.append(target)
+    return targets
+
+
+def _causes_self_loss(board, dog, target, field):
+    """
+    コマを target に置いたときに自分のボス犬が囲まれるかを判定する。
+    field は target に置いた後のボード上のコマの Field（ボードの複製は作らない）。
+    """
+    surrounded = False
+    for boss in board.bosses:
+        if boss.player_id != dog.player_id:
+            continue
+        position = target if boss.id == dog.id else board.positions[boss.id]
+        if position is None:
+            continue
+        bit = square_bit(position[0] - field.origin_x, position[1] - field.origin_y)
+        # evaluate_terminal と同じく、同じプレイヤーのボス犬は最後の犬の判定を使う
+        surrounded = is_surrounded(field.mask, bit, field.width, field.height)
+    return surrounded
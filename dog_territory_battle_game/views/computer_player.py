@@ -0,0 +1,235 @@
+import logging
+import time
+from collections import namedtuple
+from django.conf import settings
+from ..engine.tablebase import WIN, LOSS
+from ..models import GameMove
+from .board_snapshot import legal_move_list, simulate
+from .endgame import get_tablebase, probe
+from .game_state import publish_game_update
+from .game_actor import load_board, submit_move
+
+logger = logging.getLogger(__name__)
+
+# 勝ちの評価値。早く勝てる手ほど大きくなるように手数を引く
+WIN_SCORE = 10000
+
+# 置換表のエントリの種類（評価値が正確な値か、下限か、上限か）
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# 置換表のエントリ（探索深さ、評価値、種類、最善手）
+TableEntry = namedtuple("TableEntry", ["depth", "score", "flag", "move"])
+
+# choose_move の結果（最善手、評価値、探索を終えた深さ、探索した局面数）
+SearchResult = namedtuple("SearchResult", ["move", "score", "depth", "nodes"])
+
+
+class SearchTimeout(Exception):
+    """
+    思考時間を使い切ったときに探索を打ち切るための例外。
+    """
+
+
+class AlphaBetaSearch:
+    """
+    BoardSnapshot 上で反復深化のアルファベータ探索を行うクラス。
+
+    手は (犬のID, 移動先の座標) のタプルで表し、手札に戻す手は移動先を None とする。
+    局面は Zobrist ハッシュ（手番を含む）をキーにした置換表に記録し、
+    前の深さの探索で見つけた最善手から先に探索する。データベースには問い合わせない。
+    エンドゲームテーブルがあれば、勝敗が記録された局面はそれ以上探索しない。
+    """
+
+    def __init__(self, time_budget, max_depth, clock=time.monotonic, tablebase=None):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.clock = clock
+        self.tablebase = tablebase
+        self.table = {}
+        self.nodes = 0
+        self._deadline = None
+
+    def choose_move(self, board, player_id):
+        """
+        思考時間内に探索を終えた最も深い探索での最善手を返す。合法手がない場合は手が None になる。
+        """
+        self._deadline = self.clock() + self.time_budget
+        opponent_id = board.opponent_id(player_id)
+        moves = self._ordered_moves(board, player_id, None)
+        if not moves:
+            return SearchResult(move=None, score=0, depth=0, nodes=0)
+
+        result = SearchResult(move=moves[0], score=0, depth=0, nodes=0)
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self._search_root(board, player_id, opponent_id, depth)
+            except SearchTimeout:
+                break
+            result = SearchResult(move=move, score=score, depth=depth, nodes=self.nodes)
+            logger.debug(f"Search depth={depth} move={move} score={score}")
+            if abs(score) > WIN_SCORE // 2:
+                # 勝ち負けが確定した場合はそれ以上深く読まない
+                break
+        return result
+
+    def _search_root(self, board, player_id, opponent_id, depth):
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        entry = self.table.get(board.position_key(player_id))
+        best_move = None
+        for move in self._ordered_moves(board, player_id, entry and entry.move):
+            score = self._score_move(
+                board, move, player_id, opponent_id, depth, alpha, beta, 0
+            )
+            if best_move is None or score > alpha:
+                alpha = score
+                best_move = move
+        self.table[board.position_key(player_id)] = TableEntry(
+            depth, alpha, EXACT, best_move
+        )
+        return alpha, best_move
+
+    def _negamax(self, board, player_id, opponent_id, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.clock() > self._deadline:
+            raise SearchTimeout()
+
+        key = board.position_key(player_id)
+        entry = self.table.get(key)
+        if entry is not None and entry.depth >= depth:
+            if entry.flag == EXACT:
+                return entry.score
+            if entry.flag == LOWER_BOUND:
+                alpha = max(alpha, entry.score)
+            else:
+                beta = min(beta, entry.score)
+            if alpha >= beta:
+                return entry.score
+
+        if self.tablebase is not None:
+            known = probe(self.tablebase, board, player_id)
+            if known is not None and known.result == WIN:
+                return WIN_SCORE - ply - known.distance
+            if known is not None and known.result == LOSS:
+                return -(WIN_SCORE - ply - known.distance)
+
+        if depth == 0:
+            return self.evaluate(board, player_id, opponent_id)
+
+        moves = self._ordered_moves(board, player_id, entry and entry.move)
+        if not moves:
+            # 合法手がない局面は引き分けとみなす
+            return 0
+
+        original_alpha = alpha
+        best_score = -WIN_SCORE - 1
+        best_move = None
+        for move in moves:
+            score = self._score_move(
+                board, move, player_id, opponent_id, depth, alpha, beta, ply
+            )
+            if score > best_score:
+                best_score = score
+                best_move = move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.table[key] = TableEntry(depth, best_score, flag, best_move)
+        return best_score
+
+    def _score_move(self, board, move, player_id, opponent_id, depth, alpha, beta, ply):
+        dog_id, target = move
+        result = simulate(board, board.get_dog(dog_id), target)
+        if result.winner is not None:
+            return WIN_SCORE - ply
+        return -self._negamax(
+            result.board, opponent_id, player_id, depth - 1, -beta, -alpha, ply + 1
+        )
+
+    def _ordered_moves(self, board, player_id, first_move):
+        """
+        合法手を列挙し、置換表の最善手があれば先頭に並べる。
+        """
+        ordered = legal_move_list(board, player_id)
+        if first_move in ordered:
+            ordered.remove(first_move)
+            ordered.insert(0, first_move)
+        return ordered
+
+    @staticmethod
+    def evaluate(board, player_id, opponent_id):
+        """
+        手番のプレイヤーから見た局面の評価値。
+        相手のボス犬がブロックされている方向が多く、自分のボス犬が少ないほど高い。
+        """
+        score = 0
+        for dog in board.board_dogs():
+            if not dog.dog_type.is_boss:
+                continue
+            blocked = board.count_blocked_sides(*board.positions[dog.id])
+            if dog.player_id == opponent_id:
+                score += blocked
+            elif dog.player_id == player_id:
+                score -= blocked
+        return score
+
+
+def choose_move(board, player_id, time_budget=None, max_depth=None):
+    """
+    指定したプレイヤーの最善手を反復深化のアルファベータ探索で求める。
+    """
+    if time_budget is None:
+        time_budget = settings.COMPUTER_PLAYER_TIME_BUDGET
+    if max_depth is None:
+        max_depth = settings.COMPUTER_PLAYER_MAX_DEPTH
+    search = AlphaBetaSearch(time_budget, max_depth, tablebase=get_tablebase())
+    return search.choose_move(board, player_id)
+
+
+def play_computer_turn(game, time_budget=None):
+    """
+    現在の手番のコンピューターの手を求めてデータベースに保存し、手番を進める。
+
+    Returns:
+        tuple: (犬のID, 移動先の座標) の手。移動先が None の場合は手札に戻した手。
+        合法手がない場合や、同時に確定した別の手と競合した場合は None を返し、ゲームは変更しない。
+    """
+    board = load_board(game)
+    result = choose_move(board, game.current_turn_id, time_budget)
+    if result.move is None:
+        return None
+
+    dog_id, target = result.move
+    dog = board.get_dog(dog_id)
+    outcome = simulate(board, dog, target)
+    origin = board.positions[dog_id]
+    if target is None:
+        kind = GameMove.KIND_REMOVE
+    elif origin is None:
+        kind = GameMove.KIND_PLACE
+    else:
+        kind = GameMove.KIND_MOVE
+    if not submit_move(outcome.board, dog, kind, origin, target, outcome.winner):
+        return None
+
+    logger.debug(
+        f"Computer move: dog={dog_id} target={target} "
+        f"depth={result.depth} nodes={result.nodes}"
+    )
+    publish_game_update(dog.game, [dog])
+    return result.move
+
+
+def move_to_dict(move):
+    """
+    手をレスポンス用の辞書に変換する。手札に戻す手は座標を None とする。
+    """
+    dog_id, target = move
+    x, y = target if target is not None else (None, None)
+    return {"dog": dog_id, "x": x, "y": y}
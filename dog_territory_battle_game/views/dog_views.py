@@ -2,25 +2,19 @@ import logging
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from ..models import Dog
-from ..serializers import DogSerializer
-from .dog_utils import (
-    update_current_turn,
-    get_new_coordinates,
-    is_within_field_after_move,
-    is_valid_move,
-    is_square_occupied,
-    is_adjacent_after_move,
-    is_adjacent_after_place,
-    would_cause_self_loss,
-    check_winner,
-    declare_winner,
-    can_remove_dog,
-    save_original_position,
-    save_original_state,
-    restore_original_position,
-    restore_original_state,
+from ..models import ACTIVE_GAME, Dog, Game, Player
+from ..serializers import (
+    DOG_VALUES_FIELDS,
+    DogSerializer,
+    serialize_dog,
+    serialize_dogs,
 )
+from .computer_player import move_to_dict, play_computer_turn
+from .game_state import publish_game_update
+from .game_actor import load_board, submit_move
+from .dog_utils import CONFLICT_ERROR, get_new_coordinates
+from .move_rules import InvalidMove, check_move, check_place, check_remove, check_turn
+from .pagination import IdCursorPagination, bool_param, int_param
 
 logger = logging.getLogger(__name__)
 
@@ -28,88 +22,130 @@ logger = logging.getLogger(__name__)
 class DogViewSet(viewsets.ModelViewSet):
     """
     犬のCRUD操作を提供するViewSet。
+    一覧は id 順のカーソルページネーションで返し、?game=、?player=、?in_hand=、
+    ?active=（進行中のゲームの犬）で絞り込む。
     """
 
     queryset = Dog.objects.all()
     serializer_class = DogSerializer
-
-    def is_player_turn_func(self, dog):
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+
+        game_id = int_param(self.request, "game")
+        if game_id is not None:
+            queryset = queryset.filter(game_id=game_id)
+        player_id = int_param(self.request, "player")
+        if player_id is not None:
+            queryset = queryset.filter(player_id=player_id)
+        in_hand = bool_param(self.request, "in_hand")
+        if in_hand is not None:
+            queryset = queryset.filter(is_in_hand=in_hand)
+        active = bool_param(self.request, "active")
+        if active is not None:
+            active_games = Game.objects.filter(ACTIVE_GAME).values("id")
+            if active:
+                queryset = queryset.filter(game__in=active_games)
+            else:
+                queryset = queryset.exclude(game__in=active_games)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
         """
-        現在のターンが指定されたプレイヤーのターンかを判定する。
+        犬の一覧を values() の行から直接組み立てて返す（DogSerializer と同じ形）。
         """
-        return dog.game.current_turn == dog.player
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset.values(*DOG_VALUES_FIELDS))
+        return self.get_paginated_response(serialize_dogs(page))
 
-    @action(detail=True, methods=["post"], url_path="move", url_name="move")
-    def move(self, request, pk=None):
+    def get_board(self):
         """
-        犬を新しい位置に移動するアクション。
+        操作対象の犬とそのゲームのボードスナップショットを取得する。
         """
         dog = self.get_object()
-        if not self.is_player_turn_func(dog):
-            return Response(
-                {"error": "まだあなたのターンではありません！"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        new_x, new_y, error_response = get_new_coordinates(request)
-        if error_response:
-            return error_response
+        board = load_board(dog.game)
+        return board.get_dog(dog.id), board
 
-        if not is_within_field_after_move(dog.game, new_x, new_y, dog.id):
-            return Response(
-                {"error": "フィールドのサイズを超えるため移動できません。"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if not is_valid_move(dog, new_x, new_y):
-            return Response(
-                {"error": "この犬種では無効な移動です。"}, status=status.HTTP_400_BAD_REQUEST
-            )
+    def invalid_move_response(self, error):
+        """
+        ルール上指せない手のレスポンス。
+        """
+        return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if is_square_occupied(dog.game, new_x, new_y):
-            return Response(
-                {"error": "そのマスには既にコマがあります。"}, status=status.HTTP_400_BAD_REQUEST
-            )
+    def conflict_response(self):
+        """
+        他の手が同時に確定したため、手を保存できなかった場合のレスポンス。
+        """
+        return Response({"error": CONFLICT_ERROR}, status=status.HTTP_409_CONFLICT)
 
-        if not is_adjacent_after_move(dog.game, new_x, new_y, dog.id):
+    def commit(self, dog, checked):
+        """
+        検証を通過した手を確定し、レスポンスを返す。
+        """
+        if not submit_move(
+            checked.board,
+            dog,
+            checked.kind,
+            checked.origin,
+            checked.target,
+            checked.winner,
+        ):
+            return self.conflict_response()
+
+        if checked.winner:
+            publish_game_update(dog.game, [dog])
             return Response(
-                {"error": "他のコマと隣接していない場所には移動できません。"},
-                status=status.HTTP_400_BAD_REQUEST,
+                {
+                    "success": True,
+                    "dog": serialize_dog(dog),
+                    "winner": checked.winner.user.username,
+                }
             )
 
-        original_position = save_original_position(dog)
+        return self.finish_turn(dog, {"success": True, "dog": serialize_dog(dog)})
 
-        # 犬の位置を更新
-        dog.x_position = new_x
-        dog.y_position = new_y
-        dog.is_in_hand = False
-        dog.save()
+    def finish_turn(self, dog, data):
+        """
+        確定した手を配信し、次の手番がコンピューターの場合はその手も指してレスポンスに加える。
+        """
+        game = dog.game
+        data["current_turn"] = game.current_turn_id
+        publish_game_update(game, [dog])
+        if not Player.objects.filter(id=game.current_turn_id, is_bot=True).exists():
+            return Response(data)
+
+        computer_move = play_computer_turn(game)
+        if computer_move is not None:
+            data["computer_move"] = move_to_dict(computer_move)
+        if game.winner_id is not None:
+            data["winner"] = game.winner.user.username
+        data["current_turn"] = game.current_turn_id
+        return Response(data)
 
-        if would_cause_self_loss(dog.game, dog.player):
-            restore_original_position(dog, original_position)
-            dog.save()
-            return Response(
-                {"error": "この移動はあなたのボス犬が囲まれるため、移動できません。"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+    @action(detail=True, methods=["post"], url_path="move", url_name="move")
+    def move(self, request, pk=None):
+        """
+        犬を新しい位置に移動するアクション。
+        """
+        dog, board = self.get_board()
+        try:
+            check_turn(dog)
+        except InvalidMove as error:
+            return self.invalid_move_response(error)
 
-        winner = check_winner(dog.game)
-        if winner:
-            declare_winner(dog.game, winner)
-            return Response(
-                {
-                    "success": True,
-                    "dog": DogSerializer(dog).data,
-                    "winner": winner.user.username,
-                }
-            )
+        new_x, new_y, error_response = get_new_coordinates(request)
+        if error_response:
+            return error_response
 
-        new_turn_id = update_current_turn(dog.game)
-        return Response(
-            {
-                "success": True,
-                "dog": DogSerializer(dog).data,
-                "current_turn": new_turn_id,
-            }
-        )
+        try:
+            checked = check_move(board, dog, new_x, new_y)
+        except InvalidMove as error:
+            return self.invalid_move_response(error)
+        # 判定を通過した移動のみ保存する
+        return self.commit(dog, checked)
 
     @action(
         detail=True,
@@ -121,36 +157,13 @@ class DogViewSet(viewsets.ModelViewSet):
         """
         ボードから犬を取り除くアクション。
         """
-        dog = self.get_object()
-        if not self.is_player_turn_func(dog):
-            return Response(
-                {"error": "まだあなたのターンではありません！"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if dog.dog_type.name == "ボス犬":
-            return Response(
-                {"error": "ボス犬は手札に戻せません。"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if not can_remove_dog(dog):
-            return Response(
-                {"error": "このコマを手札に戻すと、他のコマが孤立します。"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # コマを手札に戻す処理
-        dog.x_position = None
-        dog.y_position = None
-        dog.is_in_hand = True
-        dog.save()
-
-        new_turn_id = update_current_turn(dog.game)
-        return Response(
-            {
-                "success": True,
-                "dog": DogSerializer(dog).data,
-                "current_turn": new_turn_id,
-            }
-        )
+        dog, board = self.get_board()
+        try:
+            check_turn(dog)
+            checked = check_remove(board, dog)
+        except InvalidMove as error:
+            return self.invalid_move_response(error)
+        return self.commit(dog, checked)
 
     @action(
         detail=True,
@@ -162,64 +175,19 @@ class DogViewSet(viewsets.ModelViewSet):
         """
         犬をボードに配置するアクション。
         """
-        dog = self.get_object()
-        if not self.is_player_turn_func(dog):
-            return Response(
-                {"error": "まだあなたのターンではありません！"}, status=status.HTTP_400_BAD_REQUEST
-            )
+        dog, board = self.get_board()
+        try:
+            check_turn(dog)
+        except InvalidMove as error:
+            return self.invalid_move_response(error)
 
         new_x, new_y, error_response = get_new_coordinates(request)
         if error_response:
             return error_response
 
-        if not is_within_field_after_move(dog.game, new_x, new_y, dog.id):
-            return Response(
-                {"error": "フィールドのサイズを超えるため配置できません。"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if is_square_occupied(dog.game, new_x, new_y):
-            return Response(
-                {"error": "そのマスには既にコマがあります。"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if not is_adjacent_after_place(dog.game, new_x, new_y, dog):
-            return Response(
-                {"error": "他のコマと隣接していない場所には配置できません。"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        original_state = save_original_state(dog)
-
-        # 犬の位置を更新
-        dog.x_position = new_x
-        dog.y_position = new_y
-        dog.is_in_hand = False
-        dog.save()  # ここで保存する
-
-        if would_cause_self_loss(dog.game, dog.player):
-            restore_original_state(dog, original_state)
-            dog.save()
-            return Response(
-                {"error": "この配置はあなたのボス犬が囲まれるため、配置できません。"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        winner = check_winner(dog.game)
-        if winner:
-            declare_winner(dog.game, winner)
-            return Response(
-                {
-                    "success": True,
-                    "dog": DogSerializer(dog).data,
-                    "winner": winner.user.username,
-                }
-            )
-
-        new_turn_id = update_current_turn(dog.game)
-        return Response(
-            {
-                "success": True,
-                "dog": DogSerializer(dog).data,
-                "current_turn": new_turn_id,
-            }
-        )
+        try:
+            checked = check_place(board, dog, new_x, new_y)
+        except InvalidMove as error:
+            return self.invalid_move_response(error)
+        # 判定を通過した配置のみ保存する
+        return self.commit(dog, checked)
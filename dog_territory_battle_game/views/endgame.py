@@ -0,0 +1,164 @@
+import logging
+import os
+from collections import deque
+from functools import lru_cache
+from django.conf import settings
+from ..engine.tablebase import (
+    DRAW,
+    LOSS,
+    RESULT_NAMES,
+    Tablebase,
+    TablebaseEntry,
+    after_move,
+    retrograde_solve,
+    write_tablebase,
+)
+from ..dog_types import get_dog_types
+from .board_snapshot import legal_move_list, simulate
+
+logger = logging.getLogger(__name__)
+
+
+def position_key(board, player_id):
+    """
+    エンドゲームテーブルで使う局面キー（平行移動と対称変換で正規化したキー）を返す。
+    """
+    return board.canonical_key(player_id, symmetric=True)
+
+
+def enumerate_positions(board, player_id, max_positions):
+    """
+    指定した局面から到達できる局面を幅優先で列挙し、正規化した局面キーごとのグラフを作る。
+
+    Returns:
+        tuple: (keys, children, terminal, expanded)。keys は局面番号ごとの局面キー、
+        残りは retrograde_solve の引数。
+    """
+    index_of = {}
+    keys, children, terminal, expanded = [], [], [], []
+
+    def add(key, is_terminal):
+        if key not in index_of:
+            index_of[key] = len(keys)
+            keys.append(key)
+            children.append([])
+            terminal.append(is_terminal)
+            expanded.append(is_terminal)
+        return index_of[key]
+
+    queue = deque([(add(position_key(board, player_id), False), board, player_id)])
+    while queue:
+        index, position, side = queue.popleft()
+        opponent_id = position.opponent_id(side)
+        kids = set()
+        for dog_id, target in legal_move_list(position, side):
+            result = simulate(position, position.get_dog(dog_id), target)
+            is_new = position_key(result.board, opponent_id) not in index_of
+            if is_new and len(keys) >= max_positions:
+                # 列挙しきれない子局面がある局面は展開済みにしない
+                break
+            # 勝者が決まった局面は、手番の相手が負けている終局の局面
+            child = add(
+                position_key(result.board, opponent_id), result.winner is not None
+            )
+            kids.add(child)
+            if is_new and result.winner is None:
+                queue.append((child, result.board, opponent_id))
+        else:
+            expanded[index] = True
+        children[index] = sorted(kids)
+
+    return keys, children, terminal, expanded
+
+
+def build_tablebase(board, player_id, path, max_positions):
+    """
+    指定した局面から到達できる局面を後退解析してファイルに書き出す。
+
+    すべての局面を列挙できた場合は勝敗が決まらない局面を引き分けとして記録し、
+    列挙を打ち切った場合は勝ち・負けが確定した局面のみを記録する。
+
+    Returns:
+        dict: 列挙した局面数と、記録した結果ごとの局面数。
+    """
+    keys, children, terminal, expanded = enumerate_positions(
+        board, player_id, max_positions
+    )
+    results = retrograde_solve(children, terminal, expanded)
+    complete = all(expanded)
+
+    entries = {}
+    for key, entry, is_expanded in zip(keys, results, expanded):
+        if entry is not None:
+            entries[key] = entry
+        elif complete and is_expanded:
+            entries[key] = TablebaseEntry(DRAW, 0)
+
+    dog_types = {dog.dog_type_id: dog.dog_type.name for dog in board.dogs.values()}
+    write_tablebase(
+        path,
+        entries,
+        metadata={"dog_types": {str(k): v for k, v in sorted(dog_types.items())}},
+    )
+
+    summary = {"positions": len(keys), "complete": complete}
+    for entry in entries.values():
+        name = RESULT_NAMES[entry.result]
+        summary[name] = summary.get(name, 0) + 1
+    return summary
+
+
+@lru_cache(maxsize=None)
+def get_tablebase():
+    """
+    設定された TABLEBASE_PATH のエンドゲームテーブルをプロセスごとに一度だけ読み込む。
+    ファイルがない場合や、作成時の犬種IDが現在のデータベースと一致しない場合は None を返す。
+    """
+    path = settings.TABLEBASE_PATH
+    if not path or not os.path.exists(path):
+        return None
+    tablebase = Tablebase(path)
+    dog_types = {
+        str(dog_type_id): dog_type.name
+        for dog_type_id, dog_type in get_dog_types().items()
+    }
+    for dog_type_id, name in tablebase.metadata.get("dog_types", {}).items():
+        if dog_types.get(dog_type_id) != name:
+            logger.warning(f"Tablebase {path} does not match the dog types; ignored.")
+            tablebase.close()
+            return None
+    return tablebase
+
+
+def probe(tablebase, board, player_id):
+    """
+    局面をエンドゲームテーブルで引く。手番は player_id で、結果はそのプレイヤーから見た値。
+    """
+    return tablebase.probe(position_key(board, player_id))
+
+
+def probe_moves(tablebase, board, player_id):
+    """
+    合法手ごとに、手を指した後の局面をエンドゲームテーブルで引く。
+    結果は手を指すプレイヤーから見た値で、テーブルにない局面は None。
+    """
+    opponent_id = board.opponent_id(player_id)
+    outcomes = []
+    for move in legal_move_list(board, player_id):
+        dog_id, target = move
+        result = simulate(board, board.get_dog(dog_id), target)
+        if result.winner is not None:
+            known = TablebaseEntry(LOSS, 0)
+        else:
+            known = probe(tablebase, result.board, opponent_id)
+        outcomes.append((move, after_move(known) if known is not None else None))
+    return outcomes
+
+
+def entry_to_dict(entry):
+    """
+    TablebaseEntry をレスポンス用の辞書に変換する。
+    """
+    if entry is None:
+        return None
+    return {"result": RESULT_NAMES[entry.result], "distance": entry.distance}
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import logging
+from django.http import Http404, StreamingHttpResponse
+from ..events import get_broker
+from ..models import Game
+
+logger = logging.getLogger(__name__)
+
+# 接続を保つためのコメントを送る間隔（秒）
+HEARTBEAT_INTERVAL = 15
+
+# 切断されたクライアントが再接続するまでの待ち時間（ミリ秒）
+RETRY_INTERVAL = 3000
+
+
+def format_event(event):
+    """
+    ゲームの更新イベントを Server-Sent Events の形式に変換する。
+
+    resync イベントはバージョンを持たないため、id を付けずに別の種類のイベントとして送る
+    （クライアントの Last-Event-ID は最後に受け取った更新のバージョンのまま残る）。
+    """
+    data = json.dumps(event, ensure_ascii=False)
+    if event.get("resync"):
+        return f"event: resync\ndata: {data}\n\n"
+    return f"id: {event['version']}\nevent: update\ndata: {data}\n\n"
+
+
+async def stream_game_events(game_id, heartbeat_interval=HEARTBEAT_INTERVAL):
+    """
+    ゲームの更新イベントを購読し、届くたびに SSE の形式で返す非同期ジェネレーター。
+    """
+    broker = get_broker()
+    # 購読はレスポンスを送るイベントループ上で行う
+    subscription = broker.subscribe(game_id)
+    _, queue = subscription
+    try:
+        yield f"retry: {RETRY_INTERVAL}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), heartbeat_interval)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(game_id, subscription)
+        logger.debug(f"Event stream closed: game={game_id}")
+
+
+async def game_events(request, pk):
+    """
+    ゲームの更新を Server-Sent Events で配信する非同期ビュー。
+    手が確定するたびに、位置が変わった犬と手番・勝者を送る。
+    """
+    if not await Game.objects.filter(pk=pk).aexists():
+        raise Http404("Game does not exist.")
+    return StreamingHttpResponse(
+        stream_game_events(pk),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,298 @@
+import copy
+import logging
+import threading
+import time
+from functools import lru_cache
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections
+from .board_snapshot import BoardSnapshot
+from .dog_utils import StaleGameError
+from .game_state import publish_game_resync
+from .move_log import MoveBuffer, commit_move, next_ply, write_pending
+
+logger = logging.getLogger(__name__)
+
+
+class GameActor:
+    """
+    1つのゲームをメモリ上で所有し、確定した手を1手ずつ順番に適用するアクター。
+
+    アクターが所有している間は、メモリ上の局面・手番・バージョンが正となる。
+    手の受け付けはゲームごとのロックで直列化し、データベースには書き込まない。
+    受け付けた手は flush でまとめてデータベースに書き込む（write-behind）。
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.buffer = MoveBuffer(
+            BoardSnapshot.load(game), next_ply(game) - 1, game.version
+        )
+        self.closed = False
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def snapshot(self):
+        """
+        手の検証に使う局面の複製を返す。複製のゲームは、この時点のバージョンを保持する。
+        """
+        with self._lock:
+            self.last_used = time.monotonic()
+            board = self.buffer.board.copy()
+            board.game = copy.copy(self.game)
+        return board
+
+    def current_game(self):
+        """
+        この時点のゲームの複製を返す（手番・勝者・バージョン・packed board が揃った状態）。
+        """
+        with self._lock:
+            return copy.copy(self.game)
+
+    def accept(self, board, dog, kind, origin, target, winner=None):
+        """
+        検証済みの手をメモリ上の局面に適用する。board は snapshot の複製に手を適用した局面。
+
+        複製した後に他の手を受け付けていた場合や、アクターが既に閉じられている場合は
+        何も変更せずに False を返す。
+        """
+        with self._lock:
+            if self.closed or board.game.version != self.game.version:
+                return False
+            self.buffer.apply(board, dog, kind, origin, target, winner)
+            self.last_used = time.monotonic()
+        return True
+
+    def flush(self):
+        """
+        受け付けた手を write_pending でまとめてデータベースに書き込み、書き込んだ手の数を返す。
+
+        アクターの外でゲームが更新されていた場合は何も保存せずに StaleGameError を送出する。
+        例外の lost_write に、保存できなかった PendingWrite を持たせる。
+        一時的なデータベースのエラーの場合は、手を戻して次の flush で書き込み直す。
+        """
+        with self._flush_lock:
+            with self._lock:
+                write = self.buffer.drain()
+            if write is None:
+                return 0
+
+            try:
+                write_pending([write])
+            except (StaleGameError, IntegrityError) as error:
+                # 受け付け済みの手は保存できないため、呼び出し側で失われた手として通知する
+                error.lost_write = write
+                raise
+            except DatabaseError:
+                with self._lock:
+                    self.buffer.restore(write)
+                raise
+
+            with self._lock:
+                self.buffer.mark_written(write)
+            return len(write.moves)
+
+    def close(self):
+        """
+        以降の手を受け付けないようにする。残っている手は呼び出し側で flush すること。
+        """
+        with self._lock:
+            self.closed = True
+
+    def is_idle(self, timeout):
+        with self._lock:
+            return not self.buffer.moves and time.monotonic() - self.last_used > timeout
+
+
+class GameActorRegistry:
+    """
+    プロセス内のゲームのアクターを管理し、バックグラウンドのスレッドで定期的に flush する。
+
+    アクターはゲームごとに1つのプロセスだけが持つこと（ゲームのリクエストを同じプロセスに
+    振り分ける）。他のプロセスがゲームを更新していた場合は flush が失敗し、アクターを
+    破棄してデータベースから読み込み直す。
+    """
+
+    def __init__(self):
+        self._actors = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def get(self, game):
+        """
+        ゲームのアクターを返す。まだない場合は game の状態から作成する。
+        """
+        actor = self.peek(game.id)
+        if actor is not None:
+            return actor
+        with self._lock:
+            actor = self._actors.get(game.id)
+            if actor is None or actor.closed:
+                actor = self._actors[game.id] = GameActor(game)
+                self._start_flusher()
+        return actor
+
+    def peek(self, game_id):
+        """
+        ゲームのアクターがあれば返す（作成はしない）。
+        """
+        actor = self._actors.get(game_id)
+        if actor is None or actor.closed:
+            return None
+        return actor
+
+    def evict(self, game_id):
+        """
+        ゲームのアクターを閉じ、残っている手を書き込んでから破棄する。
+        アクターがあった場合は True を返す。
+        """
+        with self._lock:
+            actor = self._actors.pop(game_id, None)
+        if actor is None:
+            return False
+        actor.close()
+        self._flush(actor)
+        return True
+
+    def flush(self, game_id):
+        """
+        ゲームのアクターがあれば、受け付けた手を書き込む。
+        """
+        actor = self.peek(game_id)
+        if actor is not None and not self._flush(actor):
+            self._discard(actor)
+
+    def flush_all(self):
+        """
+        全てのアクターの手を書き込み、しばらく使われていないアクターを破棄する。
+        """
+        with self._lock:
+            actors = list(self._actors.values())
+        for actor in actors:
+            if not self._flush(actor):
+                self._discard(actor)
+            elif actor.is_idle(settings.GAME_ACTOR_IDLE_TIMEOUT):
+                actor.close()
+                # 閉じる直前に受け付けた手があれば書き込む
+                self._flush(actor)
+                self._discard(actor)
+
+    def clear(self):
+        """
+        全てのアクターを書き込まずに破棄する。
+        """
+        with self._lock:
+            actors = list(self._actors.values())
+            self._actors.clear()
+        for actor in actors:
+            actor.close()
+
+    def _flush(self, actor):
+        """
+        アクターを flush する。アクターを破棄する必要がある場合は False を返す。
+        """
+        try:
+            actor.flush()
+        except (StaleGameError, IntegrityError) as error:
+            write = error.lost_write
+            logger.exception(
+                f"Game {actor.game.pk} was updated outside its actor; "
+                f"{len(write.moves)} accepted moves were lost."
+            )
+            actor.close()
+            # 手を受け付けたクライアントに、手が失われたことを通知する
+            publish_game_resync(
+                actor.game.pk,
+                write.moves,
+                range(write.expected_version + 1, write.game.version + 1),
+            )
+            return False
+        except DatabaseError:
+            logger.exception(f"Failed to flush game {actor.game.pk}; will retry.")
+        return True
+
+    def _discard(self, actor):
+        with self._lock:
+            if self._actors.get(actor.game.pk) is actor:
+                del self._actors[actor.game.pk]
+
+    def _start_flusher(self):
+        """
+        flush を行うスレッドを起動する。GAME_ACTOR_FLUSH_INTERVAL が 0 の場合は起動しない。
+        """
+        interval = settings.GAME_ACTOR_FLUSH_INTERVAL
+        if interval <= 0 or self._flusher is not None:
+            return
+        self._flusher = threading.Thread(
+            target=self._run_flusher, args=(interval,), name="game-actor-flusher"
+        )
+        self._flusher.daemon = True
+        self._flusher.start()
+
+    def _run_flusher(self, interval):
+        while True:
+            time.sleep(interval)
+            close_old_connections()
+            try:
+                self.flush_all()
+            except Exception:
+                logger.exception("Game actor flush failed.")
+
+
+@lru_cache(maxsize=None)
+def get_registry():
+    """
+    プロセスで共有するアクターのレジストリを返す。
+    """
+    return GameActorRegistry()
+
+
+def load_board(game):
+    """
+    ゲームの局面を読み込む。GAME_ACTORS_ENABLED の場合はアクターの局面の複製を返す。
+    """
+    if settings.GAME_ACTORS_ENABLED:
+        return get_registry().get(game).snapshot()
+    return BoardSnapshot.load(game)
+
+
+def submit_move(board, dog, kind, origin, target, winner=None):
+    """
+    load_board で読み込んだ局面に適用した手を確定する。
+
+    GAME_ACTORS_ENABLED の場合はアクターが受け付け、データベースには後でまとめて書き込む。
+    それ以外の場合は commit_move でその場で保存する。競合した場合は False を返す。
+    """
+    if settings.GAME_ACTORS_ENABLED:
+        actor = get_registry().peek(board.game.id)
+        return actor is not None and actor.accept(
+            board, dog, kind, origin, target, winner
+        )
+    return commit_move(board, dog, kind, origin, target, winner)
+
+
+def get_live_game(game):
+    """
+    アクターが所有しているゲームの場合は、アクターの最新の状態のゲームを返す。
+    """
+    if settings.GAME_ACTORS_ENABLED:
+        actor = get_registry().peek(game.id)
+        if actor is not None:
+            return actor.current_game()
+    return game
+
+
+def flush_game(game_id):
+    """
+    アクターが受け付けた手をデータベースに書き込む。手のログを読む前に呼ぶ。
+    """
+    if settings.GAME_ACTORS_ENABLED:
+        get_registry().flush(game_id)
+
+
+def release_game(game_id):
+    """
+    アクターの手を書き込んでからアクターを破棄する。アクターの外でゲームを更新する前に呼ぶ。
+    アクターがあった場合は True を返す（データベースのゲームを読み込み直すこと）。
+    """
+    return settings.GAME_ACTORS_ENABLED and get_registry().evict(game_id)
@@ -0,0 +1,258 @@
+from django.core.cache import cache
+from django.db import transaction
+from ..events import get_broker
+from .board_snapshot import load_dogs, load_dogs_for_games
+
+# ゲーム状態のキャッシュを保持する秒数
+GAME_STATE_CACHE_TIMEOUT = 60 * 60
+
+# 差分を返すために遡る更新イベントの最大数
+GAME_UPDATE_HISTORY = 50
+
+# ゲーム状態と更新イベントは Django のキャッシュに保存する。複数のワーカープロセスで
+# 動かす場合は、どのプロセスからも同じ値を読めるよう共有のキャッシュ（Redis や Memcached）
+# を設定すること。プロセスごとの LocMemCache では、他のプロセスで確定した手の差分は
+# 見つからず、全体を返すことになる。
+
+
+def dog_payload(dog):
+    """
+    犬1匹分のレスポンスの辞書を作成する。dog.dog_type は読み込み済みであること。
+    """
+    dog_type = dog.dog_type
+    return {
+        "id": dog.id,
+        "name": dog_type.name,
+        "x_position": dog.x_position,
+        "y_position": dog.y_position,
+        "is_in_hand": dog.is_in_hand,
+        "dog_type": {
+            "id": dog_type.id,
+            "name": dog_type.name,
+            "movement_type": dog_type.movement_type,
+            "max_steps": dog_type.max_steps,
+        },
+        "player": dog.player_id,
+        "movement_type": dog_type.movement_type,
+        "max_steps": dog_type.max_steps,
+    }
+
+
+def game_summary(game):
+    """
+    ゲーム自体の情報（手番・プレイヤー・バージョン）の辞書を作成する。
+    """
+    return {
+        "id": game.id,
+        "current_turn": game.current_turn_id,
+        "player1": game.player1_id,
+        "player2": game.player2_id,
+        "version": game.version,
+    }
+
+
+def build_game_state(game, dogs=None):
+    """
+    ゲームの詳細情報（手札とボード上のコマ）を1回のクエリで作成する。
+    ゲームに packed board がある場合は Dog の行を読まない。
+    dogs を渡した場合は、読み込み済みのゲームの全ての犬として使う。
+    """
+    if dogs is None:
+        dogs = load_dogs(game)
+    player1_hand_dogs, player2_hand_dogs = [], []
+    board_dogs = []
+    for dog in dogs:
+        dog_data = dog_payload(dog)
+        if not dog.is_in_hand:
+            board_dogs.append(dog_data)
+        elif dog.player_id == game.player1_id:
+            player1_hand_dogs.append(dog_data)
+        else:
+            player2_hand_dogs.append(dog_data)
+
+    return {
+        "game": game_summary(game),
+        "player1_hand_dogs": player1_hand_dogs,
+        "player2_hand_dogs": player2_hand_dogs,
+        "board_dogs": board_dogs,
+    }
+
+
+def game_state_etag(game):
+    """
+    ゲーム状態の ETag。手が確定するたびに増えるゲームのバージョンから作る。
+    """
+    return f'"{game.id}-{game.version}"'
+
+
+def game_state_key(game):
+    """
+    ゲーム状態のキャッシュのキー。バージョンが変わると別のキーになる。
+    """
+    return state_key(game.id, game.version)
+
+
+def state_key(game_id, version):
+    return f"game_state:{game_id}:{version}"
+
+
+def get_game_state(game):
+    """
+    ゲームの詳細情報をバージョンごとにキャッシュして返す。
+    手が確定してバージョンが変わるまでは Dog テーブルを読まない。
+    """
+    key = game_state_key(game)
+    state = cache.get(key)
+    if state is None:
+        state = build_game_state(game)
+        cache.set(key, state, GAME_STATE_CACHE_TIMEOUT)
+    return state
+
+
+def get_game_states(games):
+    """
+    複数のゲームの詳細情報を、ゲームのIDをキーにした辞書で返す。
+
+    キャッシュは1回でまとめて読み書きし、キャッシュにないゲームの犬は
+    load_dogs_for_games で1回のクエリで読み込む。ゲームの数によらずクエリ数は一定になる。
+    """
+    keys = {game.id: game_state_key(game) for game in games}
+    cached = cache.get_many(keys.values())
+    states = {}
+    missing = []
+    for game in games:
+        state = cached.get(keys[game.id])
+        if state is None:
+            missing.append(game)
+        else:
+            states[game.id] = state
+
+    built = {}
+    dogs_by_game = load_dogs_for_games(missing)
+    for game in missing:
+        state = states[game.id] = build_game_state(game, dogs_by_game[game.id])
+        built[keys[game.id]] = state
+    if built:
+        cache.set_many(built, GAME_STATE_CACHE_TIMEOUT)
+    return states
+
+
+def game_update_event(game, dogs, full=False):
+    """
+    手が確定したときに配信するイベントを作成する。
+    dogs は位置が変わった犬（full が真の場合はゲームの全ての犬）。
+    """
+    return {
+        "game": game.id,
+        "version": game.version,
+        "current_turn": game.current_turn_id,
+        "winner": game.winner_id,
+        "full": full,
+        "dogs": [dog_payload(dog) for dog in dogs],
+    }
+
+
+def publish_game_update(game, dogs, full=False):
+    """
+    トランザクションのコミット後に、ゲームの購読者へ更新イベントを配信する。
+    """
+    publish_event(game_update_event(game, dogs, full=full))
+
+
+def publish_event(event):
+    """
+    作成済みの更新イベントを、トランザクションのコミット後に配信する。
+    """
+
+    def on_commit():
+        record_game_update(event)
+        get_broker().publish(event["game"], event)
+
+    transaction.on_commit(on_commit)
+
+
+def publish_game_resync(game_id, lost_moves, versions):
+    """
+    アクターが受け付けた後に保存できなかった手を、購読者へ resync イベントで通知する。
+
+    lost_moves は失われた GameMove、versions はそれらの手で進んだバージョン。
+    そのバージョンのゲーム状態と更新イベントはデータベースと一致しないため
+    キャッシュから削除する。イベントを受け取ったクライアントはゲームの状態を読み込み直すこと。
+    """
+    cache.delete_many(
+        [state_key(game_id, version) for version in versions]
+        + [game_update_key(game_id, version) for version in versions]
+    )
+    get_broker().publish(
+        game_id,
+        {
+            "game": game_id,
+            "resync": True,
+            "lost_moves": [
+                {
+                    "ply": move.ply,
+                    "kind": move.kind,
+                    "player": move.player_id,
+                    "dog": move.dog_id,
+                    "from_x": move.from_x,
+                    "from_y": move.from_y,
+                    "to_x": move.to_x,
+                    "to_y": move.to_y,
+                }
+                for move in lost_moves
+            ],
+        },
+    )
+
+
+def game_update_key(game_id, version):
+    """
+    更新イベントのキャッシュのキー。イベントはバージョンごとに別のキーに保存する。
+    """
+    return f"game_update:{game_id}:{version}"
+
+
+def record_game_update(event):
+    """
+    更新イベントをバージョンごとのキーに保存する。
+    1つのキーに1回書き込むだけなので、同時に書き込む手があってもイベントは失われない。
+    """
+    cache.set(
+        game_update_key(event["game"], event["version"]),
+        event,
+        GAME_STATE_CACHE_TIMEOUT,
+    )
+
+
+def get_game_delta(game, since):
+    """
+    バージョン since 以降に位置が変わった犬と、手番・勝者を返す。
+
+    since から現在のバージョンまでの更新イベントがキャッシュに揃っていない場合や、
+    GAME_UPDATE_HISTORY より前から遡る場合、途中でゲームがリセットされた場合は
+    None を返す（全体を返す必要がある）。
+    """
+    if since > game.version or game.version - since > GAME_UPDATE_HISTORY:
+        return None
+    keys = [
+        game_update_key(game.id, version)
+        for version in range(since + 1, game.version + 1)
+    ]
+    cached = cache.get_many(keys)
+    if len(cached) != len(keys):
+        return None
+    updates = list(cached.values())
+    if any(event["full"] for event in updates):
+        return None
+
+    changed = {}
+    for event in sorted(updates, key=lambda e: e["version"]):
+        for dog in event["dogs"]:
+            changed[dog["id"]] = dog
+    return {
+        "game": game_summary(game),
+        "winner": game.winner_id,
+        "since": since,
+        "full": False,
+        "dogs": [changed[dog_id] for dog_id in sorted(changed)],
+    }
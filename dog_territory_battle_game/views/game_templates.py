@@ -0,0 +1,169 @@
+from collections import defaultdict, namedtuple
+from django.db import transaction
+from django.utils import timezone
+from ..dog_types import get_dog_type, get_dog_types_by_name
+from ..models import Dog, Game
+from .board_snapshot import BoardSnapshot
+from .dog_utils import DOG_POSITION_FIELDS
+
+# テンプレートの犬1匹分（プレイヤー番号（player1 は 0、player2 は 1）、犬種名、初期位置）
+# 初期位置が None の犬は手札に入れる
+TemplateDog = namedtuple("TemplateDog", ["player", "dog_type", "position"])
+
+# ゲームの初期配置のテンプレート
+GAME_TEMPLATES = {
+    # reset_game の初期配置（setup_data で登録する犬種のみを使う）
+    "standard": (
+        TemplateDog(0, "ボス犬", (1, 1)),
+        TemplateDog(1, "ボス犬", (2, 1)),
+        TemplateDog(0, "アニキ犬", None),
+        TemplateDog(0, "ハジケ犬", None),
+        TemplateDog(1, "アニキ犬", None),
+        TemplateDog(1, "ハジケ犬", None),
+    ),
+    # setup_data の初期配置（全ての犬種を手札に持つ）
+    "full": (
+        TemplateDog(0, "ボス犬", (1, 0)),
+        TemplateDog(0, "アニキ犬", None),
+        TemplateDog(0, "ヤイバ犬", None),
+        TemplateDog(0, "豆でっぽう犬", None),
+        TemplateDog(0, "トツ犬", None),
+        TemplateDog(0, "ハジケ犬", None),
+        TemplateDog(1, "ボス犬", (1, 1)),
+        TemplateDog(1, "アニキ犬", None),
+        TemplateDog(1, "ヤイバ犬", None),
+        TemplateDog(1, "豆でっぽう犬", None),
+        TemplateDog(1, "トツ犬", None),
+        TemplateDog(1, "ハジケ犬", None),
+    ),
+}
+
+DEFAULT_GAME_TEMPLATE = "standard"
+
+# bulk_create / bulk_update で1回のクエリにまとめる行数
+BULK_BATCH_SIZE = 500
+
+
+def place_template_dogs(games, template_name=DEFAULT_GAME_TEMPLATE):
+    """
+    テンプレートの犬を全てのゲームに bulk_create で作成し、各ゲームの packed board を設定する。
+    ゲームの行は保存しないため、呼び出し側で保存すること。
+
+    Returns:
+        dict: ゲームのIDをキーにした、作成した犬のリスト。
+    """
+    template = GAME_TEMPLATES[template_name]
+    dog_types = get_dog_types_by_name({dog.dog_type for dog in template})
+
+    dogs = []
+    for game in games:
+        player_ids = (game.player1_id, game.player2_id)
+        for dog in template:
+            x, y = dog.position or (None, None)
+            dogs.append(
+                Dog(
+                    game=game,
+                    player_id=player_ids[dog.player],
+                    dog_type=dog_types[dog.dog_type],
+                    x_position=x,
+                    y_position=y,
+                    is_in_hand=dog.position is None,
+                )
+            )
+    Dog.objects.bulk_create(dogs, batch_size=BULK_BATCH_SIZE)
+
+    dogs_by_game = {game.id: [] for game in games}
+    for dog in dogs:
+        dogs_by_game[dog.game_id].append(dog)
+    for game in games:
+        game.board = BoardSnapshot(game, dogs_by_game[game.id]).pack()
+    return dogs_by_game
+
+
+def match_template(game, dogs):
+    """
+    犬の組み合わせ（プレイヤーと犬種）が一致するテンプレートの名前を返す。
+    一致するテンプレートがない場合は DEFAULT_GAME_TEMPLATE を返す。
+    """
+    players = {game.player1_id: 0, game.player2_id: 1}
+    lineup = sorted(
+        (players.get(dog.player_id, len(players)), get_dog_type(dog.dog_type_id).name)
+        for dog in dogs
+    )
+    for template_name, template in GAME_TEMPLATES.items():
+        if lineup == sorted((dog.player, dog.dog_type) for dog in template):
+            return template_name
+    return DEFAULT_GAME_TEMPLATE
+
+
+def reset_template_dogs(game):
+    """
+    ゲームの犬をテンプレートの初期配置に戻し、ゲームの packed board を設定する。
+    犬の組み合わせが一致するテンプレート（ない場合は既定のテンプレート）を使う。
+
+    テンプレートと同じプレイヤー・犬種の犬は行を残して位置だけを戻すため、手のログが指す犬は
+    リセット後も残る。足りない犬は作成し、テンプレートにない犬は削除する。
+    ゲームの行は保存しないため、呼び出し側で保存すること。
+
+    Returns:
+        list: リセット後のゲームの全ての犬（犬のID順）。
+    """
+    dogs = list(Dog.objects.filter(game=game).order_by("id"))
+    template = GAME_TEMPLATES[match_template(game, dogs)]
+    dog_types = get_dog_types_by_name({dog.dog_type for dog in template})
+
+    unused = defaultdict(list)
+    for dog in dogs:
+        unused[(dog.player_id, dog.dog_type_id)].append(dog)
+    player_ids = (game.player1_id, game.player2_id)
+    now = timezone.now()
+    kept, created = [], []
+    for template_dog in template:
+        dog_type = dog_types[template_dog.dog_type]
+        player_id = player_ids[template_dog.player]
+        candidates = unused[(player_id, dog_type.id)]
+        if candidates:
+            dog = candidates.pop(0)
+            kept.append(dog)
+        else:
+            dog = Dog(game=game, player_id=player_id)
+            created.append(dog)
+        dog.dog_type = dog_type
+        dog.x_position, dog.y_position = template_dog.position or (None, None)
+        dog.is_in_hand = template_dog.position is None
+        dog.updated_at = now
+
+    removed = [dog.pk for candidates in unused.values() for dog in candidates]
+    if removed:
+        Dog.objects.filter(pk__in=removed).delete()
+    # 犬同士でマスを入れ替える場合に一意制約に掛からないよう、一度手札に戻してから書き込む
+    Dog.objects.filter(pk__in=[dog.pk for dog in kept]).update(
+        x_position=None, y_position=None, is_in_hand=True
+    )
+    Dog.objects.bulk_update(kept, DOG_POSITION_FIELDS)
+    Dog.objects.bulk_create(created)
+
+    dogs = sorted(kept + created, key=lambda dog: dog.id)
+    game.board = BoardSnapshot(game, dogs).pack()
+    return dogs
+
+
+def create_games(pairings, template_name=DEFAULT_GAME_TEMPLATE):
+    """
+    (player1, player2) の組ごとにゲームを作成し、テンプレートの初期配置で犬を並べる。
+    手番は player1 から始める。
+
+    Returns:
+        list: 作成したゲーム。
+    """
+    with transaction.atomic():
+        games = Game.objects.bulk_create(
+            [
+                Game(player1=player1, player2=player2, current_turn=player1)
+                for player1, player2 in pairings
+            ],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        place_template_dogs(games, template_name)
+        Game.objects.bulk_update(games, ["board"], batch_size=BULK_BATCH_SIZE)
+    return games
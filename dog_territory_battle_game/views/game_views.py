@@ -1,10 +1,37 @@
 import logging
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
-from rest_framework import viewsets
+from django.urls import reverse
+from django.utils.http import parse_etags
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from ..models import Game, Dog, DogType
-from ..serializers import GameSerializer
+from ..models import ACTIVE_GAME, Game, GameMove, DogType, Player
+from ..serializers import GAME_VALUES_FIELDS, GameSerializer, serialize_games
+from ..signals import managed_dog_writes
+from .analysis_jobs import get_analysis, start_analysis
+from .board_snapshot import generate_legal_moves
+from .computer_player import move_to_dict, play_computer_turn
+from .dog_utils import CONFLICT_ERROR, StaleGameError, save_game
+from .endgame import entry_to_dict, get_tablebase, probe, probe_moves
+from .game_actor import flush_game, get_live_game, load_board, release_game
+from .game_state import (
+    game_state_etag,
+    get_game_delta,
+    get_game_state,
+    get_game_states,
+    publish_game_update,
+)
+from .game_templates import (
+    DEFAULT_GAME_TEMPLATE,
+    GAME_TEMPLATES,
+    create_games,
+    reset_template_dogs,
+)
+from .move_log import materialize_positions, record_reset
+from .pagination import IdCursorPagination, bool_param, int_param
 
 logger = logging.getLogger(__name__)
 
@@ -12,60 +39,66 @@ logger = logging.getLogger(__name__)
 class GameViewSet(viewsets.ModelViewSet):
     """
     ゲームのCRUD操作を提供するViewSet。
+    一覧は id 順のカーソルページネーションで返し、?player= で参加しているゲーム、
+    ?active= で勝者が決まっておらず削除されていないゲームに絞り込む。
     """
 
     queryset = Game.objects.all()
     serializer_class = GameSerializer
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+
+        player_id = int_param(self.request, "player")
+        if player_id is not None:
+            queryset = queryset.filter(
+                Q(player1_id=player_id) | Q(player2_id=player_id)
+            )
+        active = bool_param(self.request, "active")
+        if active is True:
+            queryset = queryset.filter(ACTIVE_GAME)
+        elif active is False:
+            queryset = queryset.exclude(ACTIVE_GAME)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """
+        ゲームの一覧を values() の行から直接組み立てて返す（GameSerializer と同じ形）。
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset.values(*GAME_VALUES_FIELDS))
+        return self.get_paginated_response(serialize_games(page))
 
     def retrieve(self, request, pk=None):
         """
         ゲームの詳細情報を取得するメソッド。
+        手が確定するまではキャッシュした内容を返す。
+        If-None-Match がゲームのバージョンと一致する場合は Dog テーブルを読まずに 304 を返す。
+        since にバージョンを指定すると、それ以降に位置が変わった犬だけを返す。
         """
-        game = get_object_or_404(Game, pk=pk)
-        dogs = Dog.objects.filter(game=game)
-        player1_hand_dogs, player2_hand_dogs = [], []
-        board_dogs = []
-
-        for dog in dogs:
-            dog_data = {
-                "id": dog.id,
-                "name": dog.dog_type.name,
-                "x_position": dog.x_position if dog.x_position is not None else None,
-                "y_position": dog.y_position if dog.y_position is not None else None,
-                "is_in_hand": dog.is_in_hand,
-                "dog_type": {
-                    "id": dog.dog_type.id,
-                    "name": dog.dog_type.name,
-                    "movement_type": dog.dog_type.movement_type,
-                    "max_steps": dog.dog_type.max_steps,
-                },
-                "player": dog.player.id,
-                "movement_type": dog.dog_type.movement_type,
-                "max_steps": dog.dog_type.max_steps,
-            }
-            if dog.player == game.player1:
-                if dog.is_in_hand:
-                    player1_hand_dogs.append(dog_data)
-                else:
-                    board_dogs.append(dog_data)
-            else:
-                if dog.is_in_hand:
-                    player2_hand_dogs.append(dog_data)
-                else:
-                    board_dogs.append(dog_data)
-
-        context = {
-            "game": {
-                "id": game.id,
-                "current_turn": game.current_turn.id,
-                "player1": game.player1.id,
-                "player2": game.player2.id,
-            },
-            "player1_hand_dogs": player1_hand_dogs,
-            "player2_hand_dogs": player2_hand_dogs,
-            "board_dogs": board_dogs,
-        }
-        return Response(context)
+        game = get_live_game(get_object_or_404(Game, pk=pk))
+        etag = game_state_etag(game)
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        since = request.query_params.get("since")
+        if since is None:
+            return Response(get_game_state(game), headers={"ETag": etag})
+
+        try:
+            since = int(since)
+        except ValueError:
+            return Response(
+                {"error": "Invalid parameters"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        delta = get_game_delta(game, since)
+        if delta is None:
+            # 差分を作れない場合は全体を返す
+            delta = {**get_game_state(game), "winner": game.winner_id, "full": True}
+        return Response(delta, headers={"ETag": etag})
 
     @action(detail=True, methods=["post"], url_path="reset_game")
     def reset_game(self, request, pk=None):
@@ -73,57 +106,337 @@ class GameViewSet(viewsets.ModelViewSet):
         ゲームの状態を初期化するアクション。
         """
         game = get_object_or_404(Game, pk=pk)
+        # アクターが所有している場合は、受け付けた手を書き込んでから手放す
+        if release_game(game.id):
+            game.refresh_from_db()
+
+        try:
+            with transaction.atomic():
+                # ゲーム内の犬を初期配置のテンプレートの位置に戻す
+                # （バージョンと packed board は save_game で保存する）
+                with managed_dog_writes():
+                    dogs = reset_template_dogs(game)
+
+                # ゲームのターンを初期化
+                record_reset(game)
+                game.current_turn_id = game.player1_id
+                save_game(game)
+                publish_game_update(game, dogs, full=True)
+        except StaleGameError:
+            return Response({"error": CONFLICT_ERROR}, status=status.HTTP_409_CONFLICT)
+        except DogType.DoesNotExist:
+            return self.missing_dog_types_response(DEFAULT_GAME_TEMPLATE)
+
+        return Response({"message": "Game has been reset to initial state."})
 
-        # ゲーム内のすべての犬を削除
-        Dog.objects.filter(game=game).delete()
-
-        # プレイヤーを取得
-        player1 = game.player1
-        player2 = game.player2
-
-        # 犬種を取得
-        boss_dog_type = DogType.objects.get(name="ボス犬")
-        normal_dog_type = DogType.objects.get(name="普通の犬")
-        hajike_dog_type = DogType.objects.get(name="ハジケ犬")
-
-        # プレイヤー1のボス犬を作成してボード上に配置
-        Dog.objects.create(
-            game=game,
-            player=player1,
-            dog_type=boss_dog_type,
-            x_position=1,
-            y_position=1,
-            is_in_hand=False,
+    def missing_dog_types_response(self, template_name):
+        """
+        テンプレートの犬種がデータベースに登録されていない場合のレスポンス。
+        """
+        return Response(
+            {"error": f"テンプレート {template_name} の犬種が登録されていません。"},
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
-        # プレイヤー2のボス犬を作成してボード上に配置
-        Dog.objects.create(
-            game=game,
-            player=player2,
-            dog_type=boss_dog_type,
-            x_position=2,
-            y_position=1,
-            is_in_hand=False,
+    @action(detail=False, methods=["post"], url_path="bulk_create")
+    def bulk_create(self, request):
+        """
+        複数のゲームを一度に作成するアクション。
+        games に player1・player2 の組を指定し、template の初期配置で犬を並べる。
+        """
+        pairings = request.data.get("games")
+        template_name = request.data.get("template", DEFAULT_GAME_TEMPLATE)
+        if not isinstance(pairings, list) or not pairings:
+            return Response(
+                {"error": "Missing parameters"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(pairings) > settings.BULK_CREATE_MAX_GAMES:
+            return Response(
+                {
+                    "error": f"一度に作成できるゲームは {settings.BULK_CREATE_MAX_GAMES} までです。"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not isinstance(template_name, str) or template_name not in GAME_TEMPLATES:
+            return Response(
+                {"error": f"テンプレート {template_name} は存在しません。"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            player_ids = [
+                (int(pairing["player1"]), int(pairing["player2"]))
+                for pairing in pairings
+            ]
+        except (KeyError, TypeError, ValueError):
+            return Response(
+                {"error": "Invalid parameters"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        players = Player.objects.in_bulk({id_ for pair in player_ids for id_ in pair})
+        if any(id_ not in players for pair in player_ids for id_ in pair):
+            return Response(
+                {"error": "存在しないプレイヤーが含まれています。"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            games = create_games(
+                [
+                    (players[player1], players[player2])
+                    for player1, player2 in player_ids
+                ],
+                template_name,
+            )
+        except DogType.DoesNotExist:
+            return self.missing_dog_types_response(template_name)
+        return Response(
+            {"template": template_name, "games": [game.id for game in games]},
+            status=status.HTTP_201_CREATED,
         )
 
-        # プレイヤー1の手札に犬を追加
-        Dog.objects.create(
-            game=game, player=player1, dog_type=normal_dog_type, is_in_hand=True
+    @action(detail=False, methods=["get", "post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        複数のゲームの詳細情報をまとめて返すアクション。
+        GET では ?ids=1,2,3、長いリストは POST で {"ids": [1, 2, 3]} のように指定する。
+        ゲームの数によらずクエリ数は一定で、存在しないゲームの ID は not_found に返す。
+        """
+        if request.method == "GET":
+            ids = request.query_params.get("ids")
+        else:
+            ids = request.data.get("ids")
+        if not ids:
+            return Response(
+                {"error": "Missing parameters"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            if isinstance(ids, str):
+                ids = ids.split(",")
+            elif not isinstance(ids, list):
+                raise TypeError
+            # 重複を除き、指定された順に返す
+            game_ids = list(dict.fromkeys(int(id_) for id_ in ids))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Invalid parameters"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(game_ids) > settings.BULK_GAME_STATE_MAX_GAMES:
+            return Response(
+                {
+                    "error": f"一度に取得できるゲームは {settings.BULK_GAME_STATE_MAX_GAMES} までです。"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        found = Game.objects.in_bulk(game_ids)
+        games = [get_live_game(found[id_]) for id_ in game_ids if id_ in found]
+        states = get_game_states(games)
+        return Response(
+            {
+                "games": [
+                    {**states[game.id], "winner": game.winner_id} for game in games
+                ],
+                "not_found": [id_ for id_ in game_ids if id_ not in found],
+            }
         )
-        Dog.objects.create(
-            game=game, player=player1, dog_type=hajike_dog_type, is_in_hand=True
+
+    @action(detail=True, methods=["get"], url_path="legal_moves")
+    def legal_moves(self, request, pk=None):
+        """
+        現在のターンのプレイヤーが取り得る合法な移動と配置を犬ごとに返すアクション。
+        """
+        game = get_live_game(get_object_or_404(Game, pk=pk))
+        board = load_board(game)
+        moves, placements, removals = generate_legal_moves(board, game.current_turn_id)
+
+        return Response(
+            {
+                "game": game.id,
+                "current_turn": game.current_turn_id,
+                "moves": {
+                    dog_id: [{"x": x, "y": y} for x, y in targets]
+                    for dog_id, targets in moves.items()
+                },
+                "placements": {
+                    dog_id: [{"x": x, "y": y} for x, y in targets]
+                    for dog_id, targets in placements.items()
+                },
+                "removals": removals,
+            }
         )
 
-        # プレイヤー2の手札に犬を追加
-        Dog.objects.create(
-            game=game, player=player2, dog_type=normal_dog_type, is_in_hand=True
+    @action(detail=True, methods=["post"], url_path="computer_move")
+    def computer_move(self, request, pk=None):
+        """
+        現在の手番がコンピューターの場合に、その手を求めて指すアクション。
+        """
+        game = get_live_game(
+            get_object_or_404(Game.objects.select_related("current_turn"), pk=pk)
         )
-        Dog.objects.create(
-            game=game, player=player2, dog_type=hajike_dog_type, is_in_hand=True
+        if game.winner_id is not None:
+            return Response(
+                {"error": "ゲームは既に終了しています。"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not game.current_turn.is_bot:
+            return Response(
+                {"error": "現在の手番はコンピューターではありません。"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        move = play_computer_turn(game)
+        if move is None:
+            return Response(
+                {"error": "コンピューターが指せる手がありません。"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        game = get_live_game(game)
+        data = {
+            "computer_move": move_to_dict(move),
+            "current_turn": game.current_turn_id,
+        }
+        if game.winner_id is not None:
+            data["winner"] = game.winner.user.username
+        return Response(data)
+
+    @action(detail=True, methods=["post"], url_path="analyze")
+    def analyze(self, request, pk=None):
+        """
+        現在の手番のプレイヤーの候補手をモンテカルロ木探索で解析するアクション。
+        探索はプロセスプールに投入して終了を待たずに 202 を返す。
+        結果は Location の analysis アクションで取得する。
+        """
+        game = get_live_game(get_object_or_404(Game, pk=pk))
+        try:
+            playouts = int(
+                request.data.get("playouts", settings.ANALYSIS_DEFAULT_PLAYOUTS)
+            )
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Invalid parameters"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= playouts <= settings.ANALYSIS_MAX_PLAYOUTS:
+            return Response(
+                {
+                    "error": f"playouts は 1 から {settings.ANALYSIS_MAX_PLAYOUTS} の範囲で指定してください。"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if game.winner_id is not None:
+            return Response(
+                {"error": "ゲームは既に終了しています。"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        job = start_analysis(game, load_board(game), playouts)
+        return Response(
+            job,
+            status=status.HTTP_202_ACCEPTED,
+            headers={
+                "Location": reverse(
+                    "dog_territory_battle_game_api:game-analysis",
+                    kwargs={"pk": game.id, "job_id": job["job"]},
+                )
+            },
         )
 
-        # ゲームのターンを初期化
-        game.current_turn = player1
-        game.save()
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path=r"analysis/(?P<job_id>[0-9a-f]+)",
+        url_name="analysis",
+    )
+    def analysis(self, request, pk=None, job_id=None):
+        """
+        解析のジョブの状態を返すアクション。
+        探索中は 202、終わった場合は候補手ごとの訪問回数と勝率を 200 で返す。
+        """
+        job = get_analysis(job_id)
+        if job is None or str(job["game"]) != pk:
+            return Response(
+                {"error": "解析のジョブが見つかりません。"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if job["status"] == "running":
+            return Response(job, status=status.HTTP_202_ACCEPTED)
+        if job["status"] == "failed":
+            return Response(
+                {**job, "error": "解析に失敗しました。"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        return Response(job)
 
-        return Response({"message": "Game has been reset to initial state."})
+    @action(detail=True, methods=["get"], url_path="hint")
+    def hint(self, request, pk=None):
+        """
+        エンドゲームテーブルから、現在の局面と各合法手の後の局面の勝敗を返すアクション。
+        結果は現在の手番のプレイヤーから見た値で、テーブルにない局面は null になる。
+        """
+        tablebase = get_tablebase()
+        if tablebase is None:
+            return Response(
+                {"error": "エンドゲームテーブルが読み込まれていません。"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        game = get_live_game(get_object_or_404(Game, pk=pk))
+        board = load_board(game)
+        player_id = game.current_turn_id
+        return Response(
+            {
+                "game": game.id,
+                "current_turn": player_id,
+                "position": entry_to_dict(probe(tablebase, board, player_id)),
+                "moves": [
+                    {**move_to_dict(move), "outcome": entry_to_dict(outcome)}
+                    for move, outcome in probe_moves(tablebase, board, player_id)
+                ],
+            }
+        )
+
+    @action(detail=True, methods=["get"], url_path="moves")
+    def moves(self, request, pk=None):
+        """
+        ゲームの手のログを返すアクション。ply を指定すると、その手が確定した後の
+        全ての犬の位置をログから復元して返す。
+        """
+        game = get_object_or_404(Game, pk=pk)
+        flush_game(game.id)
+        ply = request.query_params.get("ply")
+        try:
+            ply = int(ply) if ply is not None else None
+        except ValueError:
+            return Response(
+                {"error": "Invalid parameters"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        moves = GameMove.objects.filter(game=game).order_by("ply")
+        if ply is not None:
+            moves = moves.filter(ply__lte=ply)
+        moves = list(
+            moves.values(
+                "ply", "kind", "player", "dog", "from_x", "from_y", "to_x", "to_y"
+            )
+        )
+        positions = materialize_positions(game, ply)
+        return Response(
+            {
+                "game": game.id,
+                "ply": moves[-1]["ply"] if moves else 0,
+                "moves": moves,
+                "positions": (
+                    {
+                        dog_id: (
+                            {"x": position[0], "y": position[1]}
+                            if position is not None
+                            else None
+                        )
+                        for dog_id, position in positions.items()
+                    }
+                    if positions is not None
+                    else None
+                ),
+            }
+        )
@@ -0,0 +1,241 @@
+import logging
+import math
+import random
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.conf import settings
+from .board_snapshot import legal_move_list, simulate
+
+logger = logging.getLogger(__name__)
+
+# UCT の探索項の係数
+EXPLORATION = math.sqrt(2)
+
+# プレイアウトを打ち切る手数。打ち切った場合は引き分けとして扱う
+MAX_PLAYOUT_PLIES = 40
+
+# 候補手ごとの集計結果（訪問回数、勝ち数。引き分けは 0.5 勝とする）
+MoveStats = namedtuple("MoveStats", ["visits", "wins"])
+
+_executor = None
+
+
+class Node:
+    """
+    モンテカルロ木のノード。player_id はこのノードに至る手を指したプレイヤーで、
+    wins はそのプレイヤーから見た勝ち数。
+    """
+
+    __slots__ = (
+        "board",
+        "player_id",
+        "winner_id",
+        "children",
+        "untried",
+        "visits",
+        "wins",
+    )
+
+    def __init__(self, board, player_id, winner_id):
+        self.board = board
+        self.player_id = player_id
+        self.winner_id = winner_id
+        self.children = {}
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.0
+
+    def expand_moves(self):
+        """
+        次の手番の合法手を初めて訪れたときに列挙する。
+        """
+        if self.untried is None:
+            if self.winner_id is None:
+                side = self.board.opponent_id(self.player_id)
+                self.untried = legal_move_list(self.board, side)
+            else:
+                self.untried = []
+        return self.untried
+
+    def select_child(self):
+        log_visits = math.log(self.visits)
+        return max(
+            self.children.values(),
+            key=lambda child: child.wins / child.visits
+            + EXPLORATION * math.sqrt(log_visits / child.visits),
+        )
+
+
+def _play(board, move):
+    """
+    手を指した後のボードと勝者のID（いなければ None）を返す。
+    """
+    dog_id, target = move
+    result = simulate(board, board.get_dog(dog_id), target)
+    return result.board, result.winner.id if result.winner else None
+
+
+def _playout(board, side, rng):
+    """
+    ランダムに手を指し、勝者のID（打ち切った場合や合法手がない場合は None）を返す。
+    """
+    for _ in range(MAX_PLAYOUT_PLIES):
+        moves = legal_move_list(board, side)
+        if not moves:
+            return None
+        board, winner_id = _play(board, rng.choice(moves))
+        if winner_id is not None:
+            return winner_id
+        side = board.opponent_id(side)
+    return None
+
+
+def run_playouts(board, player_id, playouts, seed=None):
+    """
+    1つのプロセスでルートからモンテカルロ木探索（UCT）を行う。
+
+    Returns:
+        dict: ルートの候補手をキーにした MoveStats。
+    """
+    rng = random.Random(seed)
+    root = Node(board, board.opponent_id(player_id), None)
+    for _ in range(playouts):
+        node = root
+        path = [node]
+        # 選択: すべての手を展開済みのノードを UCT でたどる
+        while not node.expand_moves() and node.children:
+            node = node.select_child()
+            path.append(node)
+
+        # 展開: 未展開の手を1つ選んで子ノードを作る
+        untried = node.expand_moves()
+        if untried:
+            move = untried.pop(rng.randrange(len(untried)))
+            side = node.board.opponent_id(node.player_id)
+            child_board, winner_id = _play(node.board, move)
+            child = Node(child_board, side, winner_id)
+            node.children[move] = child
+            node = child
+            path.append(node)
+
+        # シミュレーションと逆伝播
+        winner_id = node.winner_id
+        if winner_id is None and node.untried != []:
+            winner_id = _playout(
+                node.board, node.board.opponent_id(node.player_id), rng
+            )
+        for visited in path:
+            visited.visits += 1
+            if winner_id is None:
+                visited.wins += 0.5
+            elif winner_id == visited.player_id:
+                visited.wins += 1
+
+    return {
+        move: MoveStats(child.visits, child.wins)
+        for move, child in root.children.items()
+    }
+
+
+def _run_worker(args):
+    return run_playouts(*args)
+
+
+def get_executor():
+    """
+    解析用のプロセスプールを返す。リクエストを処理するワーカーとは別のプロセスで探索する。
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.ANALYSIS_WORKERS, initializer=django.setup
+        )
+    return _executor
+
+
+def split_playouts(board, player_id, playouts, workers, seed=None):
+    """
+    プレイアウトをプロセス数で分け、プロセスごとの run_playouts の引数のリストを返す。
+    """
+    workers = max(1, min(workers, playouts))
+    rng = random.Random(seed)
+    shares = [playouts // workers + (i < playouts % workers) for i in range(workers)]
+    return [(board, player_id, share, rng.getrandbits(32)) for share in shares]
+
+
+def merge_results(results):
+    """
+    プロセスごとの MoveStats を候補手ごとに合計する。
+
+    Returns:
+        list: 訪問回数の多い順に並べた (手, 訪問回数, 勝率) のタプルのリスト。
+    """
+    totals = {}
+    for stats in results:
+        for move, (visits, wins) in stats.items():
+            total_visits, total_wins = totals.get(move, (0, 0.0))
+            totals[move] = (total_visits + visits, total_wins + wins)
+
+    return sorted(
+        (
+            (move, visits, wins / visits if visits else 0.0)
+            for move, (visits, wins) in totals.items()
+        ),
+        key=lambda item: (-item[1], -item[2]),
+    )
+
+
+def analyze(board, player_id, playouts, workers=None, seed=None):
+    """
+    ルート並列のモンテカルロ木探索で候補手ごとの訪問回数と勝率を求め、終わるまで待つ。
+
+    プレイアウトをプロセス数で分け、各プロセスで独立に木を作って候補手ごとに合計する。
+    workers が 1 の場合はプロセスプールを使わずに探索する。
+    リクエストの処理中は呼ばず、submit_analysis を使うこと。
+
+    Returns:
+        list: 訪問回数の多い順に並べた (手, 訪問回数, 勝率) のタプルのリスト。
+    """
+    if workers is None:
+        workers = settings.ANALYSIS_WORKERS
+    jobs = split_playouts(board, player_id, playouts, workers, seed)
+    if len(jobs) == 1:
+        results = [_run_worker(job) for job in jobs]
+    else:
+        results = list(get_executor().map(_run_worker, jobs))
+
+    logger.debug(f"Analysis: playouts={playouts} workers={len(jobs)}")
+    return merge_results(results)
+
+
+def submit_analysis(board, player_id, playouts, on_done, seed=None):
+    """
+    プレイアウトをプロセスプールに投入し、探索の終了を待たずに戻る。
+
+    全てのプロセスの探索が終わると、プロセスプールのスレッドから on_done(results, error) を
+    呼ぶ。成功した場合の results は analyze と同じ形式で error は None、
+    失敗した場合は results が None で error が送出された例外になる。
+    """
+    jobs = split_playouts(board, player_id, playouts, settings.ANALYSIS_WORKERS, seed)
+    futures = [get_executor().submit(_run_worker, job) for job in jobs]
+    lock = threading.Lock()
+    remaining = [len(futures)]
+
+    def collect(_future):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        try:
+            results = merge_results([future.result() for future in futures])
+        except Exception as error:
+            logger.exception("Analysis failed.")
+            on_done(None, error)
+            return
+        logger.debug(f"Analysis: playouts={playouts} workers={len(jobs)}")
+        on_done(results, None)
+
+    for future in futures:
+        future.add_done_callback(collect)
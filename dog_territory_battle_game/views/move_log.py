@@ -0,0 +1,322 @@
+import logging
+from collections import namedtuple
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from ..models import Dog, Game, GameMove, GameSnapshot
+from .board_snapshot import BoardSnapshot, load_dogs
+from .dog_utils import (
+    DOG_POSITION_FIELDS,
+    GAME_STATE_FIELDS,
+    StaleGameError,
+    declare_winner,
+    switch_turn,
+    update_current_turn,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def current_positions(game):
+    """
+    Dog テーブルから全ての犬の位置を読み込む（犬のIDをキーに (x, y)、手札は None）。
+    """
+    return {
+        dog_id: None if is_in_hand else (x, y)
+        for dog_id, x, y, is_in_hand in Dog.objects.filter(game=game).values_list(
+            "id", "x_position", "y_position", "is_in_hand"
+        )
+    }
+
+
+def build_snapshot(game, ply, positions):
+    """
+    ply の手が確定した後の位置のスナップショットを作成する（保存は行わない）。
+    """
+    return GameSnapshot(
+        game=game,
+        ply=ply,
+        positions={
+            str(dog_id): list(position) if position is not None else None
+            for dog_id, position in positions.items()
+        },
+    )
+
+
+def take_snapshot(game, ply, positions):
+    """
+    ply の手が確定した後の位置をスナップショットとして保存する。
+    """
+    snapshot = build_snapshot(game, ply, positions)
+    snapshot.save()
+    return snapshot
+
+
+def next_ply(game):
+    """
+    ログに追記する次の手の番号を返す。ゲームのバージョンではなくログの最後の手から数える。
+    """
+    last_ply = (
+        GameMove.objects.filter(game=game)
+        .order_by("-ply")
+        .values_list("ply", flat=True)
+        .first()
+    )
+    return (last_ply or 0) + 1
+
+
+def next_plies(game_ids):
+    """
+    複数のゲームについて、ログに追記する次の手の番号を1回のクエリで求める。
+    """
+    plies = {game_id: 1 for game_id in game_ids}
+    for game_id, last_ply in (
+        GameMove.objects.filter(game__in=game_ids)
+        .values("game")
+        .annotate(last_ply=Max("ply"))
+        .values_list("game", "last_ply")
+    ):
+        plies[game_id] = last_ply + 1
+    return plies
+
+
+def build_move(game, ply, dog, kind, origin, target):
+    """
+    ply 番目の手のログを作成する（保存は行わない）。
+    """
+    return GameMove(
+        game=game,
+        ply=ply,
+        player_id=dog.player_id,
+        dog=dog,
+        kind=kind,
+        from_x=origin[0] if origin else None,
+        from_y=origin[1] if origin else None,
+        to_x=target[0] if target else None,
+        to_y=target[1] if target else None,
+    )
+
+
+def record_move(game, dog, kind, origin, target):
+    """
+    手をログに追記する。Dog の位置を保存する前に呼ぶこと。
+
+    ログに最初の手を追記するときは、その時点の Dog テーブルの位置を起点のスナップショットにする。
+    以降は GAME_SNAPSHOT_INTERVAL 手ごとに、ログから復元した位置をスナップショットにする。
+    """
+    ply = next_ply(game)
+    if ply == 1:
+        take_snapshot(game, 0, current_positions(game))
+
+    build_move(game, ply, dog, kind, origin, target).save()
+    if ply % settings.GAME_SNAPSHOT_INTERVAL == 0:
+        take_snapshot(game, ply, materialize_positions(game, ply))
+
+
+def commit_move(board, dog, kind, origin, target, winner=None):
+    """
+    手を確定する。手のログの追記、board 上の位置での犬の保存、手番の更新
+    （勝者が決まった場合は勝者の設定）を1つのトランザクションで行う。
+
+    ゲームを読み込んだ後に他の手が確定していた場合（バージョンの不一致）や、
+    移動先のマスが埋まっていた場合（一意制約の違反）は、何も保存せずに False を返す。
+    """
+    game = board.game
+    try:
+        with transaction.atomic():
+            record_move(game, dog, kind, origin, target)
+            board.save_dog(dog)
+            if winner:
+                declare_winner(game, winner)
+            else:
+                update_current_turn(game)
+    except (StaleGameError, IntegrityError):
+        logger.info(f"Move of dog {dog.id} to {target} conflicted with another move.")
+        return False
+    return True
+
+
+# MoveBuffer から取り出した、まとめて書き込む1ゲーム分の内容
+# （前回書き込んだゲームのバージョン、手のログ、スナップショット、犬の位置、ゲームの行）
+PendingWrite = namedtuple(
+    "PendingWrite", ["expected_version", "moves", "snapshots", "dogs", "game"]
+)
+
+
+class MoveBuffer:
+    """
+    メモリ上で確定した1ゲーム分の手を溜めておき、write_pending でまとめて書き込むためのバッファ。
+
+    手を適用するたびにゲーム（手番・勝者・バージョン・packed board）と局面を更新し、
+    手のログとスナップショットは保存せずに溜めておく。
+    """
+
+    def __init__(self, board, ply, version):
+        # board.game は手を適用するたびに更新する
+        self.board = board
+        self.ply = ply
+        self.written_version = version
+        self.moves = []
+        self.snapshots = []
+
+    def apply(self, board, dog, kind, origin, target, winner=None):
+        """
+        検証済みの手をメモリ上の局面とゲームに適用する。board は self.board の複製に手を適用した局面。
+        """
+        game = self.board.game
+        self.ply += 1
+        if self.ply == 1:
+            # ログの最初の手の前の位置を起点のスナップショットにする
+            self.snapshots.append(build_snapshot(game, 0, self.board.positions))
+        board.apply_to(dog)
+        board.game = game
+        self.board = board
+
+        game.board = board.pack()
+        if winner:
+            game.winner = winner
+        else:
+            switch_turn(game)
+        game.updated_at = dog.updated_at = timezone.now()
+        game.version += 1
+
+        self.moves.append(build_move(game, self.ply, dog, kind, origin, target))
+        if self.ply % settings.GAME_SNAPSHOT_INTERVAL == 0:
+            self.snapshots.append(build_snapshot(game, self.ply, board.positions))
+
+    def drain(self):
+        """
+        溜めた手を取り出して PendingWrite にする。溜めた手がない場合は None を返す。
+        """
+        if not self.moves:
+            return None
+        game = self.board.game
+        dogs = {move.dog_id: move.dog for move in self.moves}
+        write = PendingWrite(
+            self.written_version,
+            self.moves,
+            self.snapshots,
+            [
+                Dog(pk=dog.pk, **{f: getattr(dog, f) for f in DOG_POSITION_FIELDS})
+                for dog in dogs.values()
+            ],
+            Game(pk=game.pk, **{f: getattr(game, f) for f in GAME_STATE_FIELDS}),
+        )
+        self.moves, self.snapshots = [], []
+        return write
+
+    def restore(self, write):
+        """
+        書き込めなかった手をバッファに戻す。
+        """
+        self.moves = write.moves + self.moves
+        self.snapshots = write.snapshots + self.snapshots
+
+    def mark_written(self, write):
+        """
+        write_pending で書き込んだ後に呼び、次に書き込むときに期待するバージョンを進める。
+        """
+        self.written_version = write.game.version
+
+
+def write_pending(writes):
+    """
+    複数のゲームの PendingWrite を1つのトランザクションでまとめて書き込む。
+
+    ゲームの行は前回書き込んだバージョンのままの場合にのみ更新する（compare-and-swap）。
+    更新できなかったゲームがある場合は何も保存せず、そのゲームのIDを game_ids に持つ
+    StaleGameError を送出する。
+    """
+    condition = Q()
+    for write in writes:
+        condition |= Q(pk=write.game.pk, version=write.expected_version)
+    games = [write.game for write in writes]
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                updated = Game.objects.filter(condition).bulk_update(
+                    games, GAME_STATE_FIELDS
+                )
+                if updated != len(games):
+                    raise StaleGameError(
+                        "Some games have been updated by other requests."
+                    )
+        except StaleGameError as error:
+            # 更新を取り消した後のバージョンと比べて、更新されていたゲームを特定する
+            versions = dict(
+                Game.objects.filter(pk__in=[game.pk for game in games]).values_list(
+                    "id", "version"
+                )
+            )
+            error.game_ids = {
+                write.game.pk
+                for write in writes
+                if versions.get(write.game.pk) != write.expected_version
+            }
+            raise
+
+        GameMove.objects.bulk_create([move for write in writes for move in write.moves])
+        GameSnapshot.objects.bulk_create(
+            [snapshot for write in writes for snapshot in write.snapshots]
+        )
+        # 犬同士でマスを入れ替えた場合に一意制約に掛からないよう、
+        # 一度手札に戻してから最終的な位置を書き込む
+        dogs = [dog for write in writes for dog in write.dogs]
+        Dog.objects.filter(pk__in=[dog.pk for dog in dogs]).update(
+            x_position=None, y_position=None, is_in_hand=True
+        )
+        Dog.objects.bulk_update(dogs, DOG_POSITION_FIELDS)
+
+
+def record_reset(game):
+    """
+    ゲームのリセットをログに追記し、リセット後の位置をスナップショットにする。
+    犬を作り直した後に呼ぶこと。
+    """
+    ply = next_ply(game)
+    GameMove.objects.create(game=game, ply=ply, kind=GameMove.KIND_RESET)
+    take_snapshot(game, ply, current_positions(game))
+
+
+def materialize_positions(game, ply=None):
+    """
+    最新のスナップショットとそれ以降の手から、ply の手が確定した後の位置を復元する。
+    ply を省略した場合は最新の位置を返す。スナップショットがない場合は None を返す。
+    """
+    snapshots = GameSnapshot.objects.filter(game=game)
+    moves = GameMove.objects.filter(game=game)
+    if ply is not None:
+        snapshots = snapshots.filter(ply__lte=ply)
+        moves = moves.filter(ply__lte=ply)
+    snapshot = snapshots.order_by("-ply").first()
+    if snapshot is None:
+        return None
+
+    positions = {
+        int(dog_id): tuple(position) if position is not None else None
+        for dog_id, position in snapshot.positions.items()
+    }
+    for dog_id, to_x, to_y in (
+        moves.filter(ply__gt=snapshot.ply, dog__isnull=False)
+        .order_by("ply")
+        .values_list("dog_id", "to_x", "to_y")
+    ):
+        positions[dog_id] = (to_x, to_y) if to_x is not None else None
+    return positions
+
+
+def load_board_from_log(game, ply=None):
+    """
+    手のログから復元した位置で BoardSnapshot を作成する（Dog インスタンスの位置も書き換える）。
+    ログがない場合は Dog テーブルの位置をそのまま使う。
+    """
+    dogs = load_dogs(game)
+    positions = materialize_positions(game, ply)
+    if positions is not None:
+        dogs = [dog for dog in dogs if dog.id in positions]
+        for dog in dogs:
+            position = positions[dog.id]
+            dog.is_in_hand = position is None
+            dog.x_position, dog.y_position = position or (None, None)
+    return BoardSnapshot(game, dogs)
@@ -0,0 +1,99 @@
+from collections import namedtuple
+from ..models import GameMove
+from .board_snapshot import simulate
+
+# 検証を通過した手（手の種類、移動元、移動先、手を適用した局面、勝者（決まらない場合は None））
+# board は元の局面の複製で、元の局面は変更しない
+CheckedMove = namedtuple("CheckedMove", ["kind", "origin", "target", "board", "winner"])
+
+
+class InvalidMove(Exception):
+    """
+    ルール上指せない手。メッセージはそのままレスポンスのエラーに使う。
+    """
+
+
+def check_turn(dog):
+    """
+    現在のターンが犬のプレイヤーのターンかを確認する。
+    """
+    if dog.game.current_turn_id != dog.player_id:
+        raise InvalidMove("まだあなたのターンではありません！")
+
+
+def check_move(board, dog, new_x, new_y):
+    """
+    ボード上の犬を (new_x, new_y) に移動する手を検証する。
+    """
+    if board.positions[dog.id] is None:
+        raise InvalidMove("手札の犬は移動できません。ボードに配置してください。")
+
+    if not board.is_within_field_after_move(new_x, new_y, dog.id):
+        raise InvalidMove("フィールドのサイズを超えるため移動できません。")
+
+    if not board.is_valid_move(dog, new_x, new_y):
+        raise InvalidMove("この犬種では無効な移動です。")
+
+    if board.is_square_occupied(new_x, new_y):
+        raise InvalidMove("そのマスには既にコマがあります。")
+
+    if not board.is_adjacent_after_move(new_x, new_y, dog.id):
+        raise InvalidMove("他のコマと隣接していない場所には移動できません。")
+
+    # メモリ上で移動を試し、データベースには書き込まない
+    result = simulate(board, dog, (new_x, new_y))
+    if result.self_loss:
+        raise InvalidMove("この移動はあなたのボス犬が囲まれるため、移動できません。")
+
+    return CheckedMove(
+        GameMove.KIND_MOVE,
+        board.positions[dog.id],
+        (new_x, new_y),
+        result.board,
+        result.winner,
+    )
+
+
+def check_place(board, dog, new_x, new_y):
+    """
+    手札の犬を (new_x, new_y) に配置する手を検証する。
+    """
+    if board.positions[dog.id] is not None:
+        raise InvalidMove("ボード上の犬は配置できません。移動を使ってください。")
+
+    if not board.is_within_field_after_move(new_x, new_y, dog.id):
+        raise InvalidMove("フィールドのサイズを超えるため配置できません。")
+
+    if board.is_square_occupied(new_x, new_y):
+        raise InvalidMove("そのマスには既にコマがあります。")
+
+    if not board.is_adjacent_after_place(new_x, new_y, dog):
+        raise InvalidMove("他のコマと隣接していない場所には配置できません。")
+
+    # メモリ上で配置を試し、データベースには書き込まない
+    result = simulate(board, dog, (new_x, new_y))
+    if result.self_loss:
+        raise InvalidMove("この配置はあなたのボス犬が囲まれるため、配置できません。")
+
+    return CheckedMove(
+        GameMove.KIND_PLACE, None, (new_x, new_y), result.board, result.winner
+    )
+
+
+def check_remove(board, dog):
+    """
+    ボード上の犬を手札に戻す手を検証する。
+    """
+    if board.positions[dog.id] is None:
+        raise InvalidMove("この犬は既に手札にあります。")
+
+    if dog.dog_type.is_boss:
+        raise InvalidMove("ボス犬は手札に戻せません。")
+
+    if not board.can_remove_dog(dog):
+        raise InvalidMove("このコマを手札に戻すと、他のコマが孤立します。")
+
+    origin = board.positions[dog.id]
+    board = board.copy()
+    board.return_to_hand(dog)
+    return CheckedMove(GameMove.KIND_REMOVE, origin, None, board, None)
@@ -0,0 +1,51 @@
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+
+# 真偽値のクエリパラメーターとして受け付ける値
+TRUE_VALUES = {"true", "1"}
+FALSE_VALUES = {"false", "0"}
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    主キーの順に一覧を返すカーソルページネーション。
+
+    次のページは直前のページの最後の id より後ろから読むため（WHERE id > ? ORDER BY id LIMIT n）、
+    何ページ目でもインデックスを辿るだけで済み、件数を数えるクエリも発行しない。
+    """
+
+    ordering = "id"
+    page_size_query_param = "page_size"
+
+    def __init__(self):
+        self.page_size = settings.API_PAGE_SIZE
+        self.max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+def int_param(request, name):
+    """
+    整数のクエリパラメーターを返す。指定されていない場合は None、不正な値の場合は 400 にする。
+    """
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({"error": "Invalid parameters"})
+
+
+def bool_param(request, name):
+    """
+    真偽値のクエリパラメーター（true/false、1/0）を返す。
+    指定されていない場合は None、不正な値の場合は 400 にする。
+    """
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise ValidationError({"error": "Invalid parameters"})
@@ -1,12 +1,25 @@
 from rest_framework import viewsets
 from ..models import Player
 from ..serializers import PlayerSerializer
+from .pagination import IdCursorPagination, bool_param
 
 
 class PlayerViewSet(viewsets.ModelViewSet):
     """
     プレイヤーのCRUD操作を提供するViewSet。
+    一覧は id 順のカーソルページネーションで返し、?active= で削除されていないプレイヤーに絞り込む。
     """
 
     queryset = Player.objects.all()
     serializer_class = PlayerSerializer
+    pagination_class = IdCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+
+        active = bool_param(self.request, "active")
+        if active is not None:
+            queryset = queryset.filter(deleted_at__isnull=active)
+        return queryset